@@ -0,0 +1,56 @@
+# Micro-benchmark: búsqueda en descripción y proveedor con str.contains sobre todas las filas vs. IndiceTexto.
+# Arma un dataset grande repitiendo las órdenes de ejemplo (cada copia con un sufijo distinto en la
+# descripción, para que los textos distintos también crezcan). Uso: python benchmarks/bench_busqueda.py [copias]
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from busqueda_arsat import IndiceTexto, plegar_texto
+from datos_arsat import ARCHIVO_OC_EJEMPLO, get_path
+from ingesta_arsat import leer_ordenes_compra_por_chunks
+
+CONSULTAS = ["FORD RANGER", "SERVICE 150000 KM", "FORD RANGER o SERVICE 150000 KM", "rang", "señal"]
+
+
+def busqueda_str_contains(descripciones, proveedores, consulta):
+    # Lo que haría un analista sin índice: una pasada de str.contains por término y columna.
+    resultado = np.zeros(len(descripciones), dtype=bool)
+    for alternativa in consulta.replace(" o ", "|").split("|"):
+        coincide = np.ones(len(descripciones), dtype=bool)
+        for termino in plegar_texto(alternativa).split():
+            coincide &= (descripciones.str.contains(termino, regex=False) | proveedores.str.contains(termino, regex=False)).to_numpy()
+        resultado |= coincide
+    return np.flatnonzero(resultado)
+
+def medir(funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+if __name__ == "__main__":
+    copias = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    df_base = leer_ordenes_compra_por_chunks(get_path(ARCHIVO_OC_EJEMPLO))[0]
+    df = pd.concat([df_base.assign(descripcion_producto=df_base['descripcion_producto'] + f" LOTE{i}") for i in range(copias)], ignore_index=True)
+    print(f"{len(df):,} órdenes")
+
+    inicio = time.perf_counter()
+    indice = IndiceTexto(df)
+    print(f"Construcción del índice: {time.perf_counter() - inicio:.2f} s ({len(indice.vocabulario):,} palabras)")
+    # El texto plegado (mayúsculas sin tildes) se prepara una sola vez, fuera de la medición.
+    descripciones = df['descripcion_producto'].astype(str).map(plegar_texto)
+    proveedores = df['proveedor'].astype(str).map(plegar_texto)
+
+    for consulta in CONSULTAS:
+        t_contains, esperado = medir(lambda: busqueda_str_contains(descripciones, proveedores, consulta), repeticiones=1)
+        t_indice, obtenido = medir(lambda: indice.buscar(consulta))
+        # str.contains busca subcadenas en todo el texto; el índice, dentro de cada palabra.
+        print(f"{consulta!r:<36} str.contains: {t_contains * 1000:8.1f} ms ({len(esperado):,} filas)   "
+              f"índice: {t_indice * 1000:6.2f} ms ({len(obtenido):,} filas)")
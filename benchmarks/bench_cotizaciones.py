@@ -0,0 +1,63 @@
+# Micro-benchmark: conversión de las órdenes a pesos buscando la cotización fila por fila (Series.asof)
+# vs. el as-of join vectorizado de cotizaciones_arsat. Las cotizaciones son sintéticas (una por día hábil,
+# 2020-2024) y las órdenes se arman repitiendo las de ejemplo. La búsqueda por fila se mide sobre las
+# primeras 20.000 órdenes. Uso: python benchmarks/bench_cotizaciones.py [copias]
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cotizaciones_arsat import DIAS_VIGENCIA_COTIZACION, MONEDA_PESOS, _moneda_plegada, tasas_a_pesos
+from datos_arsat import ARCHIVO_OC_EJEMPLO, get_path
+from ingesta_arsat import leer_ordenes_compra_por_chunks
+
+MUESTRA_FILA_POR_FILA = 20_000
+
+
+def cotizaciones_sinteticas():
+    dias = pd.date_range('2020-01-01', '2024-12-31', freq='B')
+    dolar = 100 * np.exp(np.linspace(0, 2.5, len(dias)))
+    return pd.DataFrame({
+        'fecha': np.concatenate([dias, dias]), 'moneda': ['DOLARES'] * len(dias) + ['EURO'] * len(dias),
+        'cotizacion': np.concatenate([dolar, dolar * 1.08]),
+    })
+
+def tasas_fila_por_fila(fechas, monedas, cotizaciones):
+    series = {moneda: grupo.set_index('fecha')['cotizacion'] for moneda, grupo in cotizaciones.groupby('moneda')}
+    tasas = []
+    for fecha, moneda in zip(fechas, monedas):
+        plegada = _moneda_plegada(moneda)
+        if plegada == _moneda_plegada(MONEDA_PESOS):
+            tasas.append(1.0)
+            continue
+        serie = series.get(plegada)
+        fecha_cotizacion = serie.index.asof(fecha) if serie is not None and pd.notna(fecha) else pd.NaT
+        vigente = pd.notna(fecha_cotizacion) and (fecha.normalize() - fecha_cotizacion).days <= DIAS_VIGENCIA_COTIZACION
+        tasas.append(serie[fecha_cotizacion] if vigente else np.nan)
+    return np.array(tasas)
+
+def medir(funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+if __name__ == "__main__":
+    copias = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    df_base = leer_ordenes_compra_por_chunks(get_path(ARCHIVO_OC_EJEMPLO))[0]
+    df = pd.concat([df_base] * copias, ignore_index=True)
+    cotizaciones = cotizaciones_sinteticas()
+    print(f"{len(df):,} órdenes, {len(cotizaciones):,} cotizaciones")
+
+    muestra = df.iloc[:MUESTRA_FILA_POR_FILA]
+    t_fila, esperado = medir(lambda: tasas_fila_por_fila(muestra['fecha'], muestra['moneda'], cotizaciones), repeticiones=1)
+    t_vectorizado, obtenido = medir(lambda: tasas_a_pesos(df['fecha'], df['moneda'], cotizaciones))
+    assert np.allclose(esperado, obtenido[:len(muestra)], equal_nan=True)
+    print(f"fila por fila:   {t_fila:.2f} s para {len(muestra):,} órdenes (~{t_fila * len(df) / len(muestra):.0f} s estimados para todas)")
+    print(f"as-of join:      {t_vectorizado:.3f} s para {len(df):,} órdenes")
@@ -0,0 +1,60 @@
+# Micro-benchmark: exportación a Excel con pd.ExcelWriter + to_excel vs. exportar_excel (constant_memory por bloques).
+# Mide tiempo y memoria pico (tracemalloc, que hace todo más lento: los tiempos sólo sirven para comparar). Uso: python benchmarks/bench_exportacion.py [filas]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from exportacion_arsat import exportar_excel
+
+
+def exportacion_original(df, ruta):
+    df_para_excel = df.copy()
+    nombres_encabezado = [col.replace('_', ' ').title() for col in df_para_excel.columns]
+    df_para_excel['fecha'] = df_para_excel['fecha'].dt.strftime('%d/%m/%Y')
+    engine_kwargs = {'options': {'strings_to_numbers': False, 'strings_to_formulas': False}}
+    with pd.ExcelWriter(ruta, engine='xlsxwriter', engine_kwargs=engine_kwargs) as writer:
+        df_para_excel.to_excel(writer, sheet_name='Datos', index=False, header=False, startrow=1)
+        worksheet = writer.sheets['Datos']
+        for col_num, value in enumerate(nombres_encabezado):
+            worksheet.write(0, col_num, value)
+        for i, col in enumerate(df.columns):
+            column_len = max(df_para_excel[col].astype(str).map(len).max(), len(nombres_encabezado[i])) + 2
+            worksheet.set_column(i, i, min(column_len, 50))
+        worksheet.freeze_panes(1, 0)
+
+def generar_ordenes(filas, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'fecha': pd.Timestamp('2020-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 1500, size=filas)), unit='D'),
+        'comprobante': [f"OC-{i:08d}" for i in range(filas)],
+        'proveedor': pd.Categorical(rng.choice([f"PROVEEDOR {i} S.A." for i in range(500)], size=filas)),
+        'descripcion_producto': rng.choice([f"Servicio de mantenimiento tipo {i}" for i in range(2000)], size=filas),
+        'importe': rng.integers(1, 100_000_000_000, size=filas) / 100,
+        'moneda': pd.Categorical(rng.choice(['Pesos', 'Dólares'], size=filas)),
+    })
+
+def medir(funcion, df, ruta):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcion(df, ruta)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico / 2**20
+
+
+if __name__ == "__main__":
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"Generando {filas:,} órdenes de prueba...")
+    df = generar_ordenes(filas)
+    with tempfile.TemporaryDirectory() as directorio:
+        t_original, m_original = medir(exportacion_original, df, os.path.join(directorio, 'original.xlsx'))
+        t_nueva, m_nueva = medir(lambda d, r: exportar_excel(d, r, 'Datos', '#D7E4BC'), df, os.path.join(directorio, 'nueva.xlsx'))
+    print(f"pd.ExcelWriter + to_excel:        {t_original:.2f} s, memoria pico {m_original:,.0f} MiB")
+    print(f"exportar_excel (constant_memory): {t_nueva:.2f} s, memoria pico {m_nueva:,.0f} MiB  ({t_original / t_nueva:.1f}x)")
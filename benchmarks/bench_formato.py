@@ -0,0 +1,61 @@
+# Micro-benchmark: formato es-AR escalar (f-string + .replace x3 por valor) vs. formato_arsat vectorizado.
+# Uso: python benchmarks/bench_formato.py [valores]
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from formato_arsat import formatear_enteros, formatear_importes, formatear_si
+
+
+# Versiones originales del dashboard (un valor por llamada).
+def format_value_with_si_dot_sep(value, prefix=""):
+    if pd.isna(value) or not isinstance(value, (int, float)): return ""
+    abs_value = abs(value)
+    if abs_value >= 1_000_000_000: val_str = f"{value / 1_000_000_000:,.1f}G"
+    elif abs_value >= 1_000_000: val_str = f"{value / 1_000_000:,.1f}M"
+    elif abs_value >= 1_000: val_str = f"{value / 1_000:,.1f}K"
+    else: val_str = f"{value:,.0f}"
+    formatted_str = val_str.replace(",", "X").replace(".", ",").replace("X", ".")
+    return prefix + formatted_str
+
+def format_tick_value(value, prefix=""):
+    if pd.isna(value): return ""
+    return f"{prefix}{value:,.0f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def format_importe(value, prefix=""):
+    return f"{prefix}{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if pd.notna(value) else ""
+
+def generar_importes(valores, semilla=0):
+    # Importes en centavos enteros, como los que entrega el parser de limpieza, en varios órdenes de magnitud.
+    rng = np.random.default_rng(semilla)
+    return rng.integers(1, 10 ** rng.integers(1, 15, size=valores)) / 100
+
+def medir(funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+if __name__ == "__main__":
+    valores = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Generando {valores:,} importes de prueba...")
+    importes = generar_importes(valores)
+    serie = pd.Series(importes)
+
+    casos = [
+        ("Importe completo (ARS$ 1.234,56)", lambda: serie.apply(format_importe, prefix="ARS$ "), lambda: formatear_importes(importes, "ARS$ ")),
+        ("Entero (rótulos de ejes)", lambda: serie.apply(format_tick_value, prefix="U$D "), lambda: formatear_enteros(importes, "U$D ")),
+        ("Abreviado SI (1,5M)", lambda: serie.apply(format_value_with_si_dot_sep, prefix="€ "), lambda: formatear_si(importes, "€ ")),
+    ]
+    for nombre, escalar, vectorizado in casos:
+        t_escalar, esperado = medir(escalar, repeticiones=1)
+        t_vectorizado, obtenido = medir(vectorizado)
+        distintos = int((esperado.to_numpy(dtype=object) != obtenido).sum())
+        print(f"{nombre}: .apply {t_escalar:.2f} s | vectorizado {t_vectorizado:.2f} s ({t_escalar / t_vectorizado:.1f}x) | distintos: {distintos}")
@@ -0,0 +1,48 @@
+# Micro-benchmark: parser vectorizado de importes vs. la cadena original de .str.replace + pd.to_numeric.
+# Uso: python benchmarks/bench_importe.py [filas]
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from limpieza_arsat import parsear_importes, parsear_importes_centavos
+
+
+def cadena_original(serie):
+    serie = serie.astype(str).str.replace('"', '', regex=False).str.replace('$', '', regex=False).str.strip().str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    return pd.to_numeric(serie, errors='coerce')
+
+def generar_importes(filas, semilla=0):
+    rng = np.random.default_rng(semilla)
+    centavos = rng.integers(1, 100_000_000_000, size=filas)
+    enteros = [f"{c // 100:,}".replace(",", ".") for c in centavos]
+    return pd.Series([f"$ {e},{c % 100:02d}" for e, c in zip(enteros, centavos)])
+
+def medir(funcion, serie, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(serie)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+if __name__ == "__main__":
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Generando {filas:,} importes de prueba...")
+    serie = generar_importes(filas)
+
+    esperado = cadena_original(serie)
+    obtenido, rechazados = parsear_importes(serie)
+    assert rechazados.sum() == 0
+    assert np.array_equal(esperado.to_numpy(), obtenido.to_numpy())
+
+    t_original = medir(cadena_original, serie)
+    t_float = medir(parsear_importes, serie)
+    t_centavos = medir(parsear_importes_centavos, serie)
+    print(f"Cadena original (.str.replace x5 + to_numeric): {t_original:.3f} s")
+    print(f"parsear_importes (float64):                    {t_float:.3f} s  ({t_original / t_float:.1f}x)")
+    print(f"parsear_importes_centavos (Int64 exacto):      {t_centavos:.3f} s  ({t_original / t_centavos:.1f}x)")
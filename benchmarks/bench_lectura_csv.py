@@ -0,0 +1,62 @@
+# Micro-benchmark: lectura + limpieza de los dos formatos de CSV con el motor 'pandas' vs. el motor 'arrow'.
+# Arma archivos grandes repitiendo las filas de los CSV de ejemplo. Sólo mide la lectura (sin la caché en disco).
+# La diferencia depende de la cantidad de núcleos: en un equipo de un solo núcleo Arrow no puede repartir el parseo.
+# Uso: python benchmarks/bench_lectura_csv.py [repeticiones del archivo de órdenes]
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datos_arsat import ARCHIVO_OC_EJEMPLO, ARCHIVO_TR_EJEMPLO, get_path
+from ingesta_arsat import leer_ordenes_compra_por_chunks, leer_transferencias
+
+
+def repetir_csv(ruta_origen, ruta_destino, repeticiones):
+    with open(ruta_origen, 'rb') as origen:
+        encabezado = origen.readline()
+        cuerpo = origen.read()
+    if not cuerpo.endswith(b'\n'):
+        cuerpo += b'\n'
+    with open(ruta_destino, 'wb') as destino:
+        destino.write(encabezado)
+        for _ in range(repeticiones):
+            destino.write(cuerpo)
+
+def medir(funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+def textos_como_object(df):
+    return df.astype({c: object for c in df.select_dtypes(['object', 'string']).columns})
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta_oc = os.path.join(directorio, 'ordenes.csv')
+        ruta_tr = os.path.join(directorio, 'transferencias.csv')
+        repetir_csv(get_path(ARCHIVO_OC_EJEMPLO), ruta_oc, repeticiones)
+        repetir_csv(get_path(ARCHIVO_TR_EJEMPLO), ruta_tr, repeticiones * 50)
+        print(f"Núcleos: {os.cpu_count()}, hilos de Arrow: {pa.cpu_count()}")
+
+        for nombre, ruta, leer in [("Órdenes de compra", ruta_oc, lambda ruta, motor: leer_ordenes_compra_por_chunks(ruta, motor=motor)),
+                                   ("Transferencias", ruta_tr, leer_transferencias)]:
+            t_pandas, (df_pandas, *_) = medir(lambda: leer(ruta, 'pandas'))
+            t_arrow, (df_arrow, *_) = medir(lambda: leer(ruta, 'arrow'))
+            pd.testing.assert_frame_equal(textos_como_object(df_pandas), textos_como_object(df_arrow))
+            megas = os.path.getsize(ruta) / 1e6
+            print(f"{nombre} ({len(df_pandas):,} filas, {megas:.0f} MB):")
+            print(f"    motor 'pandas': {t_pandas:.3f} s")
+            print(f"    motor 'arrow':  {t_arrow:.3f} s  ({t_pandas / t_arrow:.1f}x)")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
@@ -0,0 +1,55 @@
+# Micro-benchmark: posibles proveedores duplicados comparando todos los pares de claves vs. el índice MinHash.
+# Arma un padrón grande a partir de las claves de ejemplo, agregando a cada copia un sufijo distinto y, a algunas,
+# una variante con un error de tipeo. Uso: python benchmarks/bench_proveedores.py [copias]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datos_arsat import ARCHIVO_OC_EJEMPLO, get_path
+from ingesta_arsat import leer_ordenes_compra_por_chunks
+from proveedores_arsat import UMBRAL_SIMILITUD, jaccard, posibles_duplicados, shingles
+
+
+def con_error_de_tipeo(clave, generador):
+    i = generador.randrange(len(clave))
+    return clave[:i] + clave[i + 1:]
+
+def duplicados_todos_los_pares(claves, umbral=UMBRAL_SIMILITUD):
+    conjuntos = [shingles(clave) for clave in claves]
+    pares = set()
+    for i in range(len(claves)):
+        for j in range(i + 1, len(claves)):
+            if jaccard(conjuntos[i], conjuntos[j]) >= umbral:
+                pares.add(tuple(sorted((claves[i], claves[j]))))
+    return pares
+
+def medir(funcion, repeticiones=3):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+if __name__ == "__main__":
+    copias = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    generador = random.Random(0)
+    claves_base = leer_ordenes_compra_por_chunks(get_path(ARCHIVO_OC_EJEMPLO))[0]['proveedor_clave'].cat.categories
+    claves = []
+    for i in range(copias):
+        for clave in claves_base:
+            claves.append(f"{clave} {i:04d}")
+            if generador.random() < 0.1:
+                claves.append(con_error_de_tipeo(f"{clave} {i:04d}", generador))
+    claves = list(dict.fromkeys(claves))
+    print(f"{len(claves):,} claves de proveedor ({len(claves) * (len(claves) - 1) // 2:,} pares)")
+
+    t_pares, esperado = medir(lambda: duplicados_todos_los_pares(claves), repeticiones=1)
+    t_minhash, obtenido = medir(lambda: posibles_duplicados(claves))
+    encontrados = set(zip(obtenido['clave_a'], obtenido['clave_b']))
+    print(f"todos los pares: {t_pares:.2f} s ({len(esperado):,} duplicados)")
+    print(f"MinHash:         {t_minhash:.3f} s ({len(encontrados):,} duplicados, "
+          f"{len(encontrados & esperado) / max(len(esperado), 1):.1%} de los encontrados comparando todos los pares)")
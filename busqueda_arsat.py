@@ -0,0 +1,137 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from limpieza_arsat import COLUMNA_DESCRIPCION_PRODUCTO, plegar_texto
+
+# --- Configuración de la Búsqueda ---
+COLUMNAS_BUSQUEDA_OC = [COLUMNA_DESCRIPCION_PRODUCTO, 'proveedor']
+LARGO_NGRAMA = 3
+_PATRON_TOKEN = re.compile(r'[A-Z0-9]+')
+# Alternativas de una consulta: "FORD RANGER o SERVICE 150000 KM" (también "OR" o "|").
+_SEPARADOR_ALTERNATIVAS = re.compile(r'\s+OR?\s+|\|')
+
+
+def tokenizar(texto):
+    return _PATRON_TOKEN.findall(plegar_texto(texto))
+
+def _palabras_por_texto(textos):
+    # Lo mismo que tokenizar(texto) para cada texto, pero sin recorrer los textos en Python: pyarrow.compute
+    # los corta por espacios y cada palabra cruda distinta ("Ñandú,", "150.000KM") se pliega una sola vez.
+    # Devuelve (id del texto, id de palabra) por cada palabra encontrada, en orden, y la lista de palabras.
+    arreglo = pa.array(pd.Index(textos).astype(str).to_numpy(dtype=object), type=pa.string())
+    crudas = pc.utf8_split_whitespace(arreglo)
+    ids_texto = pc.list_parent_indices(crudas).to_numpy()
+    codificadas = pc.dictionary_encode(pc.list_flatten(crudas))
+    tokens_por_cruda = [tokenizar(cruda) for cruda in codificadas.dictionary.to_pylist()]
+    cantidades = np.array([len(tokens) for tokens in tokens_por_cruda], dtype=np.int64)
+    ids_palabra, palabras = pd.factorize(pd.Series([token for tokens in tokens_por_cruda for token in tokens], dtype=object))
+    limites = np.concatenate([np.zeros(1, dtype=np.int64), np.cumsum(cantidades)])
+    ids_cruda = codificadas.indices.to_numpy().astype(np.int64)
+    return np.repeat(ids_texto, cantidades[ids_cruda]), _expandir(ids_palabra, limites, ids_cruda), palabras.to_numpy(dtype=object)
+
+def _expandir(orden, limites, ids):
+    # Concatena orden[limites[i]:limites[i + 1]] para cada i de ids, sin recorrerlos en Python.
+    inicios = limites[ids]
+    largos = limites[ids + 1] - inicios
+    total = int(largos.sum())
+    if total == 0:
+        return np.empty(0, dtype=orden.dtype)
+    desplazamientos = np.repeat(inicios - np.cumsum(largos) + largos, largos)
+    return orden[desplazamientos + np.arange(total)]
+
+def _agrupar(claves, valores, n_claves):
+    # Listas invertidas en formato CSR: valores[orden][limites[k]:limites[k + 1]] son los de la clave k.
+    orden = np.argsort(claves, kind='stable')
+    return valores[orden], np.searchsorted(claves[orden], np.arange(n_claves + 1))
+
+
+# --- Índice Invertido de Texto ---
+# Se arma una vez sobre el DataFrame de órdenes limpio. Cada texto distinto de cada columna se tokeniza una
+# sola vez (mayúsculas, sin tildes, palabras alfanuméricas) y se guardan dos niveles de listas invertidas:
+# palabra -> textos distintos que la contienen, y texto -> filas (posiciones) donde aparece. Para las
+# coincidencias parciales hay además un índice de trigramas sobre el vocabulario: un término encuentra
+# todas las palabras que lo contienen ("RANG" -> RANGER) sin recorrer las filas. Cada término de la
+# consulta tiene que aparecer en la descripción o en el proveedor de la fila; las alternativas se unen.
+class IndiceTexto:
+    def __init__(self, df, columnas=COLUMNAS_BUSQUEDA_OC):
+        self.n_filas = len(df)
+        palabras_por_columna = []
+        for columna in [c for c in columnas if c in df.columns]:
+            serie = df[columna]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                codigos, textos = serie.cat.codes.to_numpy(), serie.cat.categories
+            else:
+                codigos, textos = pd.factorize(serie)
+            palabras_por_columna.append((codigos, len(textos), *_palabras_por_texto(textos)))
+
+        # Un solo vocabulario para todas las columnas: cada palabra distinta recibe un id.
+        vocabularios = [palabras for *_, palabras in palabras_por_columna]
+        ids_globales, vocabulario = pd.factorize(pd.Series(np.concatenate(vocabularios) if vocabularios else [], dtype=object))
+        self.vocabulario = vocabulario.to_numpy(dtype=object)
+        self._columnas = []
+        desde = 0
+        for codigos, n_textos, ids_texto, ids_palabra, palabras in palabras_por_columna:
+            ids_palabra = ids_globales[desde:desde + len(palabras)][ids_palabra].astype(np.int64)
+            desde += len(palabras)
+            # Pares (palabra, texto) sin repetir y ya ordenados por palabra: una palabra que aparece dos veces
+            # en un texto cuenta una vez.
+            pares = np.unique(ids_palabra * n_textos + ids_texto)
+            textos_por_token = (pares % n_textos, np.searchsorted(pares // n_textos, np.arange(len(self.vocabulario) + 1)))
+            filas_por_texto = _agrupar(codigos, np.arange(len(codigos)), n_textos)
+            self._columnas.append((textos_por_token, filas_por_texto))
+
+        self._orden_vocabulario = np.argsort(self.vocabulario.astype(str), kind='stable')
+        self._vocabulario_ordenado = self.vocabulario.astype(str)[self._orden_vocabulario]
+        self._armar_ngramas()
+
+    def _armar_ngramas(self):
+        ids_ngrama, pares, ids_token = {}, [], []
+        for id_token, token in enumerate(self.vocabulario):
+            for ngrama in {token[i:i + LARGO_NGRAMA] for i in range(len(token) - LARGO_NGRAMA + 1)}:
+                pares.append(ids_ngrama.setdefault(ngrama, len(ids_ngrama)))
+                ids_token.append(id_token)
+        self._ids_ngrama = ids_ngrama
+        self._tokens_por_ngrama = _agrupar(np.array(pares, dtype=np.int64), np.array(ids_token, dtype=np.int64), len(ids_ngrama))
+
+    def _tokens_que_contienen(self, termino):
+        if len(termino) < LARGO_NGRAMA:
+            # Términos cortos: palabras que empiezan con el término (búsqueda binaria en el vocabulario).
+            i, j = np.searchsorted(self._vocabulario_ordenado, [termino, termino + '\x7f'])
+            return np.sort(self._orden_vocabulario[i:j])
+        candidatos = None
+        for ngrama in {termino[i:i + LARGO_NGRAMA] for i in range(len(termino) - LARGO_NGRAMA + 1)}:
+            if ngrama not in self._ids_ngrama:
+                return np.empty(0, dtype=np.int64)
+            tokens = _expandir(*self._tokens_por_ngrama, np.array([self._ids_ngrama[ngrama]]))
+            candidatos = tokens if candidatos is None else np.intersect1d(candidatos, tokens, assume_unique=True)
+        # Los trigramas no garantizan el orden: se confirma que el término esté en la palabra.
+        return np.array([t for t in candidatos if termino in self.vocabulario[t]], dtype=np.int64)
+
+    def _filas_termino(self, termino):
+        ids_token = self._tokens_que_contienen(termino)
+        partes = []
+        for textos_por_token, filas_por_texto in self._columnas:
+            ids_texto = np.unique(_expandir(*textos_por_token, ids_token))
+            partes.append(_expandir(*filas_por_texto, ids_texto))
+        return np.unique(np.concatenate(partes)) if partes else np.empty(0, dtype=np.int64)
+
+    def buscar(self, consulta):
+        # Posiciones (iloc, ordenadas) de las filas que cumplen la consulta; None si no tiene términos.
+        resultado = None
+        for alternativa in _SEPARADOR_ALTERNATIVAS.split(plegar_texto(consulta)):
+            terminos = sorted(set(tokenizar(alternativa)), key=len, reverse=True)
+            if not terminos:
+                continue
+            filas = None
+            # Primero los términos más largos, que suelen ser los más selectivos.
+            for termino in terminos:
+                filas_termino = self._filas_termino(termino)
+                filas = filas_termino if filas is None else np.intersect1d(filas, filas_termino, assume_unique=True)
+                if filas.size == 0:
+                    break
+            resultado = filas if resultado is None else np.union1d(resultado, filas)
+        return resultado
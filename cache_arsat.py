@@ -0,0 +1,396 @@
+import hashlib
+import json
+import os
+import re
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from indices_arsat import ordenar_por_fecha
+from ingesta_arsat import AlmacenColumnar, tipo_pandas_arrow
+from limpieza_arsat import codificar_categorica
+
+# --- Configuración de la Caché en Disco ---
+# Subir VERSION_CACHE cada vez que cambie la lógica de limpieza, para invalidar lo ya guardado.
+VERSION_CACHE = 7
+NOMBRE_MANIFIESTO = 'manifiesto.json'
+TAMANO_BLOQUE_HASH = 1024 * 1024
+_PATRON_GENERACION = re.compile(r'_v\d+_(\d+)\.(arrow|parquet)(\.tmp)?$')
+
+
+def directorio_cache_por_defecto():
+    if os.environ.get('ARSAT_CACHE_DIR'):
+        return os.environ['ARSAT_CACHE_DIR']
+    # En el ejecutable de PyInstaller _MEIPASS es temporal: la caché va junto al .exe para sobrevivir entre corridas.
+    if getattr(sys, 'frozen', False):
+        return os.path.join(os.path.dirname(sys.executable), 'cache_arsat')
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache_arsat')
+
+
+# --- Huella del Archivo Fuente ---
+def hash_contenido(ruta_archivo):
+    sha = hashlib.sha256()
+    with open(ruta_archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+def huella_archivo(ruta_archivo):
+    estado = os.stat(ruta_archivo)
+    return {
+        'tamano': estado.st_size,
+        'mtime_ns': estado.st_mtime_ns,
+        'sha256': hash_contenido(ruta_archivo),
+    }
+
+def version_archivo(ruta_archivo):
+    # Versión barata (sin leer el archivo) para claves de caché en memoria: cambia si el archivo se reescribe.
+    try:
+        estado = os.stat(ruta_archivo)
+    except OSError:
+        return None
+    return (estado.st_size, estado.st_mtime_ns)
+
+
+# --- Lectura y Escritura de Entradas ---
+def _leer_manifiesto(directorio_dataset):
+    try:
+        with open(os.path.join(directorio_dataset, NOMBRE_MANIFIESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _escribir_atomico(ruta_destino, escribir):
+    ruta_temporal = ruta_destino + '.tmp'
+    escribir(ruta_temporal)
+    os.replace(ruta_temporal, ruta_destino)
+
+def _escribir_manifiesto(directorio_dataset, manifiesto):
+    def escribir(ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    _escribir_atomico(os.path.join(directorio_dataset, NOMBRE_MANIFIESTO), escribir)
+
+def _huella_vigente(manifiesto, ruta_fuente):
+    # Devuelve (vigente, huella_actual). Si tamaño y mtime coinciden se evita leer el archivo entero;
+    # si sólo cambió el mtime (p.ej. el .exe de PyInstaller extrae los datos en cada arranque) decide el hash.
+    if manifiesto is None or manifiesto.get('version') != VERSION_CACHE:
+        return False, None
+    guardada = manifiesto.get('huella', {})
+    estado = os.stat(ruta_fuente)
+    if guardada.get('tamano') != estado.st_size:
+        return False, None
+    if guardada.get('mtime_ns') == estado.st_mtime_ns:
+        return True, guardada
+    huella_actual = huella_archivo(ruta_fuente)
+    return huella_actual['sha256'] == guardada.get('sha256'), huella_actual
+
+def _guardar_series(directorio_dataset, series):
+    info_series = []
+    for i, serie in enumerate(series):
+        if serie is None:
+            info_series.append(None)
+            continue
+        # Con nombre nuevo, como las tablas: el manifiesto anterior sigue apuntando a las series que describe.
+        archivo = _nombre_archivo_nuevo(directorio_dataset, f'serie_{i}', '.parquet')
+        _escribir_atomico(os.path.join(directorio_dataset, archivo), lambda ruta: serie.to_frame().to_parquet(ruta))
+        info_series.append({'archivo': archivo, 'nombre': serie.name, 'freq': getattr(serie.index, 'freqstr', None)})
+    return info_series
+
+def _guardar_entrada(directorio_dataset, huella, df, series):
+    os.makedirs(directorio_dataset, exist_ok=True)
+    archivo_datos = _nombre_archivo_nuevo(directorio_dataset, f"datos_{huella['sha256'][:16]}")
+    _escribir_atomico(os.path.join(directorio_dataset, archivo_datos), lambda ruta: _escribir_tabla_arrow(ruta, df))
+    info_series = _guardar_series(directorio_dataset, series)
+    # El manifiesto se escribe al final: si algo falla antes, la entrada queda inválida y se reconstruye.
+    manifiesto = {'version': VERSION_CACHE, 'huella': huella, 'datos': archivo_datos, 'series': info_series}
+    _escribir_manifiesto(directorio_dataset, manifiesto)
+    _borrar_archivos_viejos(directorio_dataset, manifiesto)
+
+def _leer_parquet(ruta):
+    df = pd.read_parquet(ruta)
+    # Parquet guarda el diccionario de cada columna 'category'; se reordena por si el lector lo devolvió en otro orden.
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = codificar_categorica(df[col])
+    return df
+
+def _cargar_series(directorio_dataset, info_series):
+    series = []
+    for info in info_series:
+        if info is None:
+            series.append(None)
+            continue
+        serie = pd.read_parquet(os.path.join(directorio_dataset, info['archivo'])).iloc[:, 0]
+        if info.get('freq'):
+            serie.index = pd.DatetimeIndex(serie.index, freq=info['freq'])
+        serie.name = info['nombre']
+        series.append(serie)
+    return series
+
+def _cargar_entrada(directorio_dataset, manifiesto):
+    df = _leer_tabla_arrow(os.path.join(directorio_dataset, manifiesto['datos']))
+    return df, _cargar_series(directorio_dataset, manifiesto['series'])
+
+
+# --- Tablas Arrow Mapeadas en Memoria ---
+# El dataset limpio se guarda como archivo Arrow IPC (Feather v2) sin compresión. Al abrirlo con memory_map
+# las columnas numéricas y de fecha sin nulos son vistas directas de las páginas del archivo: no se
+# deserializa nada, el sistema operativo trae cada página recién cuando se la lee y los procesos del
+# dashboard en el mismo equipo comparten esas páginas. Los textos quedan como string[pyarrow] sobre los
+# mismos buffers; sólo los códigos de las categóricas (1-2 bytes por fila) y las columnas con nulos se copian.
+# Los archivos nunca se reescriben en el lugar (en Windows no se puede reemplazar un archivo mapeado):
+# cada tabla nueva lleva su propio nombre (VERSION_CACHE y un número de generación que no se repite en
+# el directorio) y las anteriores se borran recién después de que el manifiesto apunta a la nueva. Las
+# series mensuales siguen la misma regla.
+def _escribir_tabla_arrow(ruta, df):
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), ruta, compression='uncompressed')
+
+def _leer_tabla_arrow(ruta):
+    tabla = feather.read_table(ruta, memory_map=True)
+    df = tabla.to_pandas(split_blocks=True, types_mapper=tipo_pandas_arrow)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = codificar_categorica(df[col])
+    return df
+
+def _nombre_archivo_nuevo(directorio_dataset, prefijo, extension='.arrow'):
+    # "<prefijo>_v<VERSION_CACHE>_<generación><extension>", con una generación mayor que la de cualquier
+    # archivo (o temporal) que haya en el directorio: otro proceso puede tener abierto uno con el nombre anterior.
+    generaciones = [int(m.group(1)) for m in map(_PATRON_GENERACION.search, os.listdir(directorio_dataset)) if m]
+    return f"{prefijo}_v{VERSION_CACHE}_{max(generaciones, default=-1) + 1}{extension}"
+
+def _archivos_vigentes(manifiesto):
+    consolidado = manifiesto.get('consolidado') or {}
+    return {
+        manifiesto.get('datos'), consolidado.get('archivo'), *consolidado.get('archivos', []),
+        *(info['archivo'] for info in manifiesto.get('series') or [] if info is not None),
+    }
+
+def _borrar_archivos_viejos(directorio_dataset, manifiesto):
+    # Tablas y series que el manifiesto (ya escrito) dejó de nombrar.
+    vigentes = _archivos_vigentes(manifiesto)
+    for nombre in os.listdir(directorio_dataset):
+        viejo = nombre.endswith('.arrow') or (nombre.startswith('serie_') and nombre.endswith('.parquet'))
+        if viejo and nombre not in vigentes:
+            try: os.remove(os.path.join(directorio_dataset, nombre))
+            except OSError: pass
+
+
+# --- Punto de Entrada: Carga con Caché ---
+def cargar_con_cache(ruta_fuente, nombre_dataset, funcion_carga, directorio_cache=None):
+    # funcion_carga(ruta_fuente) debe devolver (df_limpio, serie_mensual_1, ..., serie_mensual_n).
+    directorio_dataset = os.path.join(directorio_cache or directorio_cache_por_defecto(), nombre_dataset)
+    manifiesto = _leer_manifiesto(directorio_dataset)
+
+    vigente, huella = _huella_vigente(manifiesto, ruta_fuente)
+    if vigente:
+        try:
+            df, series = _cargar_entrada(directorio_dataset, manifiesto)
+        except Exception as e:
+            print(f"[CACHE] Entrada de '{nombre_dataset}' ilegible, se reconstruye: {e}")
+        else:
+            if huella != manifiesto['huella']:
+                # Mismo contenido con otro mtime: se actualiza para no volver a hashear en el próximo arranque.
+                manifiesto['huella'] = huella
+                try: _escribir_manifiesto(directorio_dataset, manifiesto)
+                except OSError: pass
+            print(f"[CACHE] '{nombre_dataset}' cargado desde la caché en disco.")
+            return (df, *series)
+
+    # La huella se toma antes de parsear, para que un archivo modificado durante la carga no quede marcado como vigente.
+    if huella is None:
+        huella = huella_archivo(ruta_fuente)
+    df, *series = funcion_carga(ruta_fuente)
+    if df is not None:
+        try:
+            _guardar_entrada(directorio_dataset, huella, df, series)
+            print(f"[CACHE] '{nombre_dataset}' guardado en la caché en disco.")
+        except Exception as e:
+            print(f"[CACHE] No se pudo guardar '{nombre_dataset}' en la caché: {e}")
+    return (df, *series)
+
+
+# --- Almacén Incremental (modo anexado) ---
+# Para las exportaciones mensuales que llegan con el mismo formato: cada archivo fuente nuevo se limpia
+# una sola vez y se guarda como una parte Parquet aparte, sin las filas cuya clave (p.ej. 'comprobante')
+# ya estaba en el almacén. Las series mensuales se actualizan sumando sólo las filas nuevas, así que el
+# costo de refrescar depende del tamaño del archivo nuevo y no del historial. El almacén sólo crece:
+# quitar un archivo de la lista o corregir filas ya cargadas requiere borrar la entrada de la caché.
+# Las claves ya vistas se guardan en un archivo de texto que sólo se extiende (una clave por línea; el
+# manifiesto dice hasta qué byte es válido), así que no hace falta releer las partes para deduplicar.
+# Las filas nuevas, ordenadas por fecha, se guardan además como un segmento Arrow de la tabla consolidada,
+# que es la que se abre mapeada en memoria: anexar un archivo escribe sólo su segmento. Cuando se juntan
+# más de MAXIMO_SEGMENTOS_CONSOLIDADO segmentos se compactan en uno (un costo que se reparte entre varias
+# actualizaciones), para que la tabla vuelva a abrirse sin copias.
+ARCHIVO_CLAVES = 'claves.txt'
+MAXIMO_SEGMENTOS_CONSOLIDADO = 12
+
+def _fuente_registrada(fuentes, ruta_fuente):
+    # Devuelve (registrada, huella_actual). Igual que _huella_vigente: tamaño + mtime primero, hash si hace falta.
+    estado = os.stat(ruta_fuente)
+    candidatas = [f for f in fuentes if f['huella'].get('tamano') == estado.st_size]
+    if any(f['huella'].get('mtime_ns') == estado.st_mtime_ns and f['ruta'] == os.path.abspath(ruta_fuente) for f in candidatas):
+        return True, None
+    if not candidatas:
+        return False, None
+    huella = huella_archivo(ruta_fuente)
+    for fuente in candidatas:
+        if fuente['huella'].get('sha256') == huella['sha256']:
+            fuente['ruta'], fuente['huella'] = os.path.abspath(ruta_fuente), huella
+            return True, huella
+    return False, huella
+
+def _anexar_claves(directorio_dataset, manifiesto, claves_nuevas):
+    # Se corta primero lo que haya quedado después del último byte válido (una corrida interrumpida antes
+    # de escribir el manifiesto); el manifiesto se actualiza en memoria y lo escribe quien llama.
+    ruta = os.path.join(directorio_dataset, ARCHIVO_CLAVES)
+    valido = manifiesto.get('claves', {}).get('bytes', 0)
+    with open(ruta, 'r+b' if os.path.exists(ruta) else 'wb') as f:
+        f.truncate(valido)
+        f.seek(valido)
+        f.write(''.join(f"{clave}\n" for clave in claves_nuevas).encode('utf-8'))
+        manifiesto['claves'] = {'archivo': ARCHIVO_CLAVES, 'bytes': f.tell()}
+
+def _claves_almacenadas(directorio_dataset, manifiesto, columna_clave):
+    info = manifiesto.get('claves')
+    if info is not None:
+        try:
+            with open(os.path.join(directorio_dataset, info['archivo']), 'rb') as f:
+                datos = f.read(info['bytes'])
+            if len(datos) != info['bytes']:
+                raise ValueError(f"tiene {len(datos)} bytes y el manifiesto espera {info['bytes']}")
+            return set(datos.decode('utf-8').splitlines())
+        except (OSError, ValueError) as e:
+            print(f"[CACHE] Archivo de claves ilegible, se vuelve a armar desde las partes: {e}")
+    # Entradas anteriores al archivo de claves: se leen una vez de las partes y se guardan.
+    partes = [pd.read_parquet(os.path.join(directorio_dataset, f['archivo']), columns=[columna_clave])[columna_clave] for f in manifiesto['fuentes']]
+    claves = set(pd.concat(partes, ignore_index=True).dropna().astype(str)) if partes else set()
+    manifiesto.pop('claves', None)
+    os.makedirs(directorio_dataset, exist_ok=True)
+    _anexar_claves(directorio_dataset, manifiesto, claves)
+    return claves
+
+def _filas_nuevas(df_nuevas, columna_clave, claves):
+    # Se descartan las filas cuya clave ya está almacenada (un archivo que se superpone con otro). Las que
+    # repiten la clave dentro del mismo archivo se conservan (una orden de varias líneas) y las filas sin
+    # clave no se pueden comparar: se anexan todas.
+    valores = df_nuevas[columna_clave]
+    repetidas = valores.notna() & valores.astype(str).isin(claves)
+    return df_nuevas[~repetidas.to_numpy()].reset_index(drop=True)
+
+def _segmentos_vigentes(manifiesto):
+    # Segmentos de la tabla consolidada, o None si no cubren todas las partes (entradas viejas o una corrida cortada).
+    consolidado = manifiesto.get('consolidado')
+    if consolidado is None or 'archivos' not in consolidado or consolidado['partes'] != len(manifiesto['fuentes']):
+        return None
+    return consolidado['archivos']
+
+def _escribir_segmento(directorio_dataset, df):
+    archivo = _nombre_archivo_nuevo(directorio_dataset, 'consolidado')
+    _escribir_atomico(os.path.join(directorio_dataset, archivo), lambda ruta: _escribir_tabla_arrow(ruta, df))
+    return archivo
+
+def _unir(partes):
+    almacen = AlmacenColumnar()
+    for parte in partes:
+        almacen.agregar(parte)
+    return ordenar_por_fecha(almacen.consolidar())
+
+def _cargar_partes(directorio_dataset, manifiesto):
+    fuentes = manifiesto['fuentes']
+    segmentos = _segmentos_vigentes(manifiesto)
+    if segmentos is not None and len(segmentos) == 1:
+        try:
+            return _leer_tabla_arrow(os.path.join(directorio_dataset, segmentos[0]))
+        except Exception as e:
+            print(f"[CACHE] Tabla consolidada ilegible, se vuelve a armar desde las partes: {e}")
+            segmentos = None
+    if segmentos is not None:
+        try:
+            df = _unir(_leer_tabla_arrow(os.path.join(directorio_dataset, archivo)) for archivo in segmentos)
+        except Exception as e:
+            print(f"[CACHE] Tabla consolidada ilegible, se vuelve a armar desde las partes: {e}")
+            segmentos = None
+        else:
+            if len(segmentos) <= MAXIMO_SEGMENTOS_CONSOLIDADO:
+                return df
+            print(f"[CACHE] Compactando {len(segmentos)} segmentos de la tabla consolidada.")
+    if segmentos is None:
+        df = _unir(_leer_parquet(os.path.join(directorio_dataset, fuente['archivo'])) for fuente in fuentes)
+    if not fuentes:
+        return df
+    try:
+        archivo = _escribir_segmento(directorio_dataset, df)
+        manifiesto['consolidado'] = {'archivos': [archivo], 'partes': len(fuentes)}
+        _escribir_manifiesto(directorio_dataset, manifiesto)
+    except Exception as e:
+        print(f"[CACHE] No se pudo guardar la tabla consolidada: {e}")
+        return df
+    _borrar_archivos_viejos(directorio_dataset, manifiesto)
+    # Se devuelve la versión mapeada en memoria y se libera la copia recién armada.
+    return _leer_tabla_arrow(os.path.join(directorio_dataset, archivo))
+
+def anexar_con_cache(rutas_fuente, nombre_dataset, funcion_carga, actualizar_series, columna_clave, directorio_cache=None, mapear=map):
+    # funcion_carga(ruta) devuelve el DataFrame limpio de un archivo; actualizar_series(series, df_nuevas)
+    # devuelve las series mensuales con las filas nuevas sumadas (series es None en la primera carga).
+    # columna_clave=None anexa todas las filas. mapear(funcion_carga, rutas) permite leer en paralelo los
+    # archivos pendientes (ver ingesta_arsat.mapear_en_paralelo); se anexan siempre en el orden de rutas_fuente.
+    directorio_dataset = os.path.join(directorio_cache or directorio_cache_por_defecto(), nombre_dataset)
+    manifiesto = _leer_manifiesto(directorio_dataset)
+    if manifiesto is None or manifiesto.get('version') != VERSION_CACHE or 'fuentes' not in manifiesto:
+        manifiesto = {'version': VERSION_CACHE, 'fuentes': [], 'series': None}
+    fuentes = manifiesto['fuentes']
+    series = _cargar_series(directorio_dataset, manifiesto['series']) if manifiesto['series'] is not None else None
+
+    cambios = False
+    pendientes = []
+    for ruta_fuente in rutas_fuente:
+        registrada, huella = _fuente_registrada(fuentes, ruta_fuente)
+        if registrada:
+            cambios = cambios or huella is not None
+        elif ruta_fuente not in (r for r, _ in pendientes):
+            # La huella se toma antes de parsear, como en cargar_con_cache.
+            pendientes.append((ruta_fuente, huella or huella_archivo(ruta_fuente)))
+
+    claves = None
+    for (ruta_fuente, huella), df_nuevas in zip(pendientes, mapear(funcion_carga, [r for r, _ in pendientes])):
+        if columna_clave is not None:
+            if claves is None:
+                claves = _claves_almacenadas(directorio_dataset, manifiesto, columna_clave)
+            filas_archivo = len(df_nuevas)
+            df_nuevas = _filas_nuevas(df_nuevas, columna_clave, claves)
+            claves_nuevas = df_nuevas[columna_clave].dropna().astype(str).drop_duplicates()
+            claves.update(claves_nuevas)
+            print(f"[CACHE] '{nombre_dataset}': {os.path.basename(ruta_fuente)} aporta {len(df_nuevas)} filas nuevas "
+                  f"({filas_archivo - len(df_nuevas)} con '{columna_clave}' ya almacenado).")
+        else:
+            print(f"[CACHE] '{nombre_dataset}': {os.path.basename(ruta_fuente)} aporta {len(df_nuevas)} filas.")
+
+        archivo = f'parte_{len(fuentes)}.parquet'
+        os.makedirs(directorio_dataset, exist_ok=True)
+        _escribir_atomico(os.path.join(directorio_dataset, archivo), lambda ruta: df_nuevas.to_parquet(ruta, index=False))
+        if columna_clave is not None:
+            _anexar_claves(directorio_dataset, manifiesto, claves_nuevas)
+        # Si la tabla consolidada está al día, se le suma sólo el segmento de este archivo; si no, se arma al final.
+        segmentos = _segmentos_vigentes(manifiesto) if fuentes else []
+        if segmentos is not None and len(df_nuevas):
+            segmentos = [*segmentos, _escribir_segmento(directorio_dataset, ordenar_por_fecha(df_nuevas))]
+        fuentes.append({'ruta': os.path.abspath(ruta_fuente), 'huella': huella, 'archivo': archivo, 'filas': len(df_nuevas)})
+        if segmentos is not None:
+            manifiesto['consolidado'] = {'archivos': segmentos, 'partes': len(fuentes)}
+        series = actualizar_series(series, df_nuevas)
+        manifiesto['series'] = _guardar_series(directorio_dataset, series)
+        # Un manifiesto por archivo: si la corrida se corta, los archivos ya anexados no se vuelven a procesar
+        # y los que no llegaron al manifiesto parten de las series que éste nombra.
+        _escribir_manifiesto(directorio_dataset, manifiesto)
+        _borrar_archivos_viejos(directorio_dataset, manifiesto)
+        cambios = False
+
+    if cambios:
+        # Mismo contenido con otro mtime: se actualiza para no volver a hashear en el próximo arranque.
+        try: _escribir_manifiesto(directorio_dataset, manifiesto)
+        except OSError: pass
+    return (_cargar_partes(directorio_dataset, manifiesto), *(series or []))
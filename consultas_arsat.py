@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from limpieza_arsat import COLUMNA_FECHA, COLUMNA_IMPORTE
+
+# --- Motor de Consultas SQL Embebido (SQLite o DuckDB, en archivo, sin servidor) ---
+# Guarda las órdenes y transferencias limpias en una base local y expone las consultas del dashboard
+# como funciones con parámetros (rango de fechas y moneda). Los filtros se resuelven en el motor
+# (índice por moneda+fecha en SQLite, zone maps en DuckDB), así que el historial no necesita caber en RAM.
+# DuckDB es opcional: si no está instalado se usa SQLite, que viene con Python. Se importa recién al
+# crear el motor, para no sumar su tiempo de importación al arranque cuando no se usa.
+def _importar_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("El motor 'duckdb' requiere el paquete duckdb (pip install duckdb).") from None
+    return duckdb
+
+TABLA_ORDENES = 'ordenes'
+TABLA_TRANSFERENCIAS = 'transferencias'
+DIMENSIONES_CONSULTA = ['moneda', 'gerencia', 'proveedor', 'proveedor_clave', 'tipocompra']
+FORMATO_FECHA_SQLITE = '%Y-%m-%d %H:%M:%S'
+SEPARADOR_HUELLAS = '|'
+
+
+class MotorSQL:
+    # Las subclases definen cómo conectarse, cómo volcar un DataFrame y la expresión de fin de mes.
+    expresion_fin_de_mes = None
+
+    def __init__(self, ruta_db):
+        self.ruta_db = ruta_db
+        os.makedirs(os.path.dirname(os.path.abspath(ruta_db)), exist_ok=True)
+        # El dashboard comparte un motor entre todas las sesiones (st.cache_resource) y cada sesión corre en
+        # su propio hilo: cada hilo usa su conexión (ver la propiedad conexion) y las escrituras se serializan.
+        self._hilos = threading.local()
+        self._lock_escritura = threading.Lock()
+        self.conexion.execute("CREATE TABLE IF NOT EXISTS _meta (tabla TEXT PRIMARY KEY, huella TEXT)")
+
+    @property
+    def conexion(self):
+        conexion = getattr(self._hilos, 'conexion', None)
+        if conexion is None:
+            conexion = self._hilos.conexion = self._conectar()
+        return conexion
+
+    # --- Carga de Datos ---
+    def sincronizar(self, tabla, df, huella, columna_clave=None):
+        # Vuelca df en la tabla sólo si la huella del archivo fuente cambió desde la última carga.
+        # Con varios archivos la huella es 'sha_1|sha_2|...': si la guardada es un prefijo de la nueva
+        # (sólo se agregaron archivos) y hay columna_clave, se insertan únicamente las filas con clave nueva.
+        with self._lock_escritura:
+            return self._sincronizar(tabla, df, huella, columna_clave)
+
+    def _sincronizar(self, tabla, df, huella, columna_clave):
+        fila = self.conexion.execute("SELECT huella FROM _meta WHERE tabla = ?", [tabla]).fetchone()
+        if fila is not None and fila[0] == huella:
+            return False
+        if fila is not None and columna_clave is not None and huella.startswith(fila[0] + SEPARADOR_HUELLAS):
+            existentes = self._leer(f"SELECT DISTINCT {columna_clave} FROM {tabla}", [])[columna_clave]
+            self._anexar(tabla, df[~df[columna_clave].isin(existentes)])
+        else:
+            self._volcar(tabla, df)
+        self.conexion.execute("DELETE FROM _meta WHERE tabla = ?", [tabla])
+        self.conexion.execute("INSERT INTO _meta VALUES (?, ?)", [tabla, huella])
+        self.conexion.commit()
+        return True
+
+    def _leer(self, sql, parametros):
+        return pd.read_sql_query(sql, self.conexion, params=parametros) if isinstance(self.conexion, sqlite3.Connection) \
+            else self.conexion.execute(sql, parametros).df()
+
+    def _parametro_fecha(self, fecha):
+        return pd.Timestamp(fecha).floor('us').to_pydatetime()
+
+    # --- Consultas ---
+    def consultar(self, fecha_inicio=None, fecha_fin=None, moneda=None, tabla=TABLA_ORDENES):
+        condiciones, parametros = [], []
+        if fecha_inicio is not None:
+            condiciones.append(f"{COLUMNA_FECHA} >= ?")
+            parametros.append(self._parametro_fecha(fecha_inicio))
+        if fecha_fin is not None:
+            condiciones.append(f"{COLUMNA_FECHA} <= ?")
+            parametros.append(self._parametro_fecha(fecha_fin))
+        if moneda is not None:
+            condiciones.append("moneda = ?")
+            parametros.append(moneda)
+        condiciones.append(f"{COLUMNA_FECHA} IS NOT NULL")
+        return VistaSQL(self, tabla, " AND ".join(condiciones), parametros)
+
+
+class MotorSQLite(MotorSQL):
+    expresion_fin_de_mes = f"date({COLUMNA_FECHA}, 'start of month', '+1 month', '-1 day')"
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta_db)
+
+    def _volcar(self, tabla, df, modo='replace'):
+        df_sql = df.copy(deep=False)
+        if COLUMNA_FECHA in df_sql.columns:
+            df_sql[COLUMNA_FECHA] = df_sql[COLUMNA_FECHA].dt.strftime(FORMATO_FECHA_SQLITE)
+        df_sql.to_sql(tabla, self.conexion, if_exists=modo, index=False, chunksize=50_000)
+        if 'moneda' in df_sql.columns:
+            self.conexion.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_moneda_fecha ON {tabla} (moneda, {COLUMNA_FECHA})")
+        self.conexion.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabla}_fecha ON {tabla} ({COLUMNA_FECHA})")
+
+    def _anexar(self, tabla, df):
+        # Los índices ya existen: to_sql con 'append' los mantiene al insertar.
+        self._volcar(tabla, df, modo='append')
+
+    def _parametro_fecha(self, fecha):
+        return pd.Timestamp(fecha).strftime(FORMATO_FECHA_SQLITE)
+
+
+class MotorDuckDB(MotorSQL):
+    expresion_fin_de_mes = f"last_day({COLUMNA_FECHA})"
+
+    def _conectar(self):
+        # DuckDB abre el archivo una sola vez por proceso: la conexión base se crea con el motor (en __init__,
+        # antes de compartirlo) y cada hilo consulta con su propio cursor sobre ella.
+        if not hasattr(self, '_base'):
+            self._base = _importar_duckdb().connect(self.ruta_db)
+        return self._base.cursor()
+
+    def _volcar(self, tabla, df):
+        self.conexion.register('_df_origen', df)
+        self.conexion.execute(f"CREATE OR REPLACE TABLE {tabla} AS SELECT {self._columnas(df)} FROM _df_origen ORDER BY {COLUMNA_FECHA}")
+        self.conexion.unregister('_df_origen')
+
+    def _anexar(self, tabla, df):
+        self.conexion.register('_df_origen', df)
+        self.conexion.execute(f"INSERT INTO {tabla} SELECT {self._columnas(df)} FROM _df_origen ORDER BY {COLUMNA_FECHA}")
+        self.conexion.unregister('_df_origen')
+
+    def _columnas(self, df):
+        # Las columnas 'category' llegarían como ENUM; se guardan como VARCHAR para comparar con parámetros de texto.
+        return ', '.join(f'CAST("{c}" AS VARCHAR) AS "{c}"' if isinstance(df[c].dtype, pd.CategoricalDtype) else f'"{c}"' for c in df.columns)
+
+
+def crear_motor(tipo, directorio):
+    if tipo == 'duckdb':
+        return MotorDuckDB(os.path.join(directorio, 'arsat.duckdb'))
+    if tipo == 'sqlite':
+        return MotorSQLite(os.path.join(directorio, 'arsat.sqlite'))
+    raise ValueError(f"Motor de consultas desconocido: {tipo}")
+
+
+# --- Vista de una Consulta (misma interfaz que cubo_arsat.VistaCubo) ---
+class VistaSQL:
+    def __init__(self, motor, tabla, where, parametros):
+        self.motor = motor
+        self.tabla = tabla
+        self.where = where
+        self.parametros = parametros
+
+    def total_ordenes(self):
+        return int(self.motor._leer(f"SELECT COUNT(*) AS n FROM {self.tabla} WHERE {self.where}", self.parametros)['n'].iloc[0])
+
+    def top_n(self, dimension, n=5):
+        if dimension not in DIMENSIONES_CONSULTA:
+            raise ValueError(f"Dimensión no válida: {dimension}")
+        return self.motor._leer(
+            f"SELECT {dimension}, COALESCE(SUM({COLUMNA_IMPORTE}), 0) AS {COLUMNA_IMPORTE} FROM {self.tabla} "
+            f"WHERE {self.where} GROUP BY {dimension} ORDER BY {COLUMNA_IMPORTE} DESC LIMIT ?",
+            self.parametros + [n],
+        )
+
+    def conteo_por(self, dimension):
+        if dimension not in DIMENSIONES_CONSULTA:
+            raise ValueError(f"Dimensión no válida: {dimension}")
+        return self.motor._leer(
+            f"SELECT {dimension}, COUNT(*) AS cantidad FROM {self.tabla} WHERE {self.where} GROUP BY {dimension} ORDER BY cantidad DESC",
+            self.parametros,
+        )
+
+    def serie_mensual(self):
+        mensual = self.motor._leer(
+            f"SELECT {self.motor.expresion_fin_de_mes} AS mes, COALESCE(SUM({COLUMNA_IMPORTE}), 0) AS {COLUMNA_IMPORTE} "
+            f"FROM {self.tabla} WHERE {self.where} GROUP BY mes ORDER BY mes",
+            self.parametros,
+        )
+        if mensual.empty:
+            return pd.DataFrame({COLUMNA_FECHA: pd.DatetimeIndex([]), COLUMNA_IMPORTE: []})
+        # Igual que resample('ME'): los meses sin movimientos entre el primero y el último quedan en 0.
+        serie = mensual.set_index(pd.to_datetime(mensual['mes']).dt.as_unit('ns'))[COLUMNA_IMPORTE]
+        serie = serie.reindex(pd.date_range(serie.index.min(), serie.index.max(), freq='ME'), fill_value=0.0)
+        return pd.DataFrame({COLUMNA_FECHA: serie.index, COLUMNA_IMPORTE: serie.to_numpy(dtype=float)})
+
+    def mayor_valor(self, n):
+        filas = self.motor._leer(
+            f"SELECT * FROM {self.tabla} WHERE {self.where} AND {COLUMNA_IMPORTE} IS NOT NULL ORDER BY {COLUMNA_IMPORTE} DESC LIMIT ?",
+            self.parametros + [n],
+        )
+        if COLUMNA_FECHA in filas.columns:
+            filas[COLUMNA_FECHA] = pd.to_datetime(filas[COLUMNA_FECHA])
+        filas[COLUMNA_IMPORTE] = filas[COLUMNA_IMPORTE].astype('float64')
+        return filas
@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from limpieza_arsat import COLUMNA_FECHA, COLUMNA_IMPORTE, convertir_fecha, normalizar_nombres_columnas, plegar_texto
+
+# --- Configuración de las Cotizaciones ---
+# Archivo local con una cotización diaria por moneda (CSV o Parquet), columnas: fecha, moneda, cotizacion
+# (pesos por unidad de la moneda). Las fechas pueden ser ISO ("2022-03-15") o día/mes/año; la moneda, el
+# nombre que traen las órdenes ("Dólares") o el código ISO ("USD"). Fines de semana y feriados no hace
+# falta cargarlos: cada orden toma la última cotización publicada hasta su fecha.
+COLUMNAS_COTIZACIONES = [COLUMNA_FECHA, 'moneda', 'cotizacion']
+MONEDA_PESOS = 'Pesos'
+MONEDA_CONSOLIDADA = 'Total consolidado (ARS)'
+# Nombres plegados (ver limpieza_arsat.plegar_texto) que se aceptan para cada moneda de las órdenes.
+ALIAS_MONEDAS = {'ARS': 'PESOS', 'PESO': 'PESOS', 'USD': 'DOLARES', 'DOLAR': 'DOLARES', 'U$D': 'DOLARES', 'EUR': 'EURO', 'EUROS': 'EURO'}
+# Una cotización más vieja que esto (días antes de la orden) ya no se usa: la orden queda sin convertir.
+DIAS_VIGENCIA_COTIZACION = 7
+# Días desde 1970 en los 32 bits bajos y la moneda en los altos: una sola clave int64 ordenable.
+_BITS_DIA = 32
+
+
+def _moneda_plegada(moneda):
+    plegada = plegar_texto(str(moneda)).strip()
+    return ALIAS_MONEDAS.get(plegada, plegada)
+
+def _parsear_cotizaciones(serie):
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype('float64')
+    # Con coma decimal ("1.234,5678") se quitan los puntos de miles; sin coma, el punto es el decimal ("1234.5678").
+    texto = serie.astype(str).str.strip()
+    con_coma = texto.str.contains(',', regex=False)
+    texto = texto.where(~con_coma, texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return pd.to_numeric(texto, errors='coerce')
+
+def _parsear_fechas(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    texto = serie.astype(str).str.strip()
+    return pd.to_datetime(texto, format='ISO8601', errors='coerce').fillna(convertir_fecha(texto))
+
+def leer_cotizaciones(ruta):
+    if os.path.splitext(ruta)[1].lower() in ('.parquet', '.pq'):
+        df = pd.read_parquet(ruta)
+    else:
+        df = pd.read_csv(ruta, sep=None, engine='python', dtype=str)
+    df.columns = normalizar_nombres_columnas(df.columns)
+    faltantes = [c for c in COLUMNAS_COTIZACIONES if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"al archivo de cotizaciones {ruta} le faltan las columnas {faltantes}.")
+    cotizaciones = pd.DataFrame({
+        COLUMNA_FECHA: _parsear_fechas(df[COLUMNA_FECHA]).dt.normalize(),
+        'moneda': df['moneda'].map(_moneda_plegada),
+        'cotizacion': _parsear_cotizaciones(df['cotizacion']),
+    }).dropna()
+    cotizaciones = cotizaciones[cotizaciones['cotizacion'] > 0]
+    print(f">>> [COTIZACIONES] {len(cotizaciones):,} cotizaciones leídas de {os.path.basename(ruta)} ({', '.join(sorted(cotizaciones['moneda'].unique()))}).")
+    return cotizaciones.sort_values(['moneda', COLUMNA_FECHA], ignore_index=True)
+
+
+# --- Conversión a Pesos con un As-Of Join Vectorizado ---
+# Cada (moneda, día) se codifica en una sola clave int64 y las claves de las cotizaciones quedan ordenadas:
+# un único np.searchsorted ubica, para todas las órdenes a la vez, la última cotización de su moneda con
+# fecha <= la de la orden (lo mismo que un merge_asof por moneda, sin tener que ordenar las órdenes).
+# Si la cotización encontrada es de otra moneda o está vencida, la orden queda sin tasa (NaN).
+def tasas_a_pesos(fechas, monedas, cotizaciones, dias_vigencia=DIAS_VIGENCIA_COTIZACION):
+    monedas = monedas if isinstance(monedas.dtype, pd.CategoricalDtype) else monedas.astype('category')
+    codigos = monedas.cat.codes.to_numpy()
+    plegadas = pd.Index([_moneda_plegada(m) for m in monedas.cat.categories], dtype=object)
+    # Los pesos no necesitan cotización (el código -1, nulo, toma el último elemento agregado).
+    es_pesos = np.append(plegadas == _moneda_plegada(MONEDA_PESOS), False)[codigos]
+    tasas = np.where(es_pesos, 1.0, np.nan)
+    if cotizaciones.empty:
+        return tasas
+
+    ids_moneda_cot, monedas_cot = pd.factorize(cotizaciones['moneda'])
+    # Moneda de cada categoría de las órdenes en la tabla de cotizaciones (-1 si no tiene cotizaciones).
+    ids_moneda = np.append(monedas_cot.get_indexer(plegadas), -1)[codigos].astype(np.int64)
+    dias_cot = cotizaciones[COLUMNA_FECHA].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    claves_cot = (ids_moneda_cot.astype(np.int64) << _BITS_DIA) + dias_cot
+    orden = np.argsort(claves_cot, kind='stable')
+    claves_cot, dias_cot, valores_cot = claves_cot[orden], dias_cot[orden], cotizaciones['cotizacion'].to_numpy(dtype=float)[orden]
+
+    fechas_validas = fechas.notna().to_numpy()
+    dias = np.where(fechas_validas, fechas.to_numpy(dtype='datetime64[D]').astype(np.int64), 0)
+    posiciones = np.searchsorted(claves_cot, (ids_moneda << _BITS_DIA) + dias, side='right') - 1
+    encontradas = np.maximum(posiciones, 0)
+    validas = (
+        ~es_pesos & fechas_validas & (ids_moneda >= 0) & (posiciones >= 0)
+        & ((claves_cot[encontradas] >> _BITS_DIA) == ids_moneda) & (dias - dias_cot[encontradas] <= dias_vigencia)
+    )
+    return np.where(validas, valores_cot[encontradas], tasas)
+
+def consolidar_en_pesos(df_oc, cotizaciones):
+    # Devuelve una copia liviana de df_oc (mismas filas y en el mismo orden, columnas compartidas) con el
+    # importe en pesos y la moneda MONEDA_CONSOLIDADA, más la moneda original y la cotización usada. Las
+    # órdenes sin cotización quedan con moneda nula: fuera del total consolidado, pero se cuentan.
+    tasas = tasas_a_pesos(df_oc[COLUMNA_FECHA], df_oc['moneda'], cotizaciones)
+    convertidas = ~np.isnan(tasas)
+    moneda = pd.Categorical.from_codes(np.where(convertidas, 0, -1), [MONEDA_CONSOLIDADA])
+    consolidado = df_oc.assign(**{
+        'moneda_original': df_oc['moneda'], 'cotizacion': tasas,
+        COLUMNA_IMPORTE: df_oc[COLUMNA_IMPORTE].to_numpy(dtype=float) * tasas, 'moneda': moneda,
+    })
+    sin_cotizacion = int((~convertidas).sum())
+    if sin_cotizacion:
+        faltan = df_oc.loc[~convertidas, 'moneda'].value_counts()
+        print(f"[COTIZACIONES] {sin_cotizacion:,} órdenes sin cotización para su fecha quedan fuera del total consolidado: "
+              f"{', '.join(f'{m} {n:,}' for m, n in faltan[faltan > 0].items())}.")
+    return consolidado, sin_cotizacion
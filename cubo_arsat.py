@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+
+from limpieza_arsat import COLUMNA_FECHA, COLUMNA_IMPORTE, COLUMNA_PROVEEDOR_CLAVE
+
+# --- Configuración del Cubo ---
+# El proveedor se agrupa por su clave canónica (limpieza_arsat.clave_proveedor), no por el nombre tal como vino.
+DIMENSIONES_CUBO = ['mes', 'moneda', 'gerencia', COLUMNA_PROVEEDOR_CLAVE, 'tipocompra']
+# Histograma logarítmico por celda para los cuantiles aproximados: BINS_POR_DECADA bins por potencia
+# de 10, es decir un error relativo máximo de ~7% con 32 bins. Importes menores a 1 centavo caen en el bin 0.
+BINS_POR_DECADA = 32
+IMPORTE_MINIMO_HISTOGRAMA = 0.01
+_DESPLAZAMIENTO_BIN = int(-np.log10(IMPORTE_MINIMO_HISTOGRAMA) * BINS_POR_DECADA) + 1
+# Órdenes de mayor importe que se guardan por (mes, moneda): el máximo del panel "Órdenes de Mayor Valor".
+TOP_K_MAYOR_VALOR = 20
+
+
+def _fin_de_mes(fechas):
+    # Mismo rótulo que resample('ME'): el último día del mes a las 00:00.
+    meses = fechas.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    return pd.DatetimeIndex((meses + 1).astype('datetime64[D]') - 1).as_unit('ns')
+
+def _bin_logaritmico(importes):
+    absoluto = np.abs(importes)
+    magnitud = np.floor(np.log10(np.maximum(absoluto, IMPORTE_MINIMO_HISTOGRAMA)) * BINS_POR_DECADA).astype(np.int64) + _DESPLAZAMIENTO_BIN
+    magnitud = np.where(absoluto < IMPORTE_MINIMO_HISTOGRAMA, 0, magnitud)
+    return np.sign(importes).astype(np.int64) * magnitud
+
+def _valor_bin(bins):
+    # Centro geométrico del bin; el orden de los bins coincide con el orden de los importes.
+    magnitud = 10 ** ((np.abs(bins) - _DESPLAZAMIENTO_BIN + 0.5) / BINS_POR_DECADA)
+    return np.where(bins == 0, 0.0, np.sign(bins) * magnitud)
+
+
+# --- Agregación de Filas en Celdas ---
+def _agregar(df_oc):
+    # Devuelve (celdas, histogramas): una fila por combinación observada de las dimensiones con
+    # suma/conteo/mínimo/máximo, y la tabla dispersa (celda, bin, conteo) de importes por celda.
+    df = df_oc[df_oc[COLUMNA_FECHA].notna()]
+    claves = {'mes': _fin_de_mes(df[COLUMNA_FECHA])}
+    for dim in DIMENSIONES_CUBO[1:]:
+        claves[dim] = df[dim].array if dim in df.columns else np.full(len(df), 'No Especificado')
+    agrupado = pd.DataFrame({**claves, COLUMNA_IMPORTE: df[COLUMNA_IMPORTE].to_numpy()}).groupby(DIMENSIONES_CUBO, observed=True, dropna=False, sort=True)
+
+    celdas = agrupado[COLUMNA_IMPORTE].agg(suma='sum', conteo='size', minimo='min', maximo='max').reset_index()
+    ids_celda = agrupado.ngroup().to_numpy()
+
+    importes = df[COLUMNA_IMPORTE].to_numpy()
+    validos = ~np.isnan(importes)
+    histogramas = (
+        pd.DataFrame({'celda': ids_celda[validos], 'bin': _bin_logaritmico(importes[validos])})
+        .groupby(['celda', 'bin'], sort=False).size().rename('conteo').reset_index()
+    )
+    return celdas, histogramas
+
+def _mayores_por_celda(df_oc, k=TOP_K_MAYOR_VALOR):
+    # Posiciones (en df_oc) de las k órdenes de mayor importe de cada (mes, moneda). Las k mayores de
+    # cualquier unión de meses están entre las k mayores de cada uno, así que alcanza con fusionar éstas.
+    fechas = df_oc[COLUMNA_FECHA]
+    importes = df_oc[COLUMNA_IMPORTE].to_numpy(dtype=float)
+    posiciones = np.flatnonzero(fechas.notna().to_numpy() & ~np.isnan(importes))
+    meses = _fin_de_mes(fechas.iloc[posiciones])
+    monedas = df_oc['moneda'].iloc[posiciones].array if 'moneda' in df_oc.columns else np.full(len(posiciones), 'No Especificado')
+    codigos_moneda, _ = pd.factorize(monedas)
+    # Dentro de cada (mes, moneda): importe descendente y, en empates, la fila anterior primero (como nlargest).
+    orden = np.lexsort((posiciones, -importes[posiciones], codigos_moneda, meses.asi8))
+    meses_ordenados = meses.asi8[orden]
+    monedas_ordenadas = codigos_moneda[orden]
+    nuevo_grupo = np.ones(len(orden), dtype=bool)
+    nuevo_grupo[1:] = (meses_ordenados[1:] != meses_ordenados[:-1]) | (monedas_ordenadas[1:] != monedas_ordenadas[:-1])
+    inicio_grupo = np.maximum.accumulate(np.where(nuevo_grupo, np.arange(len(orden)), 0))
+    elegidas = orden[np.arange(len(orden)) - inicio_grupo < k]
+    return pd.DataFrame({'mes': meses[elegidas], 'moneda': np.asarray(monedas)[elegidas], 'posicion': posiciones[elegidas]})
+
+
+# --- Vista de una Consulta sobre el Cubo ---
+class VistaCubo:
+    def __init__(self, celdas, histogramas, obtener_filas=None, obtener_candidatas_mayores=None):
+        self.celdas = celdas
+        self.histogramas = histogramas
+        # Las consultas de detalle (órdenes individuales) no se responden desde las celdas: se piden las filas.
+        self._obtener_filas = obtener_filas
+        # Las TOP_K_MAYOR_VALOR órdenes de mayor importe del filtro, ya ordenadas (o None si no se precalcularon).
+        self._obtener_candidatas_mayores = obtener_candidatas_mayores
+
+    def total_ordenes(self):
+        return int(self.celdas['conteo'].sum())
+
+    def top_n(self, dimension, n=5):
+        totales = self.celdas.groupby(dimension, observed=True, dropna=False)['suma'].sum().nlargest(n)
+        return totales.rename(COLUMNA_IMPORTE).reset_index()
+
+    def conteo_por(self, dimension):
+        conteos = self.celdas.groupby(dimension, observed=True, dropna=False)['conteo'].sum()
+        return conteos[conteos > 0].sort_values(ascending=False).rename('cantidad').reset_index()
+
+    def serie_mensual(self):
+        if self.celdas.empty:
+            return pd.DataFrame({COLUMNA_FECHA: pd.DatetimeIndex([]), COLUMNA_IMPORTE: []})
+        mensual = self.celdas.groupby('mes')['suma'].sum()
+        meses = pd.date_range(mensual.index.min(), mensual.index.max(), freq='ME')
+        mensual = mensual.reindex(meses, fill_value=0.0)
+        return pd.DataFrame({COLUMNA_FECHA: mensual.index, COLUMNA_IMPORTE: mensual.to_numpy()})
+
+    def mayor_valor(self, n):
+        if self._obtener_candidatas_mayores is not None and n <= TOP_K_MAYOR_VALOR:
+            return self._obtener_candidatas_mayores().head(n)
+        return self._obtener_filas().nlargest(n, COLUMNA_IMPORTE)
+
+    def cuantiles(self, probabilidades):
+        # Cuantiles aproximados (centro del bin logarítmico) a partir de los histogramas fusionados.
+        if self.histogramas.empty:
+            return np.full(len(probabilidades), np.nan)
+        fusionado = self.histogramas.groupby('bin')['conteo'].sum().sort_index()
+        acumulado = fusionado.cumsum().to_numpy()
+        posiciones = np.searchsorted(acumulado, np.asarray(probabilidades) * acumulado[-1], side='left')
+        return _valor_bin(fusionado.index.to_numpy()[np.minimum(posiciones, len(acumulado) - 1)])
+
+
+# --- Cubo OLAP de Órdenes de Compra ---
+class CuboOC:
+    # Se construye una sola vez al cargar los datos. Los meses cubiertos por completo por un filtro de
+    # fechas se responden desde las celdas; los meses de borde (cubiertos en parte) se agregan al vuelo
+    # desde las filas de esos días, ubicadas por búsqueda binaria sobre las fechas ordenadas.
+    # Para "Órdenes de Mayor Valor" se guardan además las TOP_K_MAYOR_VALOR mayores de cada (mes, moneda):
+    # la consulta fusiona las de los meses completos con las filas de los meses de borde.
+    def __init__(self, df_oc):
+        self.df_oc = df_oc
+        self.celdas, self.histogramas = _agregar(df_oc)
+        self.mayores = _mayores_por_celda(df_oc)
+
+        fechas = df_oc[COLUMNA_FECHA]
+        con_fecha = np.flatnonzero(fechas.notna().to_numpy())
+        self._orden = con_fecha[np.argsort(fechas.to_numpy()[con_fecha], kind='stable')]
+        self._fechas_ordenadas = fechas.to_numpy()[self._orden]
+        fechas_validas = fechas.dropna()
+        extremos = fechas_validas.groupby(_fin_de_mes(fechas_validas)).agg(['min', 'max'])
+        self._primera_fecha_mes = extremos['min']
+        self._ultima_fecha_mes = extremos['max']
+
+    def consultar(self, fecha_inicio=None, fecha_fin=None, moneda=None):
+        # Equivale a filtrar fecha_inicio <= fecha <= fecha_fin (y moneda == moneda) sobre las órdenes.
+        inicio = pd.Timestamp(fecha_inicio) if fecha_inicio is not None else self._primera_fecha_mes.min()
+        fin = pd.Timestamp(fecha_fin) if fecha_fin is not None else self._ultima_fecha_mes.max()
+
+        completos = self._primera_fecha_mes.index[(self._primera_fecha_mes >= inicio).to_numpy() & (self._ultima_fecha_mes <= fin).to_numpy()]
+        en_rango = self._primera_fecha_mes.index[(self._ultima_fecha_mes >= inicio).to_numpy() & (self._primera_fecha_mes <= fin).to_numpy()]
+        bordes = en_rango.difference(completos)
+
+        seleccion = self.celdas['mes'].isin(completos).to_numpy()
+        if moneda is not None:
+            seleccion = seleccion & (self.celdas['moneda'] == moneda).to_numpy()
+        ids = np.flatnonzero(seleccion)
+        celdas = self.celdas.iloc[ids].reset_index(drop=True)
+        histogramas = self.histogramas[self.histogramas['celda'].isin(ids)]
+        histogramas = histogramas.assign(celda=np.searchsorted(ids, histogramas['celda'].to_numpy()))
+
+        partes_celdas, partes_histogramas = [celdas], [histogramas]
+        for mes in bordes:
+            desde = max(inicio, self._primera_fecha_mes[mes])
+            hasta = min(fin, self._ultima_fecha_mes[mes])
+            filas = self._filas(desde, hasta, moneda)
+            if filas.empty:
+                continue
+            celdas_borde, histogramas_borde = _agregar(filas)
+            desplazamiento = sum(len(c) for c in partes_celdas)
+            partes_celdas.append(celdas_borde)
+            partes_histogramas.append(histogramas_borde.assign(celda=histogramas_borde['celda'] + desplazamiento))
+
+        obtener_filas = lambda: self._filas(inicio, fin, moneda)
+        obtener_candidatas = lambda: self._candidatas_mayores(completos, bordes, inicio, fin, moneda)
+        if len(partes_celdas) == 1:
+            return VistaCubo(celdas, histogramas, obtener_filas, obtener_candidatas)
+        return VistaCubo(pd.concat(partes_celdas, ignore_index=True), pd.concat(partes_histogramas, ignore_index=True), obtener_filas, obtener_candidatas)
+
+    def _candidatas_mayores(self, completos, bordes, inicio, fin, moneda=None):
+        seleccion = self.mayores['mes'].isin(completos).to_numpy()
+        if moneda is not None:
+            seleccion = seleccion & (self.mayores['moneda'] == moneda).to_numpy()
+        partes = [self.mayores['posicion'].to_numpy()[seleccion]]
+        for mes in bordes:
+            partes.append(self._posiciones(max(inicio, self._primera_fecha_mes[mes]), min(fin, self._ultima_fecha_mes[mes]), moneda))
+        posiciones = np.concatenate(partes)
+        # Mismo orden que _filas (fecha y, dentro del día, orden del archivo) para que los empates salgan igual.
+        posiciones = posiciones[np.lexsort((posiciones, self.df_oc[COLUMNA_FECHA].to_numpy()[posiciones]))]
+        # Se devuelven ya ordenadas por importe descendente (empates en el orden anterior), sin importes nulos.
+        importes = self.df_oc[COLUMNA_IMPORTE].to_numpy(dtype=float)[posiciones]
+        mayores = np.lexsort((np.arange(len(posiciones)), -importes))[:TOP_K_MAYOR_VALOR]
+        mayores = mayores[~np.isnan(importes[mayores])]
+        return self.df_oc.iloc[posiciones[mayores]]
+
+    def _posiciones(self, inicio, fin, moneda=None):
+        i = np.searchsorted(self._fechas_ordenadas, np.datetime64(inicio), side='left')
+        j = np.searchsorted(self._fechas_ordenadas, np.datetime64(fin), side='right')
+        posiciones = self._orden[i:j]
+        if moneda is None:
+            return posiciones
+        return posiciones[(self.df_oc['moneda'].iloc[posiciones] == moneda).to_numpy()]
+
+    def _filas(self, inicio, fin, moneda=None):
+        return self.df_oc.iloc[self._posiciones(inicio, fin, moneda)]
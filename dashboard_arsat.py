@@ -1,136 +1,212 @@
+import time
+INICIO_SCRIPT = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt 
-import seaborn as sns
-import plotly.express as px
 from datetime import date 
 import os 
-import sys 
-
-# --- Función para obtener la ruta correcta de los archivos (para PyInstaller) ---
-def get_path(filename):
-    if hasattr(sys, "_MEIPASS"): 
-        return os.path.join(sys._MEIPASS, filename)
-    return os.path.join(os.path.dirname(__file__), filename)
+import json
+FIN_IMPORTACION_BASE = time.perf_counter()
+
+from busqueda_arsat import IndiceTexto
+from cache_arsat import VERSION_CACHE, directorio_cache_por_defecto, huella_archivo, version_archivo
+from consultas_arsat import SEPARADOR_HUELLAS, TABLA_ORDENES, TABLA_TRANSFERENCIAS, crear_motor
+from cotizaciones_arsat import MONEDA_CONSOLIDADA, MONEDA_PESOS, consolidar_en_pesos, leer_cotizaciones
+from cubo_arsat import CuboOC
+from formato_arsat import prefijo_moneda
+from graficos_arsat import (CacheFiguras, figura_conteo_tipocompra, figura_histograma_oc, figura_histograma_tr,
+                            figura_serie_mensual, figura_top_n)
+from indices_arsat import IndiceFechas
+from limpieza_arsat import COLUMNA_PROVEEDOR, COLUMNA_PROVEEDOR_CLAVE
+from datos_arsat import (motor_csv, obtener_ordenes_compra, obtener_transferencias, ruta_cotizaciones, rutas_ordenes_compra,
+                         rutas_transferencias)
+from ingesta_arsat import MOTOR_CSV_POR_DEFECTO, TAMANO_CHUNK_OC
+from perfil_arsat import PERFIL_ACTIVO, imprimir_perfil, segundos_fase
+from proveedores_arsat import duplicados_proveedores, variantes_por_clave
+from tablas_arsat import formatear_pagina, tabla_paginada
+
+# Fases del arranque de esta ejecución, en segundos (ver registrar_tiempos_arranque_st).
+fases_arranque = {
+    'importación (streamlit, pandas)': FIN_IMPORTACION_BASE - INICIO_SCRIPT,
+    'importación (módulos ARSAT)': time.perf_counter() - FIN_IMPORTACION_BASE,
+}
 
 # --- Configuración General de Streamlit y Gráficos ---
 st.set_page_config(layout="wide", page_title="Análisis Financiero ARSAT")
-sns.set_style("whitegrid") 
-
-# --- Función Auxiliar de Formato ---
-def format_value_with_si_dot_sep(value, prefix=""):
-    if pd.isna(value) or not isinstance(value, (int, float)): return ""
-    abs_value = abs(value)
-    if abs_value >= 1_000_000_000: val_str = f"{value / 1_000_000_000:,.1f}G"
-    elif abs_value >= 1_000_000: val_str = f"{value / 1_000_000:,.1f}M"
-    elif abs_value >= 1_000: val_str = f"{value / 1_000:,.1f}K"
-    else: val_str = f"{value:,.0f}"
-    formatted_str = val_str.replace(",", "X").replace(".", ",").replace("X", ".")
-    return prefix + formatted_str
-
-def format_tick_value(value, prefix=""):
-    if pd.isna(value): return ""
-    return f"{prefix}{value:,.0f}".replace(",", "X").replace(".", ",").replace("X", ".")
+# Todas las sesiones comparten los mismos DataFrames (datos_arsat.obtener_dataset). Con copy-on-write los
+# filtros de cada sesión son vistas y cualquier escritura sobre ellas copia sólo lo que modifica, así que
+# ninguna sesión altera los datos de las demás. Es una opción del proceso: la fija la app, no los módulos.
+pd.set_option('mode.copy_on_write', True)
 
 # --- Funciones de Carga y Procesamiento de Datos (Cacheadas) ---
-@st.cache_data 
-def cargar_y_procesar_ordenes_compra_st(ruta_archivo_oc):
-    # ... (Contenido COMPLETO de esta función como en la última versión que funcionó)
+@st.cache_resource
+def cargar_y_procesar_ordenes_compra_st(rutas_archivos_oc, tamano_chunk=TAMANO_CHUNK_OC, motor_csv=MOTOR_CSV_POR_DEFECTO):
+    # cache_resource: todas las sesiones reciben el mismo DataFrame (cache_data lo copiaría para cada una).
     print("\n>>> [OC ST] Iniciando Procesamiento de Órdenes de Compra para Streamlit...")
     try:
-        df = pd.read_csv(ruta_archivo_oc, encoding='latin1', delimiter=';')
+        df_limpio_oc, df_oc_pesos_mensual, df_oc_dolares_mensual = obtener_ordenes_compra(rutas_archivos_oc, tamano_chunk, motor_csv)
     except Exception as e:
         st.error(f"[OC] Error al cargar archivo de OC: {e}")
         return None, None, None 
-    
-    df_limpio_oc = df.copy()
-    df_limpio_oc.columns = df_limpio_oc.columns.str.strip().str.lower().str.replace(' ', '_', regex=False)
-    
-    columna_importe_oc = 'importe'
-    columna_fecha_oc = 'fecha'
-    
-    if columna_importe_oc in df_limpio_oc.columns:
-        df_limpio_oc[columna_importe_oc] = df_limpio_oc[columna_importe_oc].astype(str).str.replace('$', '', regex=False).str.strip().str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
-        df_limpio_oc[columna_importe_oc] = pd.to_numeric(df_limpio_oc[columna_importe_oc], errors='coerce')
-
-    if 'descripcion_producto' in df_limpio_oc.columns and df_limpio_oc['descripcion_producto'].isnull().any():
-        df_limpio_oc['descripcion_producto'] = df_limpio_oc['descripcion_producto'].fillna('SIN DESCRIPCION')
-
-    columnas_categoricas_oc = ['moneda', 'gerencia', 'tipocompra']
-    placeholder_faltante_oc = "No Especificado"
-    for col_cat in columnas_categoricas_oc:
-        if col_cat in df_limpio_oc.columns:
-            df_limpio_oc[col_cat] = df_limpio_oc[col_cat].astype(str).str.strip().replace(['nan', ''], placeholder_faltante_oc)
-    
-    if columna_fecha_oc in df_limpio_oc.columns:
-        df_limpio_oc[columna_fecha_oc] = pd.to_datetime(df_limpio_oc[columna_fecha_oc], dayfirst=True, errors='coerce')
-    
-    df_oc_pesos_mensual = None
-    df_oc_dolares_mensual = None
-    
-    if columna_fecha_oc in df_limpio_oc.columns and df_limpio_oc[columna_fecha_oc].notnull().all():
-        df_oc_pesos = df_limpio_oc[df_limpio_oc['moneda'] == 'Pesos'].copy()
-        if not df_oc_pesos.empty and columna_importe_oc in df_oc_pesos.columns:
-            df_oc_pesos_mensual = df_oc_pesos.set_index(columna_fecha_oc)[columna_importe_oc].resample('ME').sum()
-            df_oc_pesos_mensual.name = 'gasto_ordenes_ars'
-        df_oc_dolares = df_limpio_oc[df_limpio_oc['moneda'] == 'Dólares'].copy()
-        if not df_oc_dolares.empty and columna_importe_oc in df_oc_dolares.columns:
-            df_oc_dolares_mensual = df_oc_dolares.set_index(columna_fecha_oc)[columna_importe_oc].resample('ME').sum()
-            df_oc_dolares_mensual.name = 'gasto_ordenes_usd'
             
     print("<<< [OC ST] Fin Procesamiento de Órdenes de Compra para Streamlit.")
     return df_limpio_oc, df_oc_pesos_mensual, df_oc_dolares_mensual
 
-@st.cache_data
-def cargar_y_procesar_transferencias_st(ruta_archivo_transferencias_csv):
-    # ... (Contenido COMPLETO de esta función como en la última versión que funcionó)
+@st.cache_resource
+def cargar_y_procesar_transferencias_st(rutas_archivos_transferencias, motor_csv=MOTOR_CSV_POR_DEFECTO):
     print("\n\n>>> [TR ST] Iniciando Procesamiento de Transferencias para Streamlit...")
     try:
-        df_transferencias = pd.read_csv(ruta_archivo_transferencias_csv, encoding='latin1', dtype=str)
+        df_transferencias, df_transf_mensual = obtener_transferencias(rutas_archivos_transferencias, motor_csv)
     except Exception as e:
         st.error(f"[TR] Error al cargar archivo de transferencias: {e}")
         return None, None
-
-    df_transferencias.columns = [col.strip().lower().replace(' ', '_') for col in df_transferencias.columns]
-    if len(df_transferencias.columns) != 3:
-        st.error(f"[TR] Error: Se esperaban 3 columnas en transferencias, se encontraron {len(df_transferencias.columns)}.")
-        return None, None
-
-    df_transferencias.columns = ['desembolso', 'fecha', 'importe'] 
-
-    col_desc_transf = 'desembolso'
-    col_fecha_transf = 'fecha'
-    col_importe_transf = 'importe'
-    
-    if col_importe_transf in df_transferencias.columns:
-        df_transferencias[col_importe_transf] = df_transferencias[col_importe_transf].astype(str).str.replace('"', '', regex=False).str.replace('$', '', regex=False).str.strip().str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
-        df_transferencias[col_importe_transf] = pd.to_numeric(df_transferencias[col_importe_transf], errors='coerce')
-
-    if col_fecha_transf in df_transferencias.columns:
-        df_transferencias[col_fecha_transf] = pd.to_datetime(df_transferencias[col_fecha_transf], dayfirst=True, errors='coerce')
-
-    if col_desc_transf in df_transferencias.columns:
-        df_transferencias[col_desc_transf] = df_transferencias[col_desc_transf].str.strip()
-    
-    df_transf_mensual = None
-    if col_fecha_transf in df_transferencias.columns and \
-       df_transferencias[col_fecha_transf].notnull().all() and \
-       col_importe_transf in df_transferencias.columns and \
-       pd.api.types.is_numeric_dtype(df_transferencias[col_importe_transf]):
-        df_transf_temporal = df_transferencias.set_index(col_fecha_transf)
-        df_transf_mensual = df_transf_temporal[col_importe_transf].resample('ME').sum()
-        df_transf_mensual.name = 'ingreso_transferencias'
         
     print("<<< [TR ST] Fin Procesamiento de Transferencias para Streamlit.")
     return df_transferencias, df_transf_mensual
 
-# --- Carga de Datos ---
-ruta_oc_main = get_path("ARSAT_Finanzas_ordenes_de_compra-2022_marzo_2023.csv")
-ruta_tr_main = get_path('transferencias-recibidas-2020-v5.csv')
+@st.cache_resource
+def construir_cubo_oc_st(rutas_archivos_oc, _df_oc):
+    # Se construye una vez por conjunto de archivos (el DataFrame no se hashea: lo identifican las rutas).
+    print(">>> [OC ST] Construyendo cubo de agregación de Órdenes de Compra...")
+    return CuboOC(_df_oc)
+
+@st.cache_resource
+def construir_motor_consultas_st(tipo_motor, rutas_archivos_oc, _df_oc, rutas_archivos_tr, _df_tr):
+    # 'cubo' (por defecto) responde en memoria; 'sqlite'/'duckdb' resuelven las consultas en una base en disco,
+    # con una tabla para las órdenes y otra para las transferencias. Devuelve (motor de OC, motor de TR): el
+    # cubo no tiene dimensiones para las transferencias, así que en memoria se resumen desde su índice de fechas.
+    if tipo_motor == 'cubo':
+        return construir_cubo_oc_st(rutas_archivos_oc, _df_oc), None
+    def huella(rutas):
+        # La versión de la caché va primero: si cambian las columnas de la limpieza, la tabla se vuelve a volcar entera.
+        return SEPARADOR_HUELLAS.join([f"v{VERSION_CACHE}", *(huella_archivo(ruta)['sha256'] for ruta in rutas)])
+    try:
+        motor = crear_motor(tipo_motor, directorio_cache_por_defecto())
+        if motor.sincronizar(TABLA_ORDENES, _df_oc, huella(rutas_archivos_oc), columna_clave='comprobante'):
+            print(f">>> [OC ST] Órdenes de Compra volcadas en el motor '{tipo_motor}'.")
+        if _df_tr is not None and motor.sincronizar(TABLA_TRANSFERENCIAS, _df_tr, huella(rutas_archivos_tr)):
+            print(f">>> [TR ST] Transferencias volcadas en el motor '{tipo_motor}'.")
+        return motor, motor if _df_tr is not None else None
+    except Exception as e:
+        print(f"[OC ST] No se pudo usar el motor '{tipo_motor}', se usa el cubo en memoria: {e}")
+        return construir_cubo_oc_st(rutas_archivos_oc, _df_oc), None
+
+@st.cache_resource
+def consolidar_ordenes_en_pesos_st(rutas_archivos_oc, ruta_archivo_cotizaciones, version_cotizaciones, _df_oc):
+    # Todas las órdenes en pesos (as-of join contra las cotizaciones), con su propio cubo e índice de fechas.
+    # Se arma la primera vez que se elige "Total consolidado (ARS)"; la versión del archivo de cotizaciones
+    # es parte de la clave, así que si se actualiza se vuelve a convertir.
+    print(f">>> [OC ST] Convirtiendo Órdenes de Compra a pesos con {os.path.basename(ruta_archivo_cotizaciones)}...")
+    try:
+        df_consolidado, sin_cotizacion = consolidar_en_pesos(_df_oc, leer_cotizaciones(ruta_archivo_cotizaciones))
+    except Exception as e:
+        print(f"[OC ST] No se pudieron usar las cotizaciones de {ruta_archivo_cotizaciones}: {e}")
+        return None
+    return CuboOC(df_consolidado), IndiceFechas(df_consolidado, 'moneda'), sin_cotizacion
+
+@st.cache_resource
+def obtener_cache_figuras_st():
+    # Una sola caché LRU de figuras para todo el servidor (ver graficos_arsat.CacheFiguras).
+    return CacheFiguras()
+
+@st.cache_resource
+def construir_indice_fechas_st(rutas_archivos, _df, columna_particion=None):
+    # Índice de fechas ordenadas (y particiones por moneda) para filtrar con rebanadas sin copiar.
+    return IndiceFechas(_df, columna_particion)
+
+@st.cache_resource
+def construir_indice_texto_st(rutas_archivos, _df):
+    # Índice invertido de descripción y proveedor; se arma con la primera búsqueda, no en el arranque.
+    print(">>> [OC ST] Construyendo índice de búsqueda de Órdenes de Compra...")
+    return IndiceTexto(_df)
+
+@st.cache_resource
+def detectar_proveedores_duplicados_st(rutas_archivos_oc, _df_oc):
+    # Sobre todo el dataset (no depende de los filtros): nombres unificados por la clave, claves parecidas y
+    # la cantidad de nombres y de claves distintos.
+    print(">>> [OC ST] Buscando posibles proveedores duplicados...")
+    return (variantes_por_clave(_df_oc), duplicados_proveedores(_df_oc),
+            _df_oc[COLUMNA_PROVEEDOR].nunique(), _df_oc[COLUMNA_PROVEEDOR_CLAVE].nunique())
+
+# Una línea JSON por arranque desde el lanzador, junto a la caché de datos.
+NOMBRE_REGISTRO_TIEMPOS = 'tiempos_arranque.jsonl'
+
+@st.cache_resource
+def registrar_tiempos_arranque_st(_fases):
+    # Sólo en la primera ejecución del proceso: con ARSAT_PERFIL_ARRANQUE=1 imprime el desglose por fase y,
+    # si lo lanzó run_dashboard.py, registra el arranque completo. El lanzador ya terminó: deja sus propios
+    # tiempos (lanzamiento del proceso, servidor listo) en ARSAT_ARCHIVO_TIEMPOS antes de abrir el navegador.
+    importacion = sum(segundos for nombre, segundos in _fases.items() if nombre.startswith('importación'))
+    primera_carga = _fases['carga de datos'] + _fases['limpieza'] + _fases['índices y motor de consultas']
+    if PERFIL_ACTIVO:
+        imprimir_perfil(_fases)
+    else:
+        print(f">>> [ARRANQUE] Importación {importacion:.2f} s, primera carga de datos {primera_carga:.2f} s, primer render {_fases['primer render']:.2f} s.")
+    ruta = os.environ.get('ARSAT_ARCHIVO_TIEMPOS')
+    if not ruta:
+        return
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            tiempos = json.load(f)
+        os.remove(ruta)
+    except (OSError, ValueError):
+        tiempos = {}
+    inicio_lanzamiento = tiempos.pop('inicio_lanzamiento', None)
+    tiempos.update({
+        'importacion_s': round(importacion, 3), 'primera_carga_s': round(primera_carga, 3),
+        'primer_render_s': round(_fases['primer render'], 3),
+        'dibujado_s': round(time.time() - inicio_lanzamiento, 3) if inicio_lanzamiento else None,
+        'fases': {nombre: round(segundos, 3) for nombre, segundos in _fases.items()},
+    })
+    if tiempos['dibujado_s'] is not None:
+        print(f">>> [ARRANQUE] Dashboard dibujado a los {tiempos['dibujado_s']:.1f} s de lanzado.")
+    try:
+        directorio = directorio_cache_por_defecto()
+        os.makedirs(directorio, exist_ok=True)
+        with open(os.path.join(directorio, NOMBRE_REGISTRO_TIEMPOS), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(tiempos, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[ARRANQUE] No se pudieron registrar los tiempos de arranque: {e}")
+
+# --- Columnas de las Tablas Paginadas (columna, título) ---
+COLUMNAS_TABLA_OC = [
+    ('fecha', 'Fecha'), ('comprobante', 'Comprobante'), ('proveedor', 'Proveedor'),
+    ('descripcion_producto', 'Descripcion Producto'), ('importe', 'Importe'),
+    ('moneda', 'Moneda'), ('gerencia', 'Gerencia'), ('tipocompra', 'Tipocompra'),
+    ('archivo_origen', 'Archivo'),
+]
+COLUMNAS_TABLA_OUTLIERS_OC = [c for c in COLUMNAS_TABLA_OC if c[0] != 'moneda']
+# Total consolidado: el importe ya está en pesos; se muestran la moneda original y la cotización usada.
+COLUMNAS_TABLA_CONSOLIDADO_OC = [
+    ('fecha', 'Fecha'), ('comprobante', 'Comprobante'), ('proveedor', 'Proveedor'),
+    ('descripcion_producto', 'Descripcion Producto'), ('importe', 'Importe (ARS)'),
+    ('moneda_original', 'Moneda Original'), ('cotizacion', 'Cotización'), ('gerencia', 'Gerencia'), ('tipocompra', 'Tipocompra'),
+    ('archivo_origen', 'Archivo'),
+]
+COLUMNAS_TABLA_TR = [('desembolso', 'Desembolso'), ('fecha', 'Fecha'), ('importe', 'Importe'), ('archivo_origen', 'Archivo')]
 
-df_oc, df_oc_mensual_ars, df_oc_mensual_usd = cargar_y_procesar_ordenes_compra_st(ruta_oc_main)
-df_tr, df_tr_mensual = cargar_y_procesar_transferencias_st(ruta_tr_main)
+# --- Carga de Datos ---
+inicio_carga = time.perf_counter()
+limpieza_previa = segundos_fase('limpieza')
+rutas_oc = rutas_ordenes_compra()
+rutas_tr = rutas_transferencias()
+
+df_oc, df_oc_mensual_ars, df_oc_mensual_usd = cargar_y_procesar_ordenes_compra_st(rutas_oc, motor_csv=motor_csv())
+df_tr, df_tr_mensual = cargar_y_procesar_transferencias_st(rutas_tr, motor_csv=motor_csv())
+inicio_indices = time.perf_counter()
+fases_arranque['limpieza'] = segundos_fase('limpieza') - limpieza_previa
+fases_arranque['carga de datos'] = inicio_indices - inicio_carga - fases_arranque['limpieza']
+
+motor_consultas_oc, motor_consultas_tr = construir_motor_consultas_st(
+    os.environ.get('ARSAT_MOTOR_CONSULTAS', 'cubo'), rutas_oc, df_oc, rutas_tr, df_tr) if df_oc is not None else (None, None)
+indice_fechas_oc = construir_indice_fechas_st(rutas_oc, df_oc, 'moneda') if df_oc is not None else None
+indice_fechas_tr = construir_indice_fechas_st(rutas_tr, df_tr) if df_tr is not None else None
+cache_figuras = obtener_cache_figuras_st()
+version_oc, version_tr = tuple(version_archivo(ruta) for ruta in rutas_oc), tuple(version_archivo(ruta) for ruta in rutas_tr)
+ruta_cotizaciones_oc = ruta_cotizaciones()
+version_cotizaciones_oc = version_archivo(ruta_cotizaciones_oc) if ruta_cotizaciones_oc else None
+inicio_render = time.perf_counter()
+fases_arranque['índices y motor de consultas'] = inicio_render - inicio_indices
 
 # --- Título del Dashboard ---
 st.title("📊 Dashboard de Análisis Financiero ARSAT")
@@ -138,7 +214,8 @@ st.title("📊 Dashboard de Análisis Financiero ARSAT")
 # --- Barra Lateral para Filtros ---
 st.sidebar.header("Filtros y Opciones")
 
-df_oc_filtrado_fecha = df_oc.copy() if df_oc is not None else pd.DataFrame() 
+df_oc_filtrado_fecha = df_oc if df_oc is not None else pd.DataFrame() 
+fecha_inicio_filtro_oc, fecha_fin_filtro_oc = None, None
 if df_oc is not None and 'fecha' in df_oc.columns and not df_oc.empty:
     min_fecha_oc_val = df_oc['fecha'].min()
     max_fecha_oc_val = df_oc['fecha'].max()
@@ -152,13 +229,13 @@ if df_oc is not None and 'fecha' in df_oc.columns and not df_oc.empty:
         )
         if isinstance(date_selection_oc, (tuple, list)) and len(date_selection_oc) == 2:
             fecha_inicio_oc, fecha_fin_oc = date_selection_oc
-            df_oc_filtrado_fecha = df_oc[
-                (df_oc['fecha'] >= pd.to_datetime(fecha_inicio_oc)) & 
-                (df_oc['fecha'] <= pd.to_datetime(fecha_fin_oc))
-            ]
+            fecha_inicio_filtro_oc, fecha_fin_filtro_oc = pd.to_datetime(fecha_inicio_oc), pd.to_datetime(fecha_fin_oc)
+            df_oc_filtrado_fecha = indice_fechas_oc.rango(fecha_inicio_filtro_oc, fecha_fin_filtro_oc)
         elif isinstance(date_selection_oc, date): 
             fecha_unica_oc = pd.to_datetime(date_selection_oc)
-            df_oc_filtrado_fecha = df_oc[df_oc['fecha'].dt.normalize() == fecha_unica_oc.normalize()]
+            fecha_inicio_filtro_oc = fecha_unica_oc.normalize()
+            fecha_fin_filtro_oc = fecha_inicio_filtro_oc + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+            df_oc_filtrado_fecha = indice_fechas_oc.dia(fecha_unica_oc)
     else:
         st.sidebar.warning("Fechas base inválidas para filtro de OC.")
 elif df_oc is None:
@@ -166,12 +243,24 @@ elif df_oc is None:
 
 moneda_oc_sel = None
 df_oc_final_filtrado = pd.DataFrame() 
+# Con "Total consolidado (ARS)" los paneles se responden desde el cubo e índice de las órdenes convertidas a pesos.
+motor_consultas_oc_sel, indice_fechas_oc_sel = motor_consultas_oc, indice_fechas_oc
+sin_cotizacion_oc = 0
 if df_oc_filtrado_fecha is not None and not df_oc_filtrado_fecha.empty:
-    monedas_oc_disponibles = sorted(df_oc_filtrado_fecha['moneda'].unique())
+    monedas_oc_disponibles = sorted(indice_fechas_oc.particiones_en_rango(fecha_inicio_filtro_oc, fecha_fin_filtro_oc))
+    if monedas_oc_disponibles and ruta_cotizaciones_oc:
+        monedas_oc_disponibles.append(MONEDA_CONSOLIDADA)
     if monedas_oc_disponibles:
         moneda_oc_sel = st.sidebar.selectbox("Moneda (Órdenes de Compra):", monedas_oc_disponibles, key="oc_moneda_sel")
+        if moneda_oc_sel == MONEDA_CONSOLIDADA:
+            consolidado_oc = consolidar_ordenes_en_pesos_st(rutas_oc, ruta_cotizaciones_oc, version_cotizaciones_oc, df_oc)
+            if consolidado_oc is not None:
+                motor_consultas_oc_sel, indice_fechas_oc_sel, sin_cotizacion_oc = consolidado_oc
+            else:
+                st.sidebar.error("No se pudo leer el archivo de cotizaciones; se muestra la primera moneda.")
+                moneda_oc_sel = monedas_oc_disponibles[0]
         if moneda_oc_sel: 
-             df_oc_final_filtrado = df_oc_filtrado_fecha[df_oc_filtrado_fecha['moneda'] == moneda_oc_sel]
+             df_oc_final_filtrado = indice_fechas_oc_sel.rango(fecha_inicio_filtro_oc, fecha_fin_filtro_oc, moneda_oc_sel)
     else:
         st.sidebar.text("No hay monedas para el filtro actual de OC.")
 else:
@@ -184,185 +273,98 @@ tab_oc, tab_transferencias = st.tabs(["Órdenes de Compra", "Transferencias Reci
 with tab_oc:
     st.header("Análisis de Órdenes de Compra")
     if not df_oc_final_filtrado.empty:
-        st.metric("Nº Órdenes (Filtros Aplicados)", len(df_oc_final_filtrado))
+        # Los paneles de conteo, top-N, gasto mensual y mayores órdenes se responden desde el motor de consultas
+        # (el cubo en memoria, o SQLite/DuckDB según ARSAT_MOTOR_CONSULTAS), sin recorrer todas las filas.
+        vista_cubo_oc = motor_consultas_oc_sel.consultar(fecha_inicio_filtro_oc, fecha_fin_filtro_oc, moneda_oc_sel)
+        st.metric("Nº Órdenes (Filtros Aplicados)", vista_cubo_oc.total_ordenes())
         fecha_min_display = df_oc_final_filtrado['fecha'].min().strftime('%d/%m/%Y') if pd.notna(df_oc_final_filtrado['fecha'].min()) else 'N/A'
         fecha_max_display = df_oc_final_filtrado['fecha'].max().strftime('%d/%m/%Y') if pd.notna(df_oc_final_filtrado['fecha'].max()) else 'N/A'
         st.subheader(f"Visualizaciones para {moneda_oc_sel} (Rango: {fecha_min_display} - {fecha_max_display})")
         
-        moneda_simbolo_oc = ""
-        if moneda_oc_sel == "Pesos": moneda_simbolo_oc = "ARS$ "
-        elif moneda_oc_sel == "Dólares": moneda_simbolo_oc = "U$D "
-        elif moneda_oc_sel == "Euro": moneda_simbolo_oc = "€ "
+        consolidado_sel = moneda_oc_sel == MONEDA_CONSOLIDADA
+        if consolidado_sel:
+            st.caption(f"Órdenes en dólares y euros convertidas a pesos con la última cotización publicada hasta su fecha "
+                       f"({os.path.basename(ruta_cotizaciones_oc)})."
+                       + (f" {sin_cotizacion_oc:,} órdenes sin cotización quedan fuera del total.".replace(",", ".") if sin_cotizacion_oc else ""))
+        moneda_simbolo_oc = prefijo_moneda(MONEDA_PESOS if consolidado_sel else moneda_oc_sel)
+        columnas_tabla_oc = COLUMNAS_TABLA_CONSOLIDADO_OC if consolidado_sel else COLUMNAS_TABLA_OC
+        # Clave de caché de las figuras de OC: sólo cambian si cambia el archivo (o las cotizaciones), el rango de fechas o la moneda.
+        clave_figuras_oc = (version_oc, version_cotizaciones_oc, fecha_inicio_filtro_oc, fecha_fin_filtro_oc, moneda_oc_sel)
 
         col1_oc_dist, col2_oc_dist = st.columns(2)
         with col1_oc_dist:
             st.write("Distribución de Importes:")
-            fig_hist_oc = px.histogram(df_oc_final_filtrado, x='importe', marginal="box", title=f"Distribución de Importes ({moneda_oc_sel})", color_discrete_sequence=['#636EFA'])
-            fig_hist_oc.update_layout(bargap=0.1, xaxis_title="Importe", yaxis_title="Frecuencia", xaxis_tickformat='.,.0f', height=450) 
+            escala_hist_oc = 'log' if st.checkbox("Escala logarítmica", key="oc_hist_log") else 'lineal'
+            fig_hist_oc = cache_figuras.obtener(clave_figuras_oc + ('histograma', escala_hist_oc), lambda: figura_histograma_oc(df_oc_final_filtrado['importe'], moneda_oc_sel, escala_hist_oc))
             st.plotly_chart(fig_hist_oc, use_container_width=True)
         
         with col2_oc_dist:
             st.write("Conteo por Tipo de Compra:")
-            conteo_tipocompra = df_oc_final_filtrado['tipocompra'].value_counts().reset_index()
-            conteo_tipocompra.columns = ['tipocompra', 'cantidad']
-            top_n_tipocompra = conteo_tipocompra.head(10).sort_values(by='cantidad', ascending=False) 
-            fig_tipo_compra = px.bar(top_n_tipocompra, y='tipocompra', x='cantidad', orientation='h', title=f"Top 10 Tipos de Compra ({moneda_oc_sel})", text='cantidad') 
-            fig_tipo_compra.update_traces(textposition='outside', textfont_size=10)
-            fig_tipo_compra.update_layout(yaxis_title="Tipo de Compra", xaxis_title="Cantidad de Órdenes", height=450, showlegend=False, yaxis={'categoryorder':'total ascending'}, margin=dict(l=180, r=20, t=50, b=70))
+            fig_tipo_compra = cache_figuras.obtener(clave_figuras_oc + ('tipocompra',), lambda: figura_conteo_tipocompra(vista_cubo_oc.conteo_por('tipocompra'), moneda_oc_sel))
             st.plotly_chart(fig_tipo_compra, use_container_width=True)
 
         st.subheader(f"Análisis por Gerencia y Proveedor ({moneda_oc_sel})")
         
         st.write("Top 5 Gerencias por Gasto:")
-        top_gerencias_oc = df_oc_final_filtrado.groupby('gerencia')['importe'].sum().nlargest(5).reset_index().sort_values(by='importe', ascending=False)
-        top_gerencias_oc['importe_display'] = top_gerencias_oc['importe'].apply(lambda x: format_value_with_si_dot_sep(x, ""))
-
-        fig_gerencias = px.bar(top_gerencias_oc, y='gerencia', x='importe', title=f"Top 5 Gerencias ({moneda_oc_sel})", orientation='h', text='importe_display')
-        fig_gerencias.update_traces(textposition='auto', textfont_size=9) 
-        fig_gerencias.update_layout(
-            xaxis_title="Importe Total", 
-            yaxis_title="Gerencia", 
-            xaxis_tickprefix=moneda_simbolo_oc, 
-            xaxis_tickformat='~s', 
-            height=400, 
-            showlegend=False,
-            yaxis={'categoryorder':'total ascending', 'tickfont': {'size': 10}, 'automargin': False}, 
-            xaxis={'automargin': True, 'title_font': {'size': 12}, 'tickangle': 0, 'nticks': 5}, 
-            margin=dict(l=350, r=10, t=50, b=80) 
-        )
+        fig_gerencias = cache_figuras.obtener(clave_figuras_oc + ('top_gerencias',), lambda: figura_top_n(
+            vista_cubo_oc.top_n('gerencia', 5), 'gerencia', f"Top 5 Gerencias ({moneda_oc_sel})", "Gerencia", moneda_simbolo_oc))
         st.plotly_chart(fig_gerencias, use_container_width=True)
 
         st.write("Top 5 Proveedores por Gasto:")
-        top_proveedores_oc = df_oc_final_filtrado.groupby('proveedor')['importe'].sum().nlargest(5).reset_index().sort_values(by='importe', ascending=False)
-        top_proveedores_oc['importe_display'] = top_proveedores_oc['importe'].apply(lambda x: format_value_with_si_dot_sep(x, ""))
-
-        fig_proveedores = px.bar(top_proveedores_oc, y='proveedor', x='importe', title=f"Top 5 Proveedores ({moneda_oc_sel})", orientation='h', text='importe_display')
-        fig_proveedores.update_traces(textposition='auto', textfont_size=9) 
-        fig_proveedores.update_layout(
-            xaxis_title="Importe Total", 
-            yaxis_title="Proveedor", 
-            xaxis_tickprefix=moneda_simbolo_oc, 
-            xaxis_tickformat='~s', 
-            height=400, 
-            showlegend=False, 
-            yaxis={'categoryorder':'total ascending', 'tickfont': {'size': 10}, 'automargin': False}, 
-            xaxis={'automargin': True, 'title_font': {'size': 12}, 'tickangle': 0, 'nticks': 5}, 
-            margin=dict(l=350, r=10, t=50, b=80) 
-        )
+        fig_proveedores = cache_figuras.obtener(clave_figuras_oc + ('top_proveedores',), lambda: figura_top_n(
+            vista_cubo_oc.top_n('proveedor_clave', 5), 'proveedor_clave', f"Top 5 Proveedores ({moneda_oc_sel})", "Proveedor", moneda_simbolo_oc))
         st.plotly_chart(fig_proveedores, use_container_width=True)
 
+        with st.expander("Posibles proveedores duplicados"):
+            variantes_proveedores_oc, duplicados_proveedores_oc, n_nombres_proveedor_oc, n_claves_proveedor_oc = detectar_proveedores_duplicados_st(rutas_oc, df_oc)
+            st.caption(f"{n_nombres_proveedor_oc:,} nombres de proveedor unificados en {n_claves_proveedor_oc:,} claves".replace(",", ".")
+                       + " (sin tipo societario, puntuación ni tildes).")
+            if not variantes_proveedores_oc.empty:
+                st.dataframe(variantes_proveedores_oc.assign(variantes=variantes_proveedores_oc['variantes'].map(' / '.join))
+                             .rename(columns={'proveedor_clave': 'Proveedor', 'variantes': 'Nombres unificados'}), hide_index=True)
+            if not duplicados_proveedores_oc.empty:
+                st.write("Claves distintas con nombres muy parecidos (revisar a mano):")
+                st.dataframe(duplicados_proveedores_oc.rename(columns={
+                    'clave_a': 'Proveedor A', 'clave_b': 'Proveedor B', 'similitud': 'Similitud', 'ordenes_a': 'Órdenes A', 'ordenes_b': 'Órdenes B',
+                }), hide_index=True)
+            else:
+                st.write("No se encontraron claves de proveedor parecidas.")
+
         if 'fecha' in df_oc_final_filtrado.columns and not df_oc_final_filtrado.empty:
-            gasto_mensual_filtrado_oc = df_oc_final_filtrado.set_index('fecha')['importe'].resample('ME').sum().reset_index() 
+            gasto_mensual_filtrado_oc = vista_cubo_oc.serie_mensual()
             if not gasto_mensual_filtrado_oc.empty:
                 st.subheader(f"Gasto Mensual ({moneda_oc_sel})")
-                gasto_mensual_grafico_oc = gasto_mensual_filtrado_oc.rename(columns={'fecha': 'Fecha'})
-                fig_gasto_mensual_oc = px.line(gasto_mensual_grafico_oc, x='Fecha', y='importe', markers=True, title=f"Gasto Mensual ({moneda_oc_sel})")
-                
-                y_values_oc = gasto_mensual_grafico_oc['importe']
-                if not y_values_oc.empty and pd.notna(y_values_oc.max()) and y_values_oc.max() > 0:
-                    num_ticks_y = 5
-                    max_y_val = y_values_oc.max() 
-                    min_y_val = 0 
-                    tickvals_oc = np.linspace(min_y_val, max_y_val, num_ticks_y)
-                    tickvals_oc = [v for v in tickvals_oc if pd.notna(v)] 
-                    if not tickvals_oc: tickvals_oc = [0] 
-                    ticktext_oc = [format_tick_value(val, moneda_simbolo_oc) for val in tickvals_oc]
-                    fig_gasto_mensual_oc.update_layout(yaxis_title=f"Importe Total", xaxis_title="Fecha", yaxis_tickvals=tickvals_oc, yaxis_ticktext=ticktext_oc)
-                else:
-                    fig_gasto_mensual_oc.update_layout(yaxis_title=f"Importe Total", xaxis_title="Fecha", yaxis_tickprefix=moneda_simbolo_oc, yaxis_tickformat='~s')
+                fig_gasto_mensual_oc = cache_figuras.obtener(clave_figuras_oc + ('gasto_mensual',), lambda: figura_serie_mensual(
+                    gasto_mensual_filtrado_oc, f"Gasto Mensual ({moneda_oc_sel})", moneda_simbolo_oc, "Importe Total"))
                 st.plotly_chart(fig_gasto_mensual_oc, use_container_width=True)
         
         st.subheader(f"Detalle de Órdenes de Mayor Valor ({moneda_oc_sel})")
         num_outliers_oc = st.slider("Número de órdenes a mostrar:", 1, 20, 5, key="oc_outliers_slider")
-        top_n_ordenes_oc = df_oc_final_filtrado.nlargest(num_outliers_oc, 'importe')
-        
-        df_outliers_display = top_n_ordenes_oc.copy()
-        if 'fecha' in df_outliers_display.columns:
-            if pd.api.types.is_datetime64_any_dtype(df_outliers_display['fecha']):
-                df_outliers_display['Fecha Formateada'] = df_outliers_display['fecha'].dt.strftime('%d/%m/%Y')
-            else:
-                try: df_outliers_display['Fecha Formateada'] = pd.to_datetime(df_outliers_display['fecha']).dt.strftime('%d/%m/%Y')
-                except: df_outliers_display['Fecha Formateada'] = df_outliers_display['fecha']
-        else: df_outliers_display['Fecha Formateada'] = 'N/A'
-
-        if 'importe' in df_outliers_display.columns:
-            df_outliers_display['Importe Formateado'] = df_outliers_display['importe'].apply(
-                lambda x: f"{moneda_simbolo_oc}{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") if pd.notna(x) else ""
-            )
-        else: df_outliers_display['Importe Formateado'] = 'N/A'
-
-        columnas_map_outliers = {
-            'Fecha Formateada': 'Fecha',
-            'comprobante': 'Comprobante',
-            'proveedor': 'Proveedor',
-            'descripcion_producto': 'Descripcion Producto',
-            'Importe Formateado': 'Importe',
-            'gerencia': 'Gerencia',
-            'tipocompra': 'Tipocompra'
-        }
-        df_outliers_renamed = pd.DataFrame()
-        for col_original, col_nuevo in columnas_map_outliers.items():
-            if col_original in df_outliers_display.columns:
-                df_outliers_renamed[col_nuevo] = df_outliers_display[col_original]
-            # Si la columna original formateada no existe, intentar con la versión sin formatear (para columnas no fecha/importe)
-            elif col_original.replace(" Formateada", "").lower().replace(" ", "_") in df_outliers_display.columns:
-                 internal_name = col_original.replace(" Formateada", "").lower().replace(" ", "_")
-                 df_outliers_renamed[col_nuevo] = df_outliers_display[internal_name]
-
-
-        columnas_a_mostrar_final_outliers = ['Fecha', 'Comprobante', 'Proveedor', 'Descripcion Producto', 'Importe', 'Gerencia', 'Tipocompra']
-        columnas_existentes_final_outliers = [col for col in columnas_a_mostrar_final_outliers if col in df_outliers_renamed.columns]
+        top_n_ordenes_oc = vista_cubo_oc.mayor_valor(num_outliers_oc)
         
-        if not df_outliers_renamed.empty:
-            st.dataframe(df_outliers_renamed[columnas_existentes_final_outliers])
+        if not top_n_ordenes_oc.empty:
+            st.dataframe(formatear_pagina(top_n_ordenes_oc, COLUMNAS_TABLA_CONSOLIDADO_OC if consolidado_sel else COLUMNAS_TABLA_OUTLIERS_OC, moneda_simbolo_oc), hide_index=True)
         else:
             st.write("No hay datos de outliers para mostrar.")
         
-        st.subheader("Vista de Datos de Órdenes de Compra (Filtrados, Primeras 100)")
-        if not df_oc_final_filtrado.empty:
-            df_oc_vista_previa = df_oc_final_filtrado.head(100).copy()
-            
-            if 'fecha' in df_oc_vista_previa.columns:
-                if pd.api.types.is_datetime64_any_dtype(df_oc_vista_previa['fecha']):
-                    df_oc_vista_previa['fecha_display'] = df_oc_vista_previa['fecha'].dt.strftime('%d/%m/%Y')
-                else:
-                    try: df_oc_vista_previa['fecha_display'] = pd.to_datetime(df_oc_vista_previa['fecha']).dt.strftime('%d/%m/%Y')
-                    except: df_oc_vista_previa['fecha_display'] = df_oc_vista_previa['fecha']
-            else: df_oc_vista_previa['fecha_display'] = "N/A"
-            
-            if 'importe' in df_oc_vista_previa.columns:
-                 df_oc_vista_previa['importe_display'] = df_oc_vista_previa['importe'].apply(lambda x: f"{moneda_simbolo_oc}{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-            else: df_oc_vista_previa['importe_display'] = "N/A"
-
-            # Seleccionar y renombrar columnas para la vista previa
-            df_oc_vista_previa_renamed = pd.DataFrame()
-            columnas_map_vista = {
-                'fecha_display': 'Fecha', 'comprobante': 'Comprobante', 'proveedor': 'Proveedor',
-                'descripcion_producto': 'Descripcion Producto', 'importe_display': 'Importe',
-                'moneda': 'Moneda', 'gerencia': 'Gerencia', 'tipocompra': 'Tipocompra'
-            }
-            columnas_ordenadas_vista = ['Fecha', 'Comprobante', 'Proveedor', 'Descripcion Producto', 'Importe', 'Moneda', 'Gerencia', 'Tipocompra']
-            
-            for col_original, col_nuevo in columnas_map_vista.items():
-                if col_original in df_oc_vista_previa.columns:
-                    df_oc_vista_previa_renamed[col_nuevo] = df_oc_vista_previa[col_original]
-                # Si la columna formateada no existe, usar la original (para columnas no fecha/importe)
-                elif col_original.replace("_display","") in df_oc_vista_previa.columns:
-                    df_oc_vista_previa_renamed[col_nuevo] = df_oc_vista_previa[col_original.replace("_display","")]
-
-
-            # Asegurar el orden y solo columnas existentes
-            columnas_existentes_vista = [col for col in columnas_ordenadas_vista if col in df_oc_vista_previa_renamed.columns]
-            st.dataframe(df_oc_vista_previa_renamed[columnas_existentes_vista])
+        st.subheader("Vista de Datos de Órdenes de Compra (Filtrados)")
+        consulta_oc = st.text_input("Buscar en descripción y proveedor:", key="oc_busqueda", placeholder="p.ej. FORD RANGER o SERVICE 150000 KM")
+        posiciones_busqueda_oc = construir_indice_texto_st(rutas_oc, indice_fechas_oc.df).buscar(consulta_oc) if consulta_oc.strip() else None
+        if posiciones_busqueda_oc is not None:
+            # La búsqueda se combina con los filtros de fecha y moneda de la barra lateral.
+            df_tabla_oc = indice_fechas_oc_sel.filas_en(posiciones_busqueda_oc, fecha_inicio_filtro_oc, fecha_fin_filtro_oc, moneda_oc_sel)
+            st.caption(f"{len(df_tabla_oc):,} órdenes coinciden con la búsqueda.".replace(",", "."))
         else:
-            st.write("No hay datos para mostrar en la vista previa según los filtros aplicados.")
+            df_tabla_oc = df_oc_final_filtrado
+        tabla_paginada(df_tabla_oc, columnas_tabla_oc, "oc_tabla", clave_figuras_oc + (consulta_oc,), moneda_simbolo_oc)
     else:
         st.warning("Seleccione un rango de fechas y moneda válidos para ver el análisis de Órdenes de Compra, o no hay datos para los filtros aplicados.")
 
 with tab_transferencias:
     # ... (Contenido de la pestaña de transferencias, igual que antes) ...
     st.header("Análisis de Transferencias Recibidas")
-    df_tr_filtrado_fecha = df_tr.copy() if df_tr is not None else pd.DataFrame()
+    df_tr_filtrado_fecha = df_tr if df_tr is not None else pd.DataFrame()
+    fecha_inicio_filtro_tr, fecha_fin_filtro_tr = None, None
 
     if df_tr is not None and 'fecha' in df_tr.columns and not df_tr.empty:
         min_fecha_tr_val = df_tr['fecha'].min()
@@ -377,70 +379,41 @@ with tab_transferencias:
             )
             if isinstance(date_selection_tr, (tuple, list)) and len(date_selection_tr) == 2:
                 fecha_inicio_tr, fecha_fin_tr = date_selection_tr
-                df_tr_filtrado_fecha = df_tr[
-                    (df_tr['fecha'] >= pd.to_datetime(fecha_inicio_tr)) & 
-                    (df_tr['fecha'] <= pd.to_datetime(fecha_fin_tr))
-                ]
+                fecha_inicio_filtro_tr, fecha_fin_filtro_tr = pd.to_datetime(fecha_inicio_tr), pd.to_datetime(fecha_fin_tr)
+                df_tr_filtrado_fecha = indice_fechas_tr.rango(fecha_inicio_filtro_tr, fecha_fin_filtro_tr)
             elif isinstance(date_selection_tr, date):
                 fecha_unica_tr = pd.to_datetime(date_selection_tr)
-                df_tr_filtrado_fecha = df_tr[df_tr['fecha'].dt.normalize() == fecha_unica_tr.normalize()]
+                fecha_inicio_filtro_tr = fecha_unica_tr.normalize()
+                fecha_fin_filtro_tr = fecha_inicio_filtro_tr + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+                df_tr_filtrado_fecha = indice_fechas_tr.dia(fecha_unica_tr)
         else:
             st.sidebar.warning("Fechas base inválidas para filtro de Transferencias.")
     elif df_tr is None:
         st.sidebar.error("Datos de Transferencias no disponibles.")
 
     if df_tr_filtrado_fecha is not None and not df_tr_filtrado_fecha.empty:
-        st.metric("Nº Transferencias (Filtro Aplicado)", len(df_tr_filtrado_fecha))
+        # Con SQLite/DuckDB el total y el importe mensual se resuelven en el motor, igual que en la pestaña de OC.
+        vista_tr = motor_consultas_tr.consultar(fecha_inicio_filtro_tr, fecha_fin_filtro_tr, tabla=TABLA_TRANSFERENCIAS) if motor_consultas_tr is not None else None
+        st.metric("Nº Transferencias (Filtro Aplicado)", vista_tr.total_ordenes() if vista_tr is not None else len(df_tr_filtrado_fecha))
         
-        df_tr_display = df_tr_filtrado_fecha.copy()
-        simbolo_moneda_tr_tabla = "ARS$ " 
-        if 'fecha' in df_tr_display.columns:
-            if pd.api.types.is_datetime64_any_dtype(df_tr_display['fecha']):
-                df_tr_display['fecha'] = df_tr_display['fecha'].dt.strftime('%d/%m/%Y')
-            else:
-                try: df_tr_display['fecha'] = pd.to_datetime(df_tr_display['fecha']).dt.strftime('%d/%m/%Y')
-                except: pass
-        if 'importe' in df_tr_display.columns:
-            df_tr_display['importe'] = df_tr_display['importe'].apply(lambda x: f"{simbolo_moneda_tr_tabla}{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-        
-        columnas_display_tr = {
-            'desembolso': 'Desembolso', 
-            'fecha': 'Fecha',
-            'importe': 'Importe'
-        }
-        df_tr_display = df_tr_display.rename(columns=columnas_display_tr)
-        st.dataframe(df_tr_display)
+        tabla_paginada(df_tr_filtrado_fecha, COLUMNAS_TABLA_TR, "tr_tabla", (version_tr, fecha_inicio_filtro_tr, fecha_fin_filtro_tr), prefijo_moneda('Pesos'))
         
-        simbolo_moneda_tr_grafico = "ARS$ " 
+        simbolo_moneda_tr_grafico = prefijo_moneda('Pesos')
+        clave_figuras_tr = (version_tr, fecha_inicio_filtro_tr, fecha_fin_filtro_tr, None)
 
         col1_tr, col2_tr = st.columns(2)
         with col1_tr:
             st.subheader("Distribución de Importes")
-            fig_hist_tr = px.histogram(df_tr_filtrado_fecha, x='importe', marginal="box", title="Distribución de Importes (Transferencias)", color_discrete_sequence=['#00CC96'])
-            fig_hist_tr.update_layout(xaxis_title="Importe", yaxis_title="Frecuencia", xaxis_tickprefix=simbolo_moneda_tr_grafico, xaxis_tickformat='.,.0f', height=400)
+            fig_hist_tr = cache_figuras.obtener(clave_figuras_tr + ('histograma',), lambda: figura_histograma_tr(df_tr_filtrado_fecha['importe'], simbolo_moneda_tr_grafico))
             st.plotly_chart(fig_hist_tr, use_container_width=True)
         
         with col2_tr:
             st.subheader("Importe Total por Mes")
             if 'fecha' in df_tr_filtrado_fecha.columns and 'importe' in df_tr_filtrado_fecha.columns:
-                df_tr_mensual_filtrado = df_tr_filtrado_fecha.set_index('fecha')['importe'].resample('ME').sum().reset_index()
-                if not df_tr_mensual_filtrado.empty:
-                    df_tr_mensual_grafico = df_tr_mensual_filtrado.rename(columns={'fecha': 'Fecha'})
-                    fig_tr_mensual = px.line(df_tr_mensual_grafico, x='Fecha', y='importe', markers=True, title="Importe Mensual de Transferencias")
-                    
-                    y_values_tr = df_tr_mensual_grafico['importe']
-                    if not y_values_tr.empty and pd.notna(y_values_tr.max()) and y_values_tr.max() > 0:
-                        num_ticks_tr = 5
-                        max_y_tr_val = y_values_tr.max()
-                        min_y_tr_val = 0
-                        tickvals_tr = np.linspace(min_y_tr_val, max_y_tr_val, num_ticks_tr)
-                        tickvals_tr = [v for v in tickvals_tr if pd.notna(v)]
-                        if not tickvals_tr: tickvals_tr = [0]
-                        ticktext_tr = [format_tick_value(val, simbolo_moneda_tr_grafico) for val in tickvals_tr]
-                        fig_tr_mensual.update_layout(yaxis_title="Importe Total Transferido", xaxis_title="Fecha", yaxis_tickvals=tickvals_tr, yaxis_ticktext=ticktext_tr, height=400)
-                    else:
-                        fig_tr_mensual.update_layout(yaxis_title="Importe Total Transferido", xaxis_title="Fecha", yaxis_tickprefix=simbolo_moneda_tr_grafico, yaxis_tickformat='~s', height=400)
-                    st.plotly_chart(fig_tr_mensual, use_container_width=True)
+                fig_tr_mensual = cache_figuras.obtener(clave_figuras_tr + ('importe_mensual',), lambda: figura_serie_mensual(
+                    vista_tr.serie_mensual() if vista_tr is not None else df_tr_filtrado_fecha.set_index('fecha')['importe'].resample('ME').sum().reset_index(),
+                    "Importe Mensual de Transferencias", simbolo_moneda_tr_grafico, "Importe Total Transferido", altura=400))
+                st.plotly_chart(fig_tr_mensual, use_container_width=True)
     else:
         st.warning("Seleccione un rango de fechas para ver el análisis de Transferencias o no hay datos para los filtros aplicados.")
 
@@ -451,4 +424,7 @@ st.sidebar.markdown("Dashboard Interactivo de Análisis")
 st.sidebar.markdown("Creado por: Tamara Monzón Fontano")
 st.sidebar.markdown("[Mi Perfil de LinkedIn](https://www.linkedin.com/in/TamaraMonzon)")
 st.sidebar.markdown("[Mi Portafolio](https://monzonfontano.netlify.app/)")
-st.sidebar.markdown("[Mi Perfil de GitHub](https://github.com/TamaraKaren)")
\ No newline at end of file
+st.sidebar.markdown("[Mi Perfil de GitHub](https://github.com/TamaraKaren)")
+
+fases_arranque['primer render'] = time.perf_counter() - inicio_render
+registrar_tiempos_arranque_st(fases_arranque)
\ No newline at end of file
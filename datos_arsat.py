@@ -0,0 +1,122 @@
+import os
+import sys
+import threading
+from functools import partial
+
+from cache_arsat import anexar_con_cache, cargar_con_cache
+from ingesta_arsat import (MOTOR_CSV_POR_DEFECTO, TAMANO_CHUNK_OC, actualizar_serie_mensual_tr, actualizar_series_mensuales_oc, expandir_rutas,
+                           leer_ordenes_compra_con_origen, leer_ordenes_compra_por_chunks, leer_transferencias,
+                           leer_transferencias_con_origen, mapear_en_paralelo)
+
+ARCHIVO_OC_EJEMPLO = "ARSAT_Finanzas_ordenes_de_compra-2022_marzo_2023.csv"
+ARCHIVO_TR_EJEMPLO = "transferencias-recibidas-2020-v5.csv"
+
+
+# --- Función para obtener la ruta correcta de los archivos (para PyInstaller) ---
+def get_path(filename):
+    if hasattr(sys, "_MEIPASS"):
+        return os.path.join(sys._MEIPASS, filename)
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+
+# Carpeta del .exe (o del script): lo que se deja ahí, fuera de _MEIPASS, sobrevive entre corridas.
+def directorio_local():
+    return os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
+
+# --- Exportaciones Mensuales de Órdenes de Compra (modo anexado) ---
+# Los CSV nuevos (mismo formato que el archivo base) se dejan en esta carpeta del directorio local.
+# Se puede cambiar con ARSAT_ORDENES_MENSUALES_DIR.
+def directorio_ordenes_mensuales():
+    if os.environ.get('ARSAT_ORDENES_MENSUALES_DIR'):
+        return os.environ['ARSAT_ORDENES_MENSUALES_DIR']
+    return os.path.join(directorio_local(), 'ordenes_mensuales')
+
+# --- Archivos de Cada Dataset (uno o varios) ---
+# ARSAT_ARCHIVOS_OC / ARSAT_ARCHIVOS_TR aceptan un archivo, un directorio (todos sus .csv) o un patrón glob
+# (p.ej. "exportaciones/ordenes_*.csv"). Sin esas variables se usa el archivo de ejemplo y, para las
+# órdenes, además las exportaciones mensuales de directorio_ordenes_mensuales().
+def rutas_dataset(variable_entorno, ruta_base, directorio_extra=None):
+    if os.environ.get(variable_entorno):
+        return tuple(expandir_rutas(os.environ[variable_entorno]))
+    extra = expandir_rutas(directorio_extra) if directorio_extra and os.path.isdir(directorio_extra) else []
+    return (ruta_base, *extra)
+
+# --- Archivo de Cotizaciones (modo "Total consolidado (ARS)") ---
+# ARSAT_ARCHIVO_COTIZACIONES, o cotizaciones.parquet / cotizaciones.csv en el directorio local (formato en
+# cotizaciones_arsat). Sin archivo de cotizaciones el dashboard no ofrece el total consolidado.
+ARCHIVOS_COTIZACIONES = ("cotizaciones.parquet", "cotizaciones.csv")
+
+def ruta_cotizaciones():
+    if os.environ.get('ARSAT_ARCHIVO_COTIZACIONES'):
+        return os.environ['ARSAT_ARCHIVO_COTIZACIONES']
+    for nombre in ARCHIVOS_COTIZACIONES:
+        if os.path.isfile(os.path.join(directorio_local(), nombre)):
+            return os.path.join(directorio_local(), nombre)
+    return None
+
+def rutas_ordenes_compra():
+    return rutas_dataset('ARSAT_ARCHIVOS_OC', get_path(ARCHIVO_OC_EJEMPLO), directorio_ordenes_mensuales())
+
+def rutas_transferencias():
+    return rutas_dataset('ARSAT_ARCHIVOS_TR', get_path(ARCHIVO_TR_EJEMPLO))
+
+# --- Motor de Lectura de los CSV ---
+# ARSAT_MOTOR_CSV=arrow lee los CSV con pyarrow.csv en varios hilos (ver ingesta_arsat). Sólo se usa al
+# limpiar un archivo que no está en la caché en disco; el resultado es el mismo con cualquiera de los dos.
+def motor_csv():
+    return os.environ.get('ARSAT_MOTOR_CSV', MOTOR_CSV_POR_DEFECTO)
+
+
+# --- Carga de los Datasets ---
+def cargar_ordenes_compra(rutas_archivos_oc, tamano_chunk=TAMANO_CHUNK_OC, motor=MOTOR_CSV_POR_DEFECTO):
+    # Con más de un archivo sólo se procesan (en paralelo) los que todavía no están en el almacén incremental.
+    if not rutas_archivos_oc:
+        raise FileNotFoundError("no se encontraron archivos de órdenes de compra.")
+    if len(rutas_archivos_oc) == 1:
+        return cargar_con_cache(rutas_archivos_oc[0], 'ordenes_compra', lambda ruta: leer_ordenes_compra_por_chunks(ruta, tamano_chunk, motor))
+    return anexar_con_cache(
+        rutas_archivos_oc, 'ordenes_compra_anexadas', partial(leer_ordenes_compra_con_origen, tamano_chunk=tamano_chunk, motor=motor),
+        actualizar_series_mensuales_oc, 'comprobante', mapear=mapear_en_paralelo
+    )
+
+def cargar_transferencias(rutas_archivos_transferencias, motor=MOTOR_CSV_POR_DEFECTO):
+    if not rutas_archivos_transferencias:
+        raise FileNotFoundError("no se encontraron archivos de transferencias.")
+    if len(rutas_archivos_transferencias) == 1:
+        return cargar_con_cache(rutas_archivos_transferencias[0], 'transferencias', lambda ruta: leer_transferencias(ruta, motor))
+    # Las transferencias no tienen una clave única: se anexan todas las filas de cada archivo nuevo.
+    return anexar_con_cache(
+        rutas_archivos_transferencias, 'transferencias_anexadas', partial(leer_transferencias_con_origen, motor=motor),
+        actualizar_serie_mensual_tr, None, mapear=mapear_en_paralelo
+    )
+
+
+# --- Datasets Compartidos por Proceso ---
+# Cada dataset se carga una sola vez por proceso del servidor y todas las sesiones reciben los mismos
+# objetos (sin pickle ni copias), así que quien los usa no los modifica en el lugar. El dashboard activa
+# copy-on-write de pandas para su proceso (ver dashboard_arsat.py); importar este módulo no cambia nada.
+_datasets = {}
+_lock_datasets = threading.Lock()
+
+
+def obtener_dataset(clave, cargar):
+    # Si otra sesión (o el precalentamiento) ya lo está cargando, se espera a que termine.
+    with _lock_datasets:
+        if clave not in _datasets:
+            _datasets[clave] = cargar()
+        return _datasets[clave]
+
+def obtener_ordenes_compra(rutas_archivos_oc, tamano_chunk=TAMANO_CHUNK_OC, motor=MOTOR_CSV_POR_DEFECTO):
+    return obtener_dataset(('ordenes_compra', tuple(rutas_archivos_oc), tamano_chunk, motor), lambda: cargar_ordenes_compra(rutas_archivos_oc, tamano_chunk, motor))
+
+def obtener_transferencias(rutas_archivos_transferencias, motor=MOTOR_CSV_POR_DEFECTO):
+    return obtener_dataset(('transferencias', tuple(rutas_archivos_transferencias), motor), lambda: cargar_transferencias(rutas_archivos_transferencias, motor))
+
+def precalentar():
+    # Carga los datasets por defecto antes de que se conecte la primera sesión (ver servidor_arsat.py).
+    for nombre, cargar in [("órdenes de compra", lambda: obtener_ordenes_compra(rutas_ordenes_compra(), motor=motor_csv())),
+                           ("transferencias", lambda: obtener_transferencias(rutas_transferencias(), motor=motor_csv()))]:
+        try:
+            cargar()
+            print(f">>> [DATOS] {nombre.capitalize()} precalentadas.")
+        except Exception as e:
+            print(f"[DATOS] No se pudieron precalentar las {nombre}: {e}")
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from limpieza_arsat import FORMATO_FECHA
+
+# --- Configuración de la Exportación a Excel ---
+# El libro se escribe en modo constant_memory: xlsxwriter vuelca cada fila a disco apenas se pasa a la
+# siguiente, así que la memoria no crece con el archivo. Las filas se generan por bloques desde el
+# DataFrame limpio (sin copiarlo entero) y las fechas se formatean bloque a bloque.
+MAX_FILAS_HOJA_EXCEL = 1_048_576
+FILAS_POR_BLOQUE_EXPORTACION = 50_000
+# El ancho de las columnas de texto se estima sobre una muestra repartida en todo el archivo.
+FILAS_MUESTRA_ANCHO = 100_000
+ANCHO_MAXIMO_COLUMNA = 50
+ANCHO_COLUMNA_FECHA = 12
+OPCIONES_LIBRO_EXCEL = {'constant_memory': True, 'strings_to_numbers': False, 'strings_to_formulas': False}
+
+
+def nombre_encabezado(columna):
+    return columna.replace('_', ' ').title()
+
+
+# --- Ancho de Columnas ---
+def _largo_maximo_texto(serie):
+    if serie.empty:
+        return 0
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Los textos posibles son las categorías: alcanza con medirlas a ellas.
+        valores = serie.cat.categories.to_numpy(dtype=object)
+        if serie.isna().any():
+            valores = np.append(valores, 'nan')
+    else:
+        posiciones = np.unique(np.linspace(0, len(serie) - 1, min(len(serie), FILAS_MUESTRA_ANCHO)).astype(np.int64))
+        valores = serie.iloc[posiciones].to_numpy(dtype=object)
+    return int(np.char.str_len(np.asarray(valores, dtype=str)).max())
+
+def calcular_anchos_columnas(df):
+    anchos = []
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            anchos.append(ANCHO_COLUMNA_FECHA)
+            continue
+        ancho = max(_largo_maximo_texto(df[col]), len(nombre_encabezado(col))) + 2
+        anchos.append(min(ancho, ANCHO_MAXIMO_COLUMNA))
+    return anchos
+
+
+# --- Conversión de un Bloque a Valores de Celda ---
+def _valores_celda(serie):
+    # Devuelve un array object con los valores a escribir: None deja la celda vacía (igual que to_excel con NaN).
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        # Cada fecha distinta se formatea una sola vez y se reparte a las filas por código.
+        codigos, unicos = pd.factorize(serie)
+        textos = np.append(unicos.strftime(FORMATO_FECHA).to_numpy(dtype=object), None)
+        return textos[codigos]
+    # Copia: en una columna object, to_numpy devuelve el array del DataFrame (que puede ser compartido).
+    valores = serie.to_numpy(dtype=object, copy=True)
+    valores[serie.isna().to_numpy()] = None
+    return valores
+
+
+# --- Exportación ---
+def exportar_excel(df, ruta_archivo, nombre_hoja, color_encabezado, max_filas_hoja=MAX_FILAS_HOJA_EXCEL):
+    # Escribe df con encabezado formateado, anchos de columna y panel fijo. Si no entra en una hoja
+    # (1.048.576 filas contando el encabezado) continúa en nombre_hoja_2, nombre_hoja_3, ...
+    # Devuelve la lista de hojas escritas.
+    filas_datos_por_hoja = max_filas_hoja - 1
+    anchos = calcular_anchos_columnas(df)
+    encabezados = [nombre_encabezado(col) for col in df.columns]
+    n_hojas = max(1, -(-len(df) // filas_datos_por_hoja))
+    hojas = []
+
+    libro = xlsxwriter.Workbook(ruta_archivo, OPCIONES_LIBRO_EXCEL)
+    try:
+        formato_encabezado = libro.add_format({'bold': True, 'text_wrap': False, 'valign': 'vcenter', 'align': 'center', 'fg_color': color_encabezado, 'border': 1})
+        for numero_hoja in range(n_hojas):
+            nombre = nombre_hoja if numero_hoja == 0 else f"{nombre_hoja}_{numero_hoja + 1}"
+            hoja = libro.add_worksheet(nombre)
+            hojas.append(nombre)
+            for i, ancho in enumerate(anchos):
+                hoja.set_column(i, i, ancho)
+            hoja.freeze_panes(1, 0)
+            hoja.write_row(0, 0, encabezados, formato_encabezado)
+
+            desde = numero_hoja * filas_datos_por_hoja
+            hasta = min(desde + filas_datos_por_hoja, len(df))
+            fila_excel = 1
+            for inicio in range(desde, hasta, FILAS_POR_BLOQUE_EXPORTACION):
+                bloque = df.iloc[inicio:min(inicio + FILAS_POR_BLOQUE_EXPORTACION, hasta)]
+                columnas = [_valores_celda(bloque[col]) for col in bloque.columns]
+                for valores in zip(*columnas):
+                    hoja.write_row(fila_excel, 0, valores)
+                    fila_excel += 1
+    finally:
+        libro.close()
+    return hojas
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from limpieza_arsat import FORMATO_FECHA
+
+# --- Formato es-AR Vectorizado ---
+# Mismo resultado que f"{simbolo}{x:,.2f}" con las comas y puntos intercambiados ("ARS$ 1.234.567,89"),
+# pero armado con operaciones de texto de NumPy sobre todo el array en lugar de un .apply por fila.
+# Los nulos quedan como texto vacío. Para importes en centavos enteros (lo que entrega el parser de limpieza)
+# el resultado es idéntico; sólo en empates exactos de medio centavo puede diferir el último dígito.
+SEPARADOR_MILES = '.'
+SEPARADOR_DECIMAL = ','
+PREFIJOS_MONEDA = {'Pesos': "ARS$ ", 'Dólares': "U$D ", 'Euro': "€ "}
+# Sufijos SI de los rótulos abreviados ("1,5M"): (umbral = divisor, sufijo), de mayor a menor.
+SUFIJOS_SI = [(1_000_000_000, 'G'), (1_000_000, 'M'), (1_000, 'K')]
+
+
+def prefijo_moneda(moneda):
+    return PREFIJOS_MONEDA.get(moneda, "")
+
+
+def _matriz_numeros(unidades, negativos, decimales):
+    # unidades: int64 >= 0 (valor * 10**decimales). Arma una matriz de códigos de carácter (una fila por
+    # número, alineada a la derecha) escribiendo de a un dígito por columna, de derecha a izquierda:
+    # decimales, coma, y la parte entera con un punto cada 3 dígitos. Las posiciones sin dígito quedan en ' '.
+    # Se llena traspuesta (una fila contigua por columna de texto) y se traspone una sola vez al final.
+    n = len(unidades)
+    n_digitos = len(str(int(unidades.max()) // 10 ** decimales))
+    ancho = 1 + n_digitos + (n_digitos - 1) // 3 + (decimales + 1 if decimales else 0)
+    columnas = np.full((ancho, n), ord(' '), dtype=np.uint32)
+    resto = unidades
+    columna = ancho - 1
+    for _ in range(decimales):
+        resto, digito = np.divmod(resto, 10)
+        columnas[columna] = digito + ord('0')
+        columna -= 1
+    if decimales:
+        columnas[columna] = ord(SEPARADOR_DECIMAL)
+        columna -= 1
+    columna_unidades = columna
+    cantidad_digitos = np.ones(n, dtype=np.int64)
+    for posicion in range(n_digitos):
+        if posicion > 0:
+            if posicion % 3 == 0:
+                columnas[columna] = np.where(resto > 0, ord(SEPARADOR_MILES), ord(' '))
+                columna -= 1
+            presente = resto > 0
+            cantidad_digitos += presente
+        resto, digito = np.divmod(resto, 10)
+        columnas[columna] = digito + ord('0') if posicion == 0 else np.where(presente, digito + ord('0'), ord(' '))
+        columna -= 1
+    filas_negativas = np.flatnonzero(negativos)
+    if filas_negativas.size:
+        # El signo va justo a la izquierda del primer dígito (contando los puntos de miles intermedios).
+        k = cantidad_digitos[filas_negativas] - 1
+        columnas[columna_unidades - k - k // 3 - 1, filas_negativas] = ord('-')
+    matriz = np.ascontiguousarray(columnas.T)
+    return np.char.lstrip(matriz.view(f'U{ancho}').ravel())
+
+def formatear_importes(valores, simbolo="", decimales=2):
+    valores = np.asarray(valores, dtype=float)
+    if valores.size == 0:
+        return np.array([], dtype=object)
+    nulos = ~np.isfinite(valores)
+    unidades = np.rint(np.abs(np.where(nulos, 0.0, valores)) * 10 ** decimales).astype(np.int64)
+    textos = _matriz_numeros(unidades, (valores < 0) & (unidades > 0), decimales)
+    if simbolo:
+        textos = np.char.add(simbolo, textos)
+    return np.where(nulos, '', textos).astype(object)
+
+def formatear_enteros(valores, prefijo=""):
+    # Equivale a f"{prefijo}{x:,.0f}" con separadores es-AR (rótulos de ejes).
+    return formatear_importes(valores, prefijo, decimales=0)
+
+def formatear_si(valores, prefijo=""):
+    # Rótulo abreviado: 1 decimal y sufijo G/M/K desde mil, entero con separador de miles por debajo.
+    # En empates decimales exactos (4.650 -> 4,6K) redondea al par; el f-string dependía de la representación binaria.
+    valores = np.asarray(valores, dtype=float)
+    absolutos = np.abs(valores)
+    salida = np.full(len(valores), '', dtype=object)
+    restantes = np.isfinite(valores)
+    for umbral, sufijo in SUFIJOS_SI:
+        grupo = restantes & (absolutos >= umbral)
+        if grupo.any():
+            salida[grupo] = np.char.add(formatear_importes(valores[grupo] / umbral, prefijo, decimales=1).astype(str), sufijo)
+        restantes &= ~grupo
+    if restantes.any():
+        salida[restantes] = formatear_importes(valores[restantes], prefijo, decimales=0)
+    return salida
+
+def formatear_fechas(fechas, formato=FORMATO_FECHA):
+    # Cada fecha distinta se formatea una sola vez y se reparte a las filas por código; NaT queda vacío.
+    codigos, unicos = pd.factorize(pd.Series(fechas))
+    textos = np.append(pd.DatetimeIndex(unicos).strftime(formato).to_numpy(dtype=object), '')
+    return textos[codigos]
@@ -0,0 +1,162 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from formato_arsat import formatear_enteros, formatear_si
+
+# --- Caché de Figuras (LRU acotada) ---
+# Streamlit vuelve a ejecutar todo el script en cada interacción. Las figuras se guardan con la clave
+# (versión del dataset, fecha_inicio, fecha_fin, moneda, nombre de la figura): si el filtro que las
+# afecta no cambió, se reutilizan y sólo se reconstruye la figura cuya clave es nueva.
+CAPACIDAD_CACHE_FIGURAS = 64
+
+
+class CacheFiguras:
+    def __init__(self, capacidad=CAPACIDAD_CACHE_FIGURAS):
+        self.capacidad = capacidad
+        self._figuras = OrderedDict()
+        # La caché se comparte entre sesiones de Streamlit, que corren en hilos distintos.
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, construir):
+        # construir() sólo se llama si la figura no está en caché.
+        with self._lock:
+            if clave in self._figuras:
+                self._figuras.move_to_end(clave)
+                self.aciertos += 1
+                return self._figuras[clave]
+        figura = construir()
+        with self._lock:
+            self.fallos += 1
+            self._figuras[clave] = figura
+            self._figuras.move_to_end(clave)
+            while len(self._figuras) > self.capacidad:
+                self._figuras.popitem(last=False)
+        return figura
+
+    def __len__(self):
+        return len(self._figuras)
+
+
+# --- Histogramas Agregados en el Servidor ---
+# En lugar de mandar cada importe al navegador (px.histogram), se calculan con NumPy los conteos por bin
+# y los estadísticos del box plot; la figura sólo lleva esos resúmenes, así que su tamaño no depende
+# de la cantidad de filas. Con escala 'log' los bins son logarítmicos y el eje x se dibuja en log10
+# (sólo entran los importes positivos).
+BINS_HISTOGRAMA = 50
+
+def resumen_histograma(importes, n_bins=BINS_HISTOGRAMA, escala='lineal'):
+    valores = np.asarray(importes, dtype=float)
+    valores = valores[np.isfinite(valores)]
+    excluidos = 0
+    if escala == 'log':
+        positivos = valores > 0
+        excluidos = int((~positivos).sum())
+        valores = np.log10(valores[positivos])
+    if valores.size == 0:
+        return None
+    conteos, bordes = np.histogram(valores, bins=n_bins)
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    # Bigotes como en Plotly: el dato más extremo dentro de 1,5 * IQR de los cuartiles.
+    iqr = q3 - q1
+    bigote_inferior = valores[valores >= q1 - 1.5 * iqr].min()
+    bigote_superior = valores[valores <= q3 + 1.5 * iqr].max()
+    return {
+        'escala': escala, 'conteos': conteos, 'bordes': bordes,
+        'q1': q1, 'mediana': mediana, 'q3': q3, 'media': valores.mean(),
+        'bigote_inferior': bigote_inferior, 'bigote_superior': bigote_superior,
+        'atipicos': int(((valores < bigote_inferior) | (valores > bigote_superior)).sum()),
+        'total': int(valores.size), 'excluidos': excluidos,
+    }
+
+def figura_histograma(importes, titulo, color, simbolo="", altura=450, n_bins=BINS_HISTOGRAMA, escala='lineal'):
+    resumen = resumen_histograma(importes, n_bins, escala)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.03)
+    fig.update_layout(title=titulo, height=altura, showlegend=False, bargap=0.1)
+    fig.update_yaxes(title_text="Frecuencia", row=2, col=1)
+    fig.update_xaxes(title_text="Importe", row=2, col=1)
+    if resumen is None:
+        return fig
+
+    es_log = escala == 'log'
+    a_importe = (lambda x: 10 ** np.asarray(x)) if es_log else np.asarray
+    bordes = resumen['bordes']
+    desde, hasta = a_importe(bordes[:-1]), a_importe(bordes[1:])
+    textos_bin = np.char.add(np.char.add(formatear_enteros(desde, simbolo).astype(str), " - "), formatear_enteros(hasta, simbolo).astype(str))
+    fig.add_trace(go.Bar(
+        x=(bordes[:-1] + bordes[1:]) / 2, y=resumen['conteos'], width=np.diff(bordes), marker_color=color,
+        customdata=textos_bin, hovertemplate="%{customdata}<br>Frecuencia: %{y}<extra></extra>",
+    ), row=2, col=1)
+    fig.add_trace(go.Box(
+        y=['importe'], orientation='h', boxpoints=False, marker_color=color,
+        q1=[resumen['q1']], median=[resumen['mediana']], q3=[resumen['q3']], mean=[resumen['media']],
+        lowerfence=[resumen['bigote_inferior']], upperfence=[resumen['bigote_superior']], hoverinfo='skip',
+    ), row=1, col=1)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+
+    if es_log:
+        decadas = np.arange(np.floor(bordes[0]), np.ceil(bordes[-1]) + 1)
+        fig.update_xaxes(tickvals=decadas, ticktext=list(formatear_si(10 ** decadas, simbolo)), row=2, col=1)
+    else:
+        fig.update_xaxes(tickprefix=simbolo, tickformat='.,.0f', row=2, col=1)
+    notas = [f"{resumen['total']:,} importes".replace(",", "."), f"{resumen['atipicos']:,} atípicos fuera de los bigotes".replace(",", ".")]
+    if resumen['excluidos']:
+        notas.append(f"{resumen['excluidos']:,} importes ≤ 0 fuera de la escala log".replace(",", "."))
+    fig.add_annotation(text=" · ".join(notas), xref='paper', yref='paper', x=1, y=1.0, xanchor='right', yanchor='bottom', showarrow=False, font={'size': 10})
+    return fig
+
+def figura_histograma_oc(importes, moneda, escala='lineal'):
+    return figura_histograma(importes, f"Distribución de Importes ({moneda})", '#636EFA', altura=450, escala=escala)
+
+def figura_histograma_tr(importes, simbolo):
+    return figura_histograma(importes, "Distribución de Importes (Transferencias)", '#00CC96', simbolo=simbolo, altura=400)
+
+def figura_conteo_tipocompra(conteo_tipocompra, moneda):
+    top_n_tipocompra = conteo_tipocompra.head(10).sort_values(by='cantidad', ascending=False)
+    fig = px.bar(top_n_tipocompra, y='tipocompra', x='cantidad', orientation='h', title=f"Top 10 Tipos de Compra ({moneda})", text='cantidad')
+    fig.update_traces(textposition='outside', textfont_size=10)
+    fig.update_layout(yaxis_title="Tipo de Compra", xaxis_title="Cantidad de Órdenes", height=450, showlegend=False, yaxis={'categoryorder':'total ascending'}, margin=dict(l=180, r=20, t=50, b=70))
+    return fig
+
+def figura_top_n(top, dimension, titulo, titulo_eje_y, simbolo):
+    # top: DataFrame [dimension, 'importe'] (VistaCubo.top_n / VistaSQL.top_n).
+    top = top.assign(importe_display=formatear_si(top['importe'].to_numpy()))
+    fig = px.bar(top, y=dimension, x='importe', title=titulo, orientation='h', text='importe_display')
+    fig.update_traces(textposition='auto', textfont_size=9)
+    fig.update_layout(
+        xaxis_title="Importe Total",
+        yaxis_title=titulo_eje_y,
+        xaxis_tickprefix=simbolo,
+        xaxis_tickformat='~s',
+        height=400,
+        showlegend=False,
+        yaxis={'categoryorder':'total ascending', 'tickfont': {'size': 10}, 'automargin': False},
+        xaxis={'automargin': True, 'title_font': {'size': 12}, 'tickangle': 0, 'nticks': 5},
+        margin=dict(l=350, r=10, t=50, b=80)
+    )
+    return fig
+
+def figura_serie_mensual(mensual, titulo, simbolo, titulo_eje_y, altura=None):
+    # mensual: DataFrame ['fecha', 'importe'] con un punto por mes.
+    grafico = mensual.rename(columns={'fecha': 'Fecha'})
+    fig = px.line(grafico, x='Fecha', y='importe', markers=True, title=titulo)
+    layout_altura = {} if altura is None else {'height': altura}
+
+    y_values = grafico['importe']
+    if not y_values.empty and pd.notna(y_values.max()) and y_values.max() > 0:
+        num_ticks_y = 5
+        tickvals = np.linspace(0, y_values.max(), num_ticks_y)
+        tickvals = [v for v in tickvals if pd.notna(v)]
+        if not tickvals: tickvals = [0]
+        ticktext = list(formatear_enteros(tickvals, simbolo))
+        fig.update_layout(yaxis_title=titulo_eje_y, xaxis_title="Fecha", yaxis_tickvals=tickvals, yaxis_ticktext=ticktext, **layout_altura)
+    else:
+        fig.update_layout(yaxis_title=titulo_eje_y, xaxis_title="Fecha", yaxis_tickprefix=simbolo, yaxis_tickformat='~s', **layout_altura)
+    return fig
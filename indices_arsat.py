@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from limpieza_arsat import COLUMNA_FECHA
+
+
+# --- Índice de Fechas Ordenadas ---
+# Requiere el DataFrame ordenado por fecha (los loaders lo entregan así, con NaT al final).
+# Los filtros se resuelven con búsqueda binaria y devuelven rebanadas iloc[i:j], que son vistas
+# del DataFrame original (no copian datos). Si se indica una columna de partición (p.ej. 'moneda'),
+# se guardan además las posiciones de las filas de cada valor (ya ordenadas por fecha): los filtros
+# fecha+partición buscan en esas posiciones y copian sólo las filas que devuelven, en lugar de mantener
+# una copia entera del DataFrame por partición (el DataFrame base puede estar mapeado en memoria).
+class IndiceFechas:
+    def __init__(self, df, columna_particion=None, columna_fecha=COLUMNA_FECHA):
+        self.columna_fecha = columna_fecha
+        self.columna_particion = columna_particion
+        self.df = ordenar_por_fecha(df, columna_fecha)
+        self._fechas = self.df[columna_fecha].to_numpy()
+        self.particiones = {}
+        if columna_particion is not None and columna_particion in self.df.columns:
+            for valor, posiciones in self.df.groupby(columna_particion, observed=True, sort=True).indices.items():
+                self.particiones[valor] = (posiciones, self._fechas[posiciones])
+
+    def _datos(self, particion):
+        if particion is None:
+            return self.df, self._fechas
+        return self.particiones.get(particion, (np.array([], dtype=np.intp), self._fechas[0:0]))
+
+    def _filas(self, df, i, j):
+        # df es el DataFrame completo (rebanada = vista) o las posiciones de una partición.
+        return df.iloc[i:j] if isinstance(df, pd.DataFrame) else self.df.take(df[i:j])
+
+    def rango(self, fecha_inicio=None, fecha_fin=None, particion=None):
+        # Filas con fecha_inicio <= fecha <= fecha_fin (extremos opcionales).
+        df, fechas = self._datos(particion)
+        return self._filas(df, *_limites_rango(fechas, fecha_inicio, fecha_fin))
+
+    def dia(self, fecha, particion=None):
+        # Filas de un día calendario completo, equivalente a fecha.dt.normalize() == día.
+        df, fechas = self._datos(particion)
+        inicio = pd.Timestamp(fecha).normalize()
+        i, j = np.searchsorted(fechas, np.array([inicio, inicio + pd.Timedelta(days=1)], dtype='datetime64[ns]'), side='left')
+        return self._filas(df, i, j)
+
+    def filas_en(self, posiciones, fecha_inicio=None, fecha_fin=None, particion=None):
+        # Filas de self.df en posiciones (iloc, ordenadas; p.ej. el resultado de una búsqueda) que además
+        # cumplen el filtro de fechas y partición. Como self.df está ordenado por fecha, el rango de fechas
+        # es un intervalo de posiciones: sólo se miran las posiciones recibidas, no todas las filas.
+        i, j = _limites_rango(self._fechas, fecha_inicio, fecha_fin)
+        posiciones = posiciones[(posiciones >= i) & (posiciones < j)]
+        if particion is not None:
+            posiciones = posiciones[(self.df[self.columna_particion].iloc[posiciones] == particion).to_numpy()]
+        return self.df.take(posiciones)
+
+    def particiones_en_rango(self, fecha_inicio=None, fecha_fin=None):
+        return [valor for valor in self.particiones if self._hay_filas(fecha_inicio, fecha_fin, valor)]
+
+    def _hay_filas(self, fecha_inicio, fecha_fin, particion):
+        i, j = _limites_rango(self._datos(particion)[1], fecha_inicio, fecha_fin)
+        return j > i
+
+
+def _limites_rango(fechas, fecha_inicio, fecha_fin):
+    i = 0 if fecha_inicio is None else np.searchsorted(fechas, np.datetime64(pd.Timestamp(fecha_inicio)), side='left')
+    j = np.searchsorted(fechas, np.datetime64('NaT', 'ns'), side='left') if fecha_fin is None else np.searchsorted(fechas, np.datetime64(pd.Timestamp(fecha_fin)), side='right')
+    return i, j
+
+
+def ordenar_por_fecha(df, columna_fecha=COLUMNA_FECHA):
+    # Orden estable (mantiene el orden del archivo dentro de un mismo día) con NaT al final.
+    if columna_fecha not in df.columns or df[columna_fecha].is_monotonic_increasing or _ordenado_con_nat_al_final(df[columna_fecha]):
+        return df
+    return df.sort_values(columna_fecha, kind='stable', na_position='last', ignore_index=True)
+
+def _ordenado_con_nat_al_final(fechas):
+    validas = fechas.notna().to_numpy()
+    n_validas = int(validas.sum())
+    return validas[:n_validas].all() and fechas.iloc[:n_validas].is_monotonic_increasing
@@ -0,0 +1,258 @@
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+
+from indices_arsat import ordenar_por_fecha
+from limpieza_arsat import (
+    COLUMNA_FECHA,
+    COLUMNA_IMPORTE,
+    convertir_fecha,
+    limpiar_chunk_oc,
+    limpiar_importe,
+    normalizar_nombres_columnas,
+    unir_categoricas,
+)
+from perfil_arsat import medir_fase
+
+# --- Configuración de la Ingesta por Bloques ---
+TAMANO_CHUNK_OC = 100_000
+SERIES_MENSUALES_OC = {'Pesos': 'gasto_ordenes_ars', 'Dólares': 'gasto_ordenes_usd'}
+# Motores de lectura de CSV: 'pandas' (pd.read_csv, un hilo) o 'arrow' (pyarrow.csv, ver más abajo).
+MOTORES_CSV = ('pandas', 'arrow')
+MOTOR_CSV_POR_DEFECTO = 'pandas'
+
+
+# --- Motor de Lectura Arrow ---
+# pyarrow.csv parte el archivo en bloques, los transcodifica de latin1 a UTF-8 y los parsea en varios
+# hilos a la vez. Cada formato tiene su esquema declarado (todas las columnas como texto: los importes
+# "$ 1.234,56" y las fechas d/m/a los sigue convirtiendo la limpieza de siempre), así Arrow no infiere
+# tipos y el resultado no depende del contenido de cada archivo. Los textos llegan a pandas como
+# string[pyarrow], sobre los mismos buffers de Arrow. Las columnas que no estén en el esquema se infieren.
+ESQUEMA_CSV_OC = {nombre: pa.string() for nombre in
+                  ['Fecha', 'Comprobante', 'Proveedor', 'Descripcion producto', 'Importe', 'Moneda', 'Gerencia', 'Tipocompra']}
+ESQUEMA_CSV_TRANSFERENCIAS = {nombre: pa.string() for nombre in ['Desembolsos', 'Fecha', 'Importe']}
+TAMANO_BLOQUE_CSV_ARROW = 1 << 22
+
+def tipo_pandas_arrow(tipo_arrow):
+    # types_mapper de Table.to_pandas: textos como string[pyarrow]; el resto con la conversión por defecto.
+    if pa.types.is_string(tipo_arrow) or pa.types.is_large_string(tipo_arrow):
+        return pd.StringDtype('pyarrow')
+    return None
+
+def leer_tabla_csv_arrow(ruta_archivo, delimitador, esquema):
+    opciones_lectura = pa_csv.ReadOptions(encoding='latin1', use_threads=True, block_size=TAMANO_BLOQUE_CSV_ARROW)
+    opciones_parseo = pa_csv.ParseOptions(delimiter=delimitador, quote_char='"')
+    # Vacíos como nulos, igual que pd.read_csv.
+    opciones_conversion = pa_csv.ConvertOptions(column_types=esquema, strings_can_be_null=True)
+    return pa_csv.read_csv(ruta_archivo, read_options=opciones_lectura, parse_options=opciones_parseo, convert_options=opciones_conversion)
+
+def _validar_motor_csv(motor):
+    if motor not in MOTORES_CSV:
+        raise ValueError(f"Motor de lectura de CSV desconocido: {motor!r} (opciones: {', '.join(MOTORES_CSV)}).")
+
+def _bloques_csv_oc(ruta_archivo_oc, tamano_chunk, motor):
+    _validar_motor_csv(motor)
+    if motor == 'pandas':
+        with pd.read_csv(ruta_archivo_oc, encoding='latin1', delimiter=';', chunksize=tamano_chunk) as lector:
+            yield from lector
+        return
+    # La tabla Arrow completa (texto compacto) queda en memoria; a pandas se pasa de a un bloque por vez.
+    tabla = leer_tabla_csv_arrow(ruta_archivo_oc, ';', ESQUEMA_CSV_OC)
+    for inicio in range(0, tabla.num_rows, tamano_chunk):
+        yield tabla.slice(inicio, tamano_chunk).to_pandas(types_mapper=tipo_pandas_arrow)
+
+
+# --- Almacén Columnar Compacto ---
+# Guarda cada columna ya tipada (float64, datetime64, etc.) como una lista de bloques y
+# las concatena columna por columna al final, así nunca conviven dos copias del dataset completo.
+class AlmacenColumnar:
+    def __init__(self):
+        self.columnas = {}
+        self.filas = 0
+
+    def agregar(self, df_chunk):
+        for col in df_chunk.columns:
+            self.columnas.setdefault(col, []).append(df_chunk[col].reset_index(drop=True))
+        self.filas += len(df_chunk)
+
+    def consolidar(self):
+        datos = {}
+        for col in list(self.columnas):
+            bloques = self.columnas.pop(col)
+            if len(bloques) == 1:
+                datos[col] = bloques[0]
+            elif all(isinstance(b.dtype, pd.CategoricalDtype) for b in bloques):
+                # Cada bloque trae su propio diccionario: se unifican en uno solo, con categorías ordenadas.
+                datos[col] = unir_categoricas(bloques)
+            else:
+                datos[col] = pd.concat(bloques, ignore_index=True)
+        return pd.DataFrame(datos, copy=False)
+
+
+# --- Agregados Mensuales Incrementales ---
+def _sumar_mensual(acumulado, df_chunk, moneda):
+    sub = df_chunk.loc[df_chunk['moneda'] == moneda, [COLUMNA_FECHA, COLUMNA_IMPORTE]]
+    if sub.empty:
+        return acumulado
+    parcial = sub.set_index(COLUMNA_FECHA)[COLUMNA_IMPORTE].resample('ME').sum()
+    return parcial if acumulado is None else acumulado.add(parcial, fill_value=0)
+
+def _cerrar_serie_mensual(acumulado, nombre):
+    if acumulado is None:
+        return None
+    # Re-muestrear rellena con 0 los meses sin órdenes entre bloques, igual que un único resample.
+    serie = acumulado.sort_index().resample('ME').sum()
+    serie.index.name = COLUMNA_FECHA
+    serie.name = nombre
+    return serie
+
+
+def actualizar_series_mensuales_oc(series, df_nuevas):
+    # Modo anexado: suma a las series ARS/USD ya guardadas sólo las filas nuevas. Las filas sin fecha
+    # se informan y quedan fuera de las series (en lugar de anular las series de todo el historial).
+    acumulados = dict(zip(SERIES_MENSUALES_OC, series or [None] * len(SERIES_MENSUALES_OC)))
+    sin_fecha = df_nuevas[COLUMNA_FECHA].isnull()
+    if sin_fecha.any():
+        print(f"[OC] ¡Atención! {int(sin_fecha.sum())} órdenes nuevas sin fecha válida no se suman a las series mensuales.")
+    df_nuevas = df_nuevas[~sin_fecha]
+    return tuple(
+        _cerrar_serie_mensual(_sumar_mensual(acumulados[moneda], df_nuevas, moneda), nombre)
+        for moneda, nombre in SERIES_MENSUALES_OC.items()
+    )
+
+
+# --- Lector por Bloques de Órdenes de Compra ---
+def leer_ordenes_compra_por_chunks(ruta_archivo_oc, tamano_chunk=TAMANO_CHUNK_OC, motor=MOTOR_CSV_POR_DEFECTO, ordenar=True):
+    # La memoria pico queda acotada por el tamaño del bloque: el texto crudo de cada bloque
+    # se limpia, se pliega en los agregados mensuales y se descarta antes de leer el siguiente.
+    # Con ordenar=False las filas quedan en el orden del archivo (p.ej. para exportarlas tal como vinieron).
+    almacen = AlmacenColumnar()
+    acumulados = dict.fromkeys(SERIES_MENSUALES_OC)
+    fechas_invalidas = 0
+    tiene_fecha = False
+    reporte = {}
+
+    for df_chunk in _bloques_csv_oc(ruta_archivo_oc, tamano_chunk, motor):
+        with medir_fase('limpieza'):
+            df_chunk = limpiar_chunk_oc(df_chunk, reporte)
+        if COLUMNA_FECHA in df_chunk.columns:
+            tiene_fecha = True
+            fechas_invalidas += int(df_chunk[COLUMNA_FECHA].isnull().sum())
+            if fechas_invalidas == 0 and COLUMNA_IMPORTE in df_chunk.columns and 'moneda' in df_chunk.columns:
+                for moneda in SERIES_MENSUALES_OC:
+                    acumulados[moneda] = _sumar_mensual(acumulados[moneda], df_chunk, moneda)
+        almacen.agregar(df_chunk)
+        del df_chunk
+
+    df_limpio_oc = almacen.consolidar()
+    if ordenar:
+        df_limpio_oc = ordenar_por_fecha(df_limpio_oc)
+    if reporte.get('importes_rechazados'):
+        print(f"[OC] ¡Atención! {reporte['importes_rechazados']} importes no pudieron interpretarse y quedaron como NaN.")
+    if reporte.get('fechas_invalidas'):
+        print(f"[OC] ¡Atención! {reporte['fechas_invalidas']} fechas no respetan el formato día/mes/año y quedaron como NaT.")
+
+    df_oc_pesos_mensual = None
+    df_oc_dolares_mensual = None
+    if tiene_fecha and fechas_invalidas == 0:
+        df_oc_pesos_mensual = _cerrar_serie_mensual(acumulados['Pesos'], SERIES_MENSUALES_OC['Pesos'])
+        df_oc_dolares_mensual = _cerrar_serie_mensual(acumulados['Dólares'], SERIES_MENSUALES_OC['Dólares'])
+
+    return df_limpio_oc, df_oc_pesos_mensual, df_oc_dolares_mensual
+
+
+# --- Lector de Transferencias Recibidas ---
+COLUMNAS_TRANSFERENCIAS = ['desembolso', 'fecha', 'importe']
+
+def leer_transferencias(ruta_archivo_transferencias_csv, motor=MOTOR_CSV_POR_DEFECTO):
+    _validar_motor_csv(motor)
+    if motor == 'arrow':
+        tabla = leer_tabla_csv_arrow(ruta_archivo_transferencias_csv, ',', ESQUEMA_CSV_TRANSFERENCIAS)
+        df_transferencias = tabla.to_pandas(types_mapper=tipo_pandas_arrow)
+        del tabla
+    else:
+        df_transferencias = pd.read_csv(ruta_archivo_transferencias_csv, encoding='latin1', dtype=str)
+
+    df_transferencias.columns = normalizar_nombres_columnas(df_transferencias.columns)
+    if len(df_transferencias.columns) != len(COLUMNAS_TRANSFERENCIAS):
+        raise ValueError(f"Se esperaban {len(COLUMNAS_TRANSFERENCIAS)} columnas en transferencias, se encontraron {len(df_transferencias.columns)}.")
+    df_transferencias.columns = COLUMNAS_TRANSFERENCIAS
+
+    reporte = {}
+    with medir_fase('limpieza'):
+        df_transferencias[COLUMNA_IMPORTE] = limpiar_importe(df_transferencias[COLUMNA_IMPORTE], reporte)
+        df_transferencias[COLUMNA_FECHA] = convertir_fecha(df_transferencias[COLUMNA_FECHA], reporte)
+        df_transferencias['desembolso'] = df_transferencias['desembolso'].str.strip()
+    if reporte['importes_rechazados']:
+        print(f"[TR] ¡Atención! {reporte['importes_rechazados']} importes no pudieron interpretarse y quedaron como NaN.")
+    if reporte['fechas_invalidas']:
+        print(f"[TR] ¡Atención! {reporte['fechas_invalidas']} fechas no respetan el formato día/mes/año y quedaron como NaT.")
+
+    df_transferencias = ordenar_por_fecha(df_transferencias)
+
+    df_transf_mensual = None
+    if df_transferencias[COLUMNA_FECHA].notnull().all() and pd.api.types.is_numeric_dtype(df_transferencias[COLUMNA_IMPORTE]):
+        df_transf_mensual = df_transferencias.set_index(COLUMNA_FECHA)[COLUMNA_IMPORTE].resample('ME').sum()
+        df_transf_mensual.name = 'ingreso_transferencias'
+
+    return df_transferencias, df_transf_mensual
+
+def actualizar_serie_mensual_tr(series, df_nuevas):
+    # Modo anexado de transferencias: misma idea que actualizar_series_mensuales_oc.
+    acumulado = series[0] if series else None
+    df_nuevas = df_nuevas[df_nuevas[COLUMNA_FECHA].notnull()]
+    if not df_nuevas.empty:
+        parcial = df_nuevas.set_index(COLUMNA_FECHA)[COLUMNA_IMPORTE].resample('ME').sum()
+        acumulado = parcial if acumulado is None else acumulado.add(parcial, fill_value=0)
+    return (_cerrar_serie_mensual(acumulado, 'ingreso_transferencias'),)
+
+
+# --- Carga de Varios Archivos en Paralelo ---
+# Los datasets pueden venir partidos en varias exportaciones (un archivo por mes o por año). Cada archivo
+# se limpia en un proceso aparte (un archivo por proceso) y el resultado lleva la columna archivo_origen
+# con el nombre del archivo del que salió cada fila. Así la carga de varios años tarda más o menos lo que
+# el archivo más grande, no la suma de todos.
+COLUMNA_ORIGEN = 'archivo_origen'
+
+def expandir_rutas(patron):
+    # Un archivo, un directorio (todos sus .csv) o un patrón glob; en orden alfabético.
+    if os.path.isdir(patron):
+        return sorted(glob.glob(os.path.join(patron, '*.csv')))
+    if any(c in patron for c in '*?['):
+        return sorted(glob.glob(patron))
+    return [patron]
+
+def agregar_origen(df, ruta_archivo):
+    # Categórica de un solo valor: un byte por fila, y se unifica con las de otros archivos al consolidar.
+    df[COLUMNA_ORIGEN] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), [os.path.basename(ruta_archivo)])
+    return df
+
+def leer_ordenes_compra_con_origen(ruta_archivo_oc, tamano_chunk=TAMANO_CHUNK_OC, motor=MOTOR_CSV_POR_DEFECTO):
+    df_limpio_oc, _, _ = leer_ordenes_compra_por_chunks(ruta_archivo_oc, tamano_chunk, motor)
+    return agregar_origen(df_limpio_oc, ruta_archivo_oc)
+
+def leer_transferencias_con_origen(ruta_archivo_transferencias_csv, motor=MOTOR_CSV_POR_DEFECTO):
+    df_transferencias, _ = leer_transferencias(ruta_archivo_transferencias_csv, motor)
+    return agregar_origen(df_transferencias, ruta_archivo_transferencias_csv)
+
+def mapear_en_paralelo(funcion, rutas, max_procesos=None):
+    # Igual que list(map(funcion, rutas)), con un proceso por archivo. funcion tiene que poder
+    # serializarse (función de módulo o functools.partial). Con un solo archivo, o dentro del .exe de
+    # PyInstaller (donde lanzar procesos hijos no es confiable), se lee en el mismo proceso.
+    rutas = list(rutas)
+    if len(rutas) < 2 or getattr(sys, 'frozen', False):
+        return [funcion(ruta) for ruta in rutas]
+    procesos = min(len(rutas), max_procesos or os.cpu_count() or 1)
+    try:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            return list(pool.map(funcion, rutas))
+    except (BrokenProcessPool, OSError) as e:
+        print(f"[CARGA] No se pudo usar el pool de procesos, se leen los archivos en secuencia: {e}")
+        return [funcion(ruta) for ruta in rutas]
@@ -0,0 +1,252 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# --- Constantes Compartidas de Limpieza ---
+COLUMNA_IMPORTE = 'importe'
+COLUMNA_FECHA = 'fecha'
+COLUMNA_DESCRIPCION_PRODUCTO = 'descripcion_producto'
+COLUMNA_PROVEEDOR = 'proveedor'
+COLUMNA_PROVEEDOR_CLAVE = 'proveedor_clave'
+COLUMNAS_CATEGORICAS_OC = ['moneda', 'gerencia', 'tipocompra']
+# Columnas de baja cardinalidad que se guardan codificadas como diccionario (dtype 'category').
+COLUMNAS_DICCIONARIO_OC = ['moneda', 'gerencia', 'proveedor', 'tipocompra']
+PLACEHOLDER_FALTANTE_OC = "No Especificado"
+
+
+# --- Funciones de Limpieza por Columna ---
+def normalizar_nombres_columnas(columnas):
+    return pd.Index(columnas).str.strip().str.lower().str.replace(' ', '_', regex=False)
+
+def limpiar_importe(serie, reporte=None):
+    importes, rechazados = parsear_importes(serie)
+    if reporte is not None:
+        reporte['importes_rechazados'] = reporte.get('importes_rechazados', 0) + int(rechazados.sum())
+    return importes
+
+# Las exportaciones usan siempre día/mes/año sin ceros a la izquierda (p.ej. "8/11/2021").
+FORMATO_FECHA = '%d/%m/%Y'
+
+def limpiar_categoria(serie, placeholder=PLACEHOLDER_FALTANTE_OC):
+    # Igual que serie.astype(str).str.strip() con nulos, 'nan' y vacíos -> placeholder, pero limpiando
+    # cada valor distinto una sola vez: el resultado ya es una 'category' armada desde los códigos.
+    codigos, unicos = pd.factorize(serie)
+    limpios = pd.Index(unicos.to_numpy(dtype=object), dtype=object).astype(str).str.strip()
+    limpios = limpios.where(~limpios.isin(['nan', '']), placeholder)
+    limpios = limpios.to_numpy(dtype=object)
+    if (codigos < 0).any():
+        # El código -1 (nulo) toma el último elemento: el placeholder agregado al final.
+        limpios = np.append(limpios, placeholder)
+    codigos_limpios, categorias = pd.factorize(limpios)
+    resultado = pd.Categorical.from_codes(codigos_limpios[codigos], categorias)
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+def convertir_fecha(serie, reporte=None, formato=FORMATO_FECHA):
+    # Cada fecha distinta se parsea una sola vez con formato explícito (sin inferencia, igual en todos
+    # los bloques) y el resultado se reparte a las filas por código; los nulos quedan como NaT.
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    codigos, unicos = pd.factorize(serie)
+    fechas_unicas = pd.to_datetime(unicos.astype(str).str.strip(), format=formato, errors='coerce')
+    fechas = fechas_unicas.take(codigos, allow_fill=True, fill_value=pd.NaT)
+    if reporte is not None:
+        invalidas = int(fechas_unicas.isna()[codigos[codigos >= 0]].sum())
+        reporte['fechas_invalidas'] = reporte.get('fechas_invalidas', 0) + invalidas
+    return pd.Series(fechas, index=serie.index, name=serie.name)
+
+
+def plegar_texto(texto):
+    # Mayúsculas sin tildes, diéresis ni eñes: "Señalización Óptica" -> "SENALIZACION OPTICA".
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii').upper()
+
+
+# --- Clave Canónica de Proveedor ---
+# Agrupa las variantes de un mismo proveedor ("PUSSETTO SALTA SA", "Pussetto Salta S.A.") bajo una sola clave:
+# mayúsculas sin tildes, sin puntuación ni aclaraciones entre paréntesis y sin el tipo societario final.
+# Las iniciales sueltas se juntan ("S. A." -> SA) y los sufijos se quitan de a uno desde el final
+# ("PEREZ Y CIA S.R.L." -> PEREZ); si el nombre es sólo un sufijo, se deja como está.
+# De más largo a más corto, para que "Y CIA" se quite entero antes que "CIA".
+SUFIJOS_SOCIETARIOS = sorted((tuple(sufijo.split()) for sufijo in [
+    'SA', 'SAU', 'SAS', 'SRL', 'SAPEM', 'SAIC', 'SACI', 'SACIF', 'SAICF', 'SACIFI', 'SACIFIA', 'SAICYF', 'SE', 'SL', 'SCA', 'SH',
+    'LTDA', 'LIMITADA', 'LTD', 'LIMITED', 'LLC', 'INC', 'CORP', 'CORPORATION', 'GMBH', 'CIA', 'Y CIA',
+    'SOCIEDAD ANONIMA', 'SOCIEDAD ANONIMA UNIPERSONAL', 'SOCIEDAD DE RESPONSABILIDAD LIMITADA', 'SOCIEDAD DEL ESTADO',
+    'SOCIEDAD POR ACCIONES SIMPLIFICADA',
+]), key=len, reverse=True)
+_PATRON_PARENTESIS = re.compile(r'\([^)]*\)')
+_PATRON_INICIAL_CON_PUNTO = re.compile(r'\b([A-Z])\.')
+_PATRON_PALABRA = re.compile(r'[A-Z0-9]+')
+
+def clave_proveedor(nombre):
+    texto = _PATRON_INICIAL_CON_PUNTO.sub(r'\1 ', _PATRON_PARENTESIS.sub(' ', plegar_texto(nombre)))
+    palabras = []
+    en_iniciales = False
+    for palabra in _PATRON_PALABRA.findall(texto):
+        # Junta las iniciales consecutivas: "S A" -> "SA", "S R L" -> "SRL".
+        inicial = len(palabra) == 1 and palabra.isalpha()
+        if inicial and en_iniciales:
+            palabras[-1] += palabra
+        else:
+            palabras.append(palabra)
+        en_iniciales = inicial
+    recortada = True
+    while recortada:
+        recortada = False
+        for sufijo in SUFIJOS_SOCIETARIOS:
+            if len(palabras) > len(sufijo) and tuple(palabras[-len(sufijo):]) == sufijo:
+                palabras = palabras[:-len(sufijo)]
+                recortada = True
+                break
+    return ' '.join(palabras) if palabras else plegar_texto(nombre).strip()
+
+def claves_proveedor(serie):
+    # Una clave por nombre distinto (sobre las categorías), repartida a las filas por código; nulos quedan nulos.
+    serie = codificar_categorica(serie)
+    claves = [clave_proveedor(str(nombre)) for nombre in serie.cat.categories]
+    codigos_clave, categorias = pd.factorize(pd.Series(claves, dtype=object))
+    codigos = serie.cat.codes.to_numpy()
+    codigos = np.where(codigos >= 0, codigos_clave[codigos] if len(codigos_clave) else -1, -1)
+    return codificar_categorica(pd.Series(pd.Categorical.from_codes(codigos, categorias), index=serie.index, name=COLUMNA_PROVEEDOR_CLAVE))
+
+
+# --- Parser Vectorizado de Importes en Formato Argentino ---
+# Convierte textos como "$ 585.634.700,00" en centavos int64 exactos en una sola pasada, sin crear
+# columnas intermedias de texto: los textos se ven como una matriz de códigos de carácter y se recorren
+# columna por columna (método de Horner), vectorizando sobre todas las filas a la vez.
+# Se ignoran '$', comillas, espacios y los puntos de miles; la coma es el separador decimal.
+LARGO_MAXIMO_IMPORTE = 32
+FILAS_POR_BLOQUE_IMPORTE = 250_000
+_MAX_DIGITOS_INT64 = 18
+_MAX_CENTAVOS = np.iinfo(np.int64).max
+# Clase de cada código de carácter (latin1): 0 = inválido, 1 = dígito, 2 = coma, 3 = punto, 4 = signo menos, 5 = ignorado.
+_CLASE_CARACTER = np.zeros(256, dtype=np.uint8)
+_CLASE_CARACTER[ord('0'):ord('9') + 1] = 1
+_CLASE_CARACTER[ord(',')] = 2
+_CLASE_CARACTER[ord('.')] = 3
+_CLASE_CARACTER[ord('-')] = 4
+_CLASE_CARACTER[[0] + [ord(c) for c in '$" \t\xa0']] = 5
+# Para los dígitos: valor = valor * 10 + dígito; para el resto de los caracteres el valor no cambia.
+_MULTIPLICADOR = np.where(_CLASE_CARACTER == 1, 10, 1).astype(np.int64)
+_VALOR_DIGITO = np.zeros(256, dtype=np.int64)
+_VALOR_DIGITO[ord('0'):ord('9') + 1] = np.arange(10)
+
+def _parsear_bloque_centavos(textos):
+    codigos = np.asarray(textos, dtype='U')
+    ancho = codigos.dtype.itemsize // 4
+    n = len(textos)
+    if ancho == 0:
+        return np.zeros(n, dtype=np.int64), np.ones(n, dtype=bool)
+    if ancho > LARGO_MAXIMO_IMPORTE:
+        # Caso raro: un texto muy largo ensancharía toda la matriz; se rechaza antes de armarla.
+        largos = np.char.str_len(codigos)
+        codigos = np.where(largos > LARGO_MAXIMO_IMPORTE, '', codigos).astype(f'U{LARGO_MAXIMO_IMPORTE}')
+        centavos, invalido = _parsear_bloque_centavos(codigos)
+        return centavos, invalido | (largos > LARGO_MAXIMO_IMPORTE)
+
+    columnas = np.ascontiguousarray(codigos.view(np.uint32).reshape(n, ancho).T)
+    valor = np.zeros(n, dtype=np.int64)
+    n_digitos = np.zeros(n, dtype=np.uint8)
+    n_decimales = np.zeros(n, dtype=np.uint8)
+    n_comas = np.zeros(n, dtype=np.uint8)
+    n_menos = np.zeros(n, dtype=np.uint8)
+    invalido = np.zeros(n, dtype=bool)
+
+    for c in columnas:
+        # mode='clip' manda los códigos > 255 a la última entrada ('ÿ'), que es inválida.
+        clase = _CLASE_CARACTER.take(c, mode='clip')
+        es_digito = clase == 1
+        hay_coma = n_comas > 0
+
+        valor *= _MULTIPLICADOR.take(c, mode='clip')
+        valor += _VALOR_DIGITO.take(c, mode='clip')
+        n_digitos += es_digito
+        n_decimales += es_digito & hay_coma
+        n_comas += clase == 2
+        n_menos += clase == 4
+        invalido |= (clase == 0) | ((clase == 3) & hay_coma)
+
+    escala = np.where(n_decimales == 0, 100, np.where(n_decimales == 1, 10, 1))
+    # Hasta 18 dígitos el valor entra en int64, pero pasado a centavos podría desbordar: esos se rechazan.
+    invalido |= (n_digitos == 0) | (n_digitos > _MAX_DIGITOS_INT64) | (n_comas > 1) | (n_decimales > 2) | (n_menos > 1)
+    invalido |= valor > _MAX_CENTAVOS // escala
+    centavos = valor * escala
+    centavos = np.where(n_menos > 0, -centavos, centavos)
+    centavos[invalido] = 0
+    return centavos, invalido
+
+def _parsear_centavos(serie):
+    n = len(serie)
+    nulos = serie.isna().to_numpy()
+    textos = np.where(nulos, '', serie.to_numpy(dtype=object))
+    centavos = np.zeros(n, dtype=np.int64)
+    rechazados = np.zeros(n, dtype=bool)
+    for inicio in range(0, n, FILAS_POR_BLOQUE_IMPORTE):
+        fin = min(inicio + FILAS_POR_BLOQUE_IMPORTE, n)
+        centavos[inicio:fin], rechazados[inicio:fin] = _parsear_bloque_centavos(textos[inicio:fin])
+    rechazados &= ~nulos
+    return centavos, nulos | rechazados, rechazados
+
+def parsear_importes_centavos(serie):
+    # Devuelve (centavos Int64 con <NA> en nulos y rechazados, máscara booleana de filas rechazadas).
+    centavos, faltantes, rechazados = _parsear_centavos(serie)
+    resultado = pd.arrays.IntegerArray(centavos, faltantes)
+    return pd.Series(resultado, index=serie.index, name=serie.name), pd.Series(rechazados, index=serie.index, name=serie.name)
+
+def parsear_importes(serie):
+    # Igual que parsear_importes_centavos, pero en float64 (NaN en nulos y rechazados).
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype('float64'), pd.Series(False, index=serie.index, name=serie.name)
+    centavos, faltantes, rechazados = _parsear_centavos(serie)
+    importes = centavos / 100
+    importes[faltantes] = np.nan
+    return pd.Series(importes, index=serie.index, name=serie.name), pd.Series(rechazados, index=serie.index, name=serie.name)
+
+
+# --- Codificación por Diccionario (dtype 'category') ---
+# Las categorías se mantienen siempre ordenadas alfabéticamente: así el código de cada valor
+# no depende del orden en que aparecieron los bloques ni de cómo se guardó la caché.
+def codificar_categorica(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        return serie if categorias.is_monotonic_increasing else serie.cat.reorder_categories(categorias.sort_values())
+    serie = serie.astype('category')
+    categorias = serie.cat.categories
+    if categorias.dtype != object:
+        # Textos string[pyarrow] (motor 'arrow'): categorías object, igual que con pd.read_csv, para que
+        # los bloques y las partes leídas con cualquiera de los dos motores se puedan unir.
+        categorias = categorias.astype(object)
+        serie = serie.cat.rename_categories(categorias)
+    return serie.cat.reorder_categories(categorias.sort_values())
+
+def unir_categoricas(bloques):
+    unidas = pd.api.types.union_categoricals(bloques, sort_categories=True, ignore_order=True)
+    return pd.Series(unidas, name=bloques[0].name)
+
+
+# --- Limpieza de un Bloque (chunk) de Órdenes de Compra ---
+def limpiar_chunk_oc(df, reporte=None):
+    # Limpia el bloque en el lugar: el bloque crudo lo descarta el llamador, no hace falta copiarlo.
+    df.columns = normalizar_nombres_columnas(df.columns)
+
+    if COLUMNA_IMPORTE in df.columns:
+        df[COLUMNA_IMPORTE] = limpiar_importe(df[COLUMNA_IMPORTE], reporte)
+
+    if COLUMNA_DESCRIPCION_PRODUCTO in df.columns and df[COLUMNA_DESCRIPCION_PRODUCTO].isnull().any():
+        df[COLUMNA_DESCRIPCION_PRODUCTO] = df[COLUMNA_DESCRIPCION_PRODUCTO].fillna('SIN DESCRIPCION')
+
+    for col_cat in COLUMNAS_CATEGORICAS_OC:
+        if col_cat in df.columns:
+            df[col_cat] = limpiar_categoria(df[col_cat])
+
+    if COLUMNA_FECHA in df.columns:
+        df[COLUMNA_FECHA] = convertir_fecha(df[COLUMNA_FECHA], reporte)
+
+    for col_dic in COLUMNAS_DICCIONARIO_OC:
+        if col_dic in df.columns:
+            df[col_dic] = codificar_categorica(df[col_dic])
+
+    if COLUMNA_PROVEEDOR in df.columns:
+        df[COLUMNA_PROVEEDOR_CLAVE] = claves_proveedor(df[COLUMNA_PROVEEDOR])
+
+    return df
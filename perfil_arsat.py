@@ -0,0 +1,32 @@
+import os
+import time
+from contextlib import contextmanager
+
+# --- Perfil de Arranque ---
+# Acumula el tiempo de las fases que ocurren dentro de otros módulos (p.ej. la limpieza, que corre dentro
+# de los lectores) para que el dashboard pueda desglosar su arranque. Con ARSAT_PERFIL_ARRANQUE=1 el
+# dashboard imprime el desglose en la consola la primera vez que se ejecuta. El tiempo de los archivos
+# limpiados en procesos aparte (ingesta_arsat.mapear_en_paralelo) queda dentro de la fase de carga.
+PERFIL_ACTIVO = os.environ.get('ARSAT_PERFIL_ARRANQUE', '') not in ('', '0')
+_segundos_por_fase = {}
+
+
+@contextmanager
+def medir_fase(nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _segundos_por_fase[nombre] = _segundos_por_fase.get(nombre, 0.0) + time.perf_counter() - inicio
+
+def segundos_fase(nombre):
+    # Acumulado desde que arrancó el proceso: para una sola ejecución, restar el valor tomado antes.
+    return _segundos_por_fase.get(nombre, 0.0)
+
+def imprimir_perfil(fases, etiqueta='ARRANQUE'):
+    # fases: dict ordenado {nombre: segundos}.
+    total = sum(fases.values())
+    print(f">>> [{etiqueta}] Desglose del arranque ({total:.2f} s):")
+    for nombre, segundos in fases.items():
+        porcentaje = 100 * segundos / total if total else 0.0
+        print(f"    {nombre:<32} {segundos:8.3f} s {porcentaje:6.1f} %")
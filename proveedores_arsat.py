@@ -0,0 +1,89 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from limpieza_arsat import COLUMNA_PROVEEDOR, COLUMNA_PROVEEDOR_CLAVE
+
+# --- Configuración del Índice de Similitud ---
+# MinHash con PERMUTACIONES_MINHASH funciones de hash repartidas en BANDAS_MINHASH bandas: dos claves quedan
+# como candidatas si coinciden en todas las filas de alguna banda. Con 8 bandas de 4 filas, un par con
+# similitud de Jaccard 0.7 cae en el mismo balde con probabilidad ~0.89 y uno con 0.8, ~0.98.
+LARGO_SHINGLE = 3
+PERMUTACIONES_MINHASH = 32
+BANDAS_MINHASH = 8
+UMBRAL_SIMILITUD = 0.7
+# Baldes más grandes que esto son prefijos o palabras genéricas ("SERVICIOS ..."), no variantes: se saltean.
+MAXIMO_BALDE = 50
+SEMILLA_MINHASH = 20240501
+
+
+def shingles(clave):
+    # Trigramas de caracteres, con un espacio a cada lado para que los comienzos y finales también cuenten.
+    texto = f" {clave} "
+    return {texto[i:i + LARGO_SHINGLE] for i in range(max(len(texto) - LARGO_SHINGLE + 1, 1))}
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def _firmas_minhash(conjuntos):
+    # Una fila de PERMUTACIONES_MINHASH mínimos por conjunto. Cada permutación es un hash multiplicativo
+    # (a * x + b) sobre 64 bits, quedándose con la mitad alta; x es el crc32 del trigrama.
+    largos = np.array([len(conjunto) for conjunto in conjuntos], dtype=np.int64)
+    valores = np.array([zlib.crc32(s.encode()) for conjunto in conjuntos for s in conjunto], dtype=np.uint64)
+    inicios = np.concatenate([np.zeros(1, dtype=np.int64), np.cumsum(largos)[:-1]])
+    generador = np.random.default_rng(SEMILLA_MINHASH)
+    multiplicadores = generador.integers(1, 2 ** 63, PERMUTACIONES_MINHASH, dtype=np.uint64) | np.uint64(1)
+    sumandos = generador.integers(0, 2 ** 63, PERMUTACIONES_MINHASH, dtype=np.uint64)
+    firmas = np.empty((len(conjuntos), PERMUTACIONES_MINHASH), dtype=np.uint64)
+    for k in range(PERMUTACIONES_MINHASH):
+        permutados = (valores * multiplicadores[k] + sumandos[k]) >> np.uint64(32)
+        firmas[:, k] = np.minimum.reduceat(permutados, inicios)
+    return firmas
+
+def _pares_candidatos(firmas):
+    filas_por_banda = PERMUTACIONES_MINHASH // BANDAS_MINHASH
+    pares = set()
+    for banda in range(BANDAS_MINHASH):
+        _, baldes = np.unique(firmas[:, banda * filas_por_banda:(banda + 1) * filas_por_banda], axis=0, return_inverse=True)
+        baldes = baldes.ravel()
+        orden = np.argsort(baldes, kind='stable')
+        limites = np.flatnonzero(np.diff(baldes[orden])) + 1
+        for miembros in np.split(orden, limites):
+            if 2 <= len(miembros) <= MAXIMO_BALDE:
+                pares.update((int(a), int(b)) for i, a in enumerate(miembros) for b in miembros[i + 1:])
+    return pares
+
+
+# --- Posibles Proveedores Duplicados ---
+# Las variantes de puntuación, tildes y tipo societario ya comparten clave (limpieza_arsat.clave_proveedor);
+# esto busca las que la clave no alcanza a unir: errores de tipeo, palabras de más ("GRUPO ...") o
+# abreviaturas. En vez de comparar todos los pares de claves (O(n²)), las firmas MinHash de sus trigramas
+# se agrupan en baldes por banda y sólo se verifica, con la similitud de Jaccard exacta, cada par que
+# compartió algún balde.
+def posibles_duplicados(claves, umbral=UMBRAL_SIMILITUD):
+    claves = pd.Series(pd.unique(pd.Series(claves, dtype=object).dropna().astype(str)), dtype=object)
+    columnas = ['clave_a', 'clave_b', 'similitud']
+    if len(claves) < 2:
+        return pd.DataFrame(columns=columnas)
+    conjuntos = [shingles(clave) for clave in claves]
+    filas = []
+    for a, b in _pares_candidatos(_firmas_minhash(conjuntos)):
+        similitud = jaccard(conjuntos[a], conjuntos[b])
+        if similitud >= umbral:
+            filas.append((*sorted((claves[a], claves[b])), similitud))
+    return pd.DataFrame(filas, columns=columnas).sort_values(['similitud', 'clave_a', 'clave_b'], ascending=[False, True, True], ignore_index=True)
+
+def duplicados_proveedores(df_oc, umbral=UMBRAL_SIMILITUD):
+    # Pares de claves de proveedor parecidas, con la cantidad de órdenes de cada una.
+    ordenes = df_oc[COLUMNA_PROVEEDOR_CLAVE].value_counts()
+    pares = posibles_duplicados(ordenes.index, umbral)
+    pares['ordenes_a'] = ordenes.reindex(pares['clave_a']).to_numpy(dtype=np.int64)
+    pares['ordenes_b'] = ordenes.reindex(pares['clave_b']).to_numpy(dtype=np.int64)
+    return pares
+
+def variantes_por_clave(df_oc):
+    # Nombres distintos que quedaron bajo cada clave, sólo para las claves que unieron más de uno.
+    nombres = df_oc[[COLUMNA_PROVEEDOR_CLAVE, COLUMNA_PROVEEDOR]].drop_duplicates().dropna()
+    variantes = nombres.groupby(COLUMNA_PROVEEDOR_CLAVE, observed=True)[COLUMNA_PROVEEDOR].agg(lambda s: sorted(map(str, s)))
+    return variantes[variantes.map(len) > 1].rename('variantes').reset_index()
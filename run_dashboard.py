@@ -1,9 +1,24 @@
 # run_dashboard.py
+import json
+import socket
 import subprocess
 import sys
 import os
+import tempfile
+import urllib.request
 import webbrowser
 import time
+from datetime import datetime
+
+# --- Arranque del Servidor ---
+PUERTO_PREFERIDO = 8501
+PUERTOS_A_PROBAR = 20
+INTENTOS_LANZAMIENTO = 3
+# Streamlit >= 1.18 responde en /_stcore/health; las versiones anteriores, en /healthz.
+RUTAS_SALUD = ["/_stcore/health", "/healthz"]
+ESPERA_INICIAL_SALUD = 0.05
+ESPERA_MAXIMA_SALUD = 1.0
+TIMEOUT_SERVIDOR = 120
 
 def get_path(filename_in_bundle):
     if hasattr(sys, "_MEIPASS"):
@@ -11,6 +26,56 @@ def get_path(filename_in_bundle):
     base_path = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_path, filename_in_bundle)
 
+def puerto_disponible(puerto):
+    # Devuelve el puerto (el que elija el sistema si es 0) o None si está ocupado. Se prueba en todas las
+    # interfaces, que es donde escucha Streamlit si no se le pasa --server.address.
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(("", puerto))
+        except OSError:
+            return None
+        return s.getsockname()[1]
+
+def puerto_libre(preferido=PUERTO_PREFERIDO, intentos=PUERTOS_A_PROBAR):
+    # El primer puerto libre a partir del preferido; si están todos ocupados, uno que elija el sistema.
+    for puerto in list(range(preferido, preferido + intentos)) + [0]:
+        libre = puerto_disponible(puerto)
+        if libre is not None:
+            return libre
+    raise OSError("No hay puertos libres para el servidor de Streamlit.")
+
+def servidor_listo(puerto):
+    for ruta in RUTAS_SALUD:
+        try:
+            with urllib.request.urlopen(f"http://localhost:{puerto}{ruta}", timeout=1) as respuesta:
+                if respuesta.status == 200:
+                    return True
+        except OSError:
+            continue
+    return False
+
+def esperar_servidor(process, puerto, timeout=TIMEOUT_SERVIDOR):
+    # Consulta el endpoint de salud con espera creciente (50 ms, 75 ms, ... hasta 1 s entre intentos).
+    # Devuelve True en cuanto responde, False si el proceso terminó o se agotó el tiempo.
+    limite = time.perf_counter() + timeout
+    espera = ESPERA_INICIAL_SALUD
+    while time.perf_counter() < limite:
+        if process.poll() is not None:
+            return False
+        if servidor_listo(puerto):
+            return True
+        time.sleep(espera)
+        espera = min(espera * 1.5, ESPERA_MAXIMA_SALUD)
+    return False
+
+def escribir_tiempos_lanzador(ruta_tiempos, tiempos):
+    try:
+        with open(ruta_tiempos + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(tiempos, f, ensure_ascii=False)
+        os.replace(ruta_tiempos + '.tmp', ruta_tiempos)
+    except OSError as e:
+        print(f"No se pudieron guardar los tiempos del lanzador: {e}")
+
 if __name__ == "__main__":
     dashboard_script_name = "dashboard_arsat.py"
     dashboard_script_path = get_path(dashboard_script_name)
@@ -38,19 +103,20 @@ if __name__ == "__main__":
         # En desarrollo, sys.executable es el python.exe correcto.
         python_executable_for_streamlit = sys.executable
         
+    # servidor_arsat.py arranca Streamlit y precalienta los datos en el mismo proceso; si no está, "streamlit run".
+    servidor_script_path = get_path("servidor_arsat.py")
+    lanzador_streamlit = [servidor_script_path] if os.path.exists(servidor_script_path) else ["-m", "streamlit", "run"]
     cmd = [
         python_executable_for_streamlit, # Usar el python determinado
-        "-m", 
-        "streamlit", 
-        "run", 
+        *lanzador_streamlit,
         dashboard_script_path, 
         "--server.headless", "true", 
-        "--server.port", "8501",     
         "--server.fileWatcherType", "none" 
     ]
+    # Los tiempos del lanzador quedan en este archivo; el dashboard les suma los suyos y registra el arranque.
+    ruta_tiempos = os.path.join(tempfile.gettempdir(), f"arsat_tiempos_{os.getpid()}.json")
+    entorno = dict(os.environ, ARSAT_ARCHIVO_TIEMPOS=ruta_tiempos)
 
-    print(f"Ejecutando comando: {' '.join(cmd)}")
-    
     try:
         startupinfo = None
         if os.name == 'nt': 
@@ -59,16 +125,40 @@ if __name__ == "__main__":
             # startupinfo.wShowWindow = subprocess.SW_HIDE # Descomentar para intentar ocultar la consola de Streamlit
 
         # Usar Popen para no bloquear y permitir que el lanzador continúe/termine
-        process = subprocess.Popen(cmd, startupinfo=startupinfo)
-        
-        print("Esperando a que el servidor de Streamlit inicie (aprox. 8 segundos)...")
-        time.sleep(8) 
+        inicio, inicio_lanzamiento = time.perf_counter(), time.time()
+        puerto = puerto_libre()
+        if puerto != PUERTO_PREFERIDO:
+            print(f"El puerto {PUERTO_PREFERIDO} está ocupado, se usa el {puerto}.")
+        for intento in range(INTENTOS_LANZAMIENTO):
+            cmd_puerto = cmd + ["--server.port", str(puerto)]
+            print(f"Ejecutando comando: {' '.join(cmd_puerto)}")
+            process = subprocess.Popen(cmd_puerto, startupinfo=startupinfo, env=entorno)
+            tiempo_lanzamiento = time.perf_counter() - inicio
+
+            print("Esperando a que el servidor de Streamlit responda...")
+            listo = esperar_servidor(process, puerto)
+            tiempo_servidor = time.perf_counter() - inicio
+            # Entre la prueba del puerto y el arranque de Streamlit otro proceso puede haberlo tomado: Streamlit
+            # termina con error y se reintenta en el siguiente puerto libre.
+            if listo or process.poll() is None or puerto_disponible(puerto) is not None or intento == INTENTOS_LANZAMIENTO - 1:
+                break
+            print(f"El puerto {puerto} se ocupó antes de que arrancara Streamlit; se reintenta con otro.")
+            puerto = puerto_libre(puerto + 1)
+        url_dashboard = f"http://localhost:{puerto}"
         
         # Verificar si el proceso sigue corriendo (una verificación simple)
         if process.poll() is None: # None significa que sigue corriendo
-            print("Abriendo el dashboard en el navegador...")
-            webbrowser.open("http://localhost:8501")
-            print("\nEl dashboard debería estar corriendo en tu navegador en http://localhost:8501")
+            if listo:
+                print(f"Servidor listo en {tiempo_servidor:.1f} s. Abriendo el dashboard en el navegador...")
+            else:
+                print(f"El servidor no respondió en {TIMEOUT_SERVIDOR} s; se abre el navegador de todos modos...")
+            # Antes de abrir el navegador: Streamlit corre el dashboard recién cuando se conecta una sesión.
+            escribir_tiempos_lanzador(ruta_tiempos, {
+                'fecha': datetime.now().isoformat(timespec='seconds'), 'puerto': puerto, 'inicio_lanzamiento': inicio_lanzamiento,
+                'lanzamiento_s': round(tiempo_lanzamiento, 3), 'servidor_listo_s': round(tiempo_servidor, 3) if listo else None,
+            })
+            webbrowser.open(url_dashboard)
+            print(f"\nEl dashboard debería estar corriendo en tu navegador en {url_dashboard}")
             print("Esta ventana del lanzador se puede cerrar. Para detener el dashboard, cierra la pestaña del navegador")
             print("y, si es necesario, el proceso 'streamlit' o 'python' desde el Administrador de Tareas.")
         else:
@@ -1,8 +1,18 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from exportacion_arsat import exportar_excel
+from ingesta_arsat import leer_ordenes_compra_por_chunks
+from limpieza_arsat import COLUMNA_PROVEEDOR_CLAVE, convertir_fecha, parsear_importes
+
 # --- Configuración General ---
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 6)
@@ -11,19 +21,41 @@ plt.rcParams['figure.figsize'] = (12, 6)
 # pd.set_option('display.max_rows', None)
 # pd.set_option('display.max_columns', None)
 
-print("--- Script de Análisis ARSAT Iniciado (Nivel Superior) ---")
+NOMBRE_ARCHIVO_OC = 'ARSAT_Finanzas_ordenes_de_compra-2022_marzo_2023.csv'
+NOMBRE_ARCHIVO_TRANSFERENCIAS = 'transferencias-recibidas-2020-v5.csv'
+# Con archivos grandes puede haber miles de importes rechazados: se informa la cantidad y sólo las primeras filas.
+FILAS_RECHAZADAS_A_MOSTRAR = 10
+
+
+# --- Funciones Auxiliares: Gráficos y Tiempos ---
+def finalizar_grafico(nombre_grafico, directorio_salida, guardar_graficos):
+    # En modo batch el gráfico se guarda como PNG (backend Agg, sin ventanas); si no, se muestra como siempre.
+    if guardar_graficos:
+        ruta_grafico = os.path.join(directorio_salida, f"{nombre_grafico}.png")
+        plt.savefig(ruta_grafico, bbox_inches='tight')
+        plt.close()
+        print(f"[GRAF] Gráfico guardado en '{ruta_grafico}'")
+    else:
+        plt.show()
+
+def reportar_fase(etiqueta, fase, inicio):
+    fin = time.perf_counter()
+    print(f"[{etiqueta}] [TIEMPO] {fase}: {fin - inicio:.2f} s")
+    return fin
 
 #*****************************************************************************************************************
 #********************************** FUNCIÓN PARA PROCESAR ÓRDENES DE COMPRA *************************************
 #*****************************************************************************************************************
-def procesar_y_analizar_ordenes_compra(ruta_archivo_oc):
+def procesar_y_analizar_ordenes_compra(ruta_archivo_oc, directorio_salida='.', guardar_graficos=False, errores=None):
     print("\n>>> [OC] Iniciando Procesamiento de Órdenes de Compra...")
+    inicio_fase = time.perf_counter()
     # ... (El contenido de esta función es el mismo que me pasaste, está bien) ...
-    # --- Fase 1: Carga de Datos OC ---
+    # --- Fase 1 y 2: Carga por Bloques y Limpieza de Datos OC ---
     print(f"[OC] Intentando cargar el archivo de OC desde: {ruta_archivo_oc}")
     try:
-        df = pd.read_csv(ruta_archivo_oc, encoding='latin1', delimiter=';')
-        print("[OC] Archivo de OC cargado exitosamente!")
+        # En el orden del archivo: el Excel formateado conserva el orden de las filas de origen.
+        df_limpio_oc, df_oc_pesos_mensual, _ = leer_ordenes_compra_por_chunks(ruta_archivo_oc, ordenar=False)
+        print("[OC] Archivo de OC cargado y limpiado por bloques exitosamente!")
     except FileNotFoundError:
         print(f"[OC] Error: No se encontró el archivo de OC en la ruta especificada: {ruta_archivo_oc}")
         return None, None
@@ -31,14 +63,6 @@ def procesar_y_analizar_ordenes_compra(ruta_archivo_oc):
         print(f"[OC] Ocurrió un error al cargar el archivo de OC: {e}")
         return None, None
 
-    print("\n[OC] DataFrame original de OC cargado:")
-    df.info()
-    print("-" * 50)
-
-    # --- Fase 2: Limpieza y Preprocesamiento de Datos OC ---
-    print("\n[OC] Iniciando Limpieza de Datos de OC...")
-    df_limpio_oc = df.copy()
-    
     columnas_totalmente_vacias = df_limpio_oc.columns[df_limpio_oc.isnull().all()].tolist()
     if columnas_totalmente_vacias:
         df_limpio_oc = df_limpio_oc.drop(columns=columnas_totalmente_vacias)
@@ -46,36 +70,14 @@ def procesar_y_analizar_ordenes_compra(ruta_archivo_oc):
     else:
         print("[OC] No se encontraron columnas OC completamente vacías para eliminar.")
 
-    print("\n[OC] Nombres de columnas OC originales:", df_limpio_oc.columns.tolist())
-    df_limpio_oc.columns = df_limpio_oc.columns.str.strip().str.lower().str.replace(' ', '_', regex=False)
     print("[OC] Nombres de columnas OC limpiados:", df_limpio_oc.columns.tolist())
 
     columna_importe_oc = 'importe'
     columna_fecha_oc = 'fecha'
-    columna_descripcion_producto_oc = 'descripcion_producto'
 
     if columna_importe_oc in df_limpio_oc.columns:
-        print(f"[OC] Limpiando la columna OC '{columna_importe_oc}'...")
-        df_limpio_oc[columna_importe_oc] = df_limpio_oc[columna_importe_oc].astype(str)
-        df_limpio_oc[columna_importe_oc] = df_limpio_oc[columna_importe_oc].str.replace('$', '', regex=False).str.strip()
-        df_limpio_oc[columna_importe_oc] = df_limpio_oc[columna_importe_oc].str.replace('.', '', regex=False)
-        df_limpio_oc[columna_importe_oc] = df_limpio_oc[columna_importe_oc].str.replace(',', '.', regex=False)
-        df_limpio_oc[columna_importe_oc] = pd.to_numeric(df_limpio_oc[columna_importe_oc], errors='coerce')
         print(f"[OC] Tipo de dato de '{columna_importe_oc}' ahora: {df_limpio_oc[columna_importe_oc].dtype}")
-
-    if columna_descripcion_producto_oc in df_limpio_oc.columns and df_limpio_oc[columna_descripcion_producto_oc].isnull().any():
-        df_limpio_oc[columna_descripcion_producto_oc] = df_limpio_oc[columna_descripcion_producto_oc].fillna('SIN DESCRIPCION')
-        print(f"[OC] Valores faltantes en '{columna_descripcion_producto_oc}' rellenados.")
-
-    columnas_categoricas_oc = ['moneda', 'gerencia', 'tipocompra']
-    placeholder_faltante_oc = "No Especificado"
-    for col_cat in columnas_categoricas_oc:
-        if col_cat in df_limpio_oc.columns:
-            df_limpio_oc[col_cat] = df_limpio_oc[col_cat].astype(str).str.strip().replace(['nan', ''], placeholder_faltante_oc)
-    
     if columna_fecha_oc in df_limpio_oc.columns:
-        print(f"[OC] Asegurando que la columna OC '{columna_fecha_oc}' es de tipo datetime...")
-        df_limpio_oc[columna_fecha_oc] = pd.to_datetime(df_limpio_oc[columna_fecha_oc], dayfirst=True, errors='coerce')
         if df_limpio_oc[columna_fecha_oc].isnull().sum() == 0:
              print(f"[OC] Columna OC '{columna_fecha_oc}' convertida a datetime exitosamente.")
         else:
@@ -83,6 +85,7 @@ def procesar_y_analizar_ordenes_compra(ruta_archivo_oc):
     
     print("\n[OC] Fin de Limpieza de Datos de OC.")
     df_limpio_oc.info()
+    inicio_fase = reportar_fase('OC', 'Carga y limpieza', inicio_fase)
 
     # --- Fase 3: EDA para Órdenes de Compra ---
     print("\n\n[OC] Iniciando EDA para Órdenes de Compra...")
@@ -90,54 +93,33 @@ def procesar_y_analizar_ordenes_compra(ruta_archivo_oc):
         plt.figure()
         sns.histplot(df_limpio_oc[columna_importe_oc], kde=True, bins=50)
         plt.title('Distribución de Importes (Órdenes de Compra)')
-        plt.show() 
+        finalizar_grafico('oc_distribucion_importes', directorio_salida, guardar_graficos)
         print(f"\n[OC] Descripción estadística de '{columna_importe_oc}':")
         print(df_limpio_oc[columna_importe_oc].describe())
     
     if 'moneda' in df_limpio_oc.columns:
         plt.figure()
-        sns.countplot(y=df_limpio_oc['moneda'], order = df_limpio_oc['moneda'].value_counts().index)
+        conteo_monedas = df_limpio_oc['moneda'].value_counts()
+        sns.countplot(y=df_limpio_oc['moneda'], order = conteo_monedas[conteo_monedas > 0].index)
         plt.title('Conteo de Órdenes por Moneda (OC)')
-        plt.show() 
+        finalizar_grafico('oc_conteo_por_moneda', directorio_salida, guardar_graficos)
     # (Aquí deberías tener el resto de tus gráficos de EDA para OC que estaban en versiones anteriores del script)
     # Por ejemplo: boxplot, top gerencias general y por moneda, etc. con sus plt.show()
 
-    nombre_archivo_oc_formateado = 'ARSAT_Finanzas_ordenes_compra_FORMATEADO_FINAL.xlsx'
+    inicio_fase = reportar_fase('OC', 'EDA y gráficos', inicio_fase)
+
+    nombre_archivo_oc_formateado = os.path.join(directorio_salida, 'ARSAT_Finanzas_ordenes_compra_FORMATEADO_FINAL.xlsx')
     try:
-        df_para_excel_oc = df_limpio_oc.copy()
-        nombres_encabezado_oc = [col.replace('_', ' ').title() for col in df_para_excel_oc.columns]
-        if columna_fecha_oc in df_para_excel_oc.columns and pd.api.types.is_datetime64_any_dtype(df_para_excel_oc[columna_fecha_oc]):
-             df_para_excel_oc[columna_fecha_oc] = df_para_excel_oc[columna_fecha_oc].dt.strftime('%d/%m/%Y')
-
-        engine_kwargs_oc = {'options': {'strings_to_numbers': False, 'strings_to_formulas': False}}
-        with pd.ExcelWriter(nombre_archivo_oc_formateado, engine='xlsxwriter', engine_kwargs=engine_kwargs_oc) as writer:
-            df_para_excel_oc.to_excel(writer, sheet_name='Datos_Ordenes_Compra', index=False, header=False, startrow=1)
-            workbook  = writer.book
-            worksheet = writer.sheets['Datos_Ordenes_Compra']
-            header_format = workbook.add_format({'bold': True, 'text_wrap': False, 'valign': 'vcenter', 'align': 'center', 'fg_color': '#D7E4BC', 'border': 1})
-            for col_num, value in enumerate(nombres_encabezado_oc):
-                worksheet.write(0, col_num, value, header_format)
-            for i, col_original_name in enumerate(df_limpio_oc.columns):
-                if col_original_name == columna_fecha_oc and df_para_excel_oc[columna_fecha_oc].notna().any() and isinstance(df_para_excel_oc[columna_fecha_oc].dropna().iloc[0], str) : # Check if not empty and first non-NaN is string
-                    column_len = 12 
-                else:
-                    try: max_content_len = df_para_excel_oc[col_original_name].astype(str).map(len).max()
-                    except: max_content_len = 10 
-                    header_len = len(nombres_encabezado_oc[i])
-                    column_len = max(max_content_len, header_len) + 2
-                worksheet.set_column(i, i, min(column_len, 50))
-            worksheet.freeze_panes(1, 0)
+        # La clave de proveedor es una columna auxiliar del dashboard: el Excel mantiene las columnas del archivo.
+        hojas_oc = exportar_excel(df_limpio_oc.drop(columns=[COLUMNA_PROVEEDOR_CLAVE], errors='ignore'), nombre_archivo_oc_formateado, 'Datos_Ordenes_Compra', '#D7E4BC')
+        if len(hojas_oc) > 1:
+            print(f"[OC] El archivo supera el límite de filas de Excel: se repartió en las hojas {hojas_oc}.")
         print(f"\n[OC] DataFrame de OC limpio y formateado guardado como '{nombre_archivo_oc_formateado}'")
     except Exception as e:
         print(f"\n[OC] Error al guardar el archivo Excel de OC formateado: {e}")
+        if errores is not None: errores.append(f"[OC] Exportación a Excel: {e}")
+    reportar_fase('OC', 'Exportación a Excel', inicio_fase)
 
-    df_oc_pesos_mensual = None
-    if columna_fecha_oc in df_limpio_oc.columns and df_limpio_oc[columna_fecha_oc].notnull().all():
-        df_oc_pesos = df_limpio_oc[df_limpio_oc['moneda'] == 'Pesos'].copy()
-        if not df_oc_pesos.empty and columna_importe_oc in df_oc_pesos.columns:
-            df_oc_pesos_mensual = df_oc_pesos.set_index(columna_fecha_oc)[columna_importe_oc].resample('ME').sum()
-            df_oc_pesos_mensual.name = 'gasto_ordenes_ars'
-            
     print("<<< [OC] Fin Procesamiento de Órdenes de Compra.")
     return df_limpio_oc, df_oc_pesos_mensual
 
@@ -145,8 +127,9 @@ def procesar_y_analizar_ordenes_compra(ruta_archivo_oc):
 #*****************************************************************************************************************
 #************************************ FUNCIÓN PARA PROCESAR TRANSFERENCIAS (CSV) - CORREGIDA ***********************
 #*****************************************************************************************************************
-def procesar_y_analizar_transferencias(ruta_archivo_transferencias_csv):
+def procesar_y_analizar_transferencias(ruta_archivo_transferencias_csv, directorio_salida='.', guardar_graficos=False, errores=None):
     print("\n\n>>> [TR] Iniciando Procesamiento de Transferencias...")
+    inicio_fase = time.perf_counter()
     print(f"[TR] Intentando cargar el archivo de transferencias CSV desde: {ruta_archivo_transferencias_csv}")
     try:
         # Leer el CSV asumiendo que la primera línea es el encabezado y la coma es el delimitador.
@@ -191,18 +174,19 @@ def procesar_y_analizar_transferencias(ruta_archivo_transferencias_csv):
     # Limpieza de Tipos de Datos
     if col_importe_transf in df_transferencias.columns:
         print(f"[TR] Limpiando la columna transferencias '{col_importe_transf}'...")
-        df_transferencias[col_importe_transf] = df_transferencias[col_importe_transf].astype(str)
-        df_transferencias[col_importe_transf] = df_transferencias[col_importe_transf].str.replace('"', '', regex=False)
-        df_transferencias[col_importe_transf] = df_transferencias[col_importe_transf].str.replace('$', '', regex=False).str.strip()
-        df_transferencias[col_importe_transf] = df_transferencias[col_importe_transf].str.replace('.', '', regex=False)
-        df_transferencias[col_importe_transf] = df_transferencias[col_importe_transf].str.replace(',', '.', regex=False)
-        df_transferencias[col_importe_transf] = pd.to_numeric(df_transferencias[col_importe_transf], errors='coerce')
+        df_transferencias[col_importe_transf], importes_rechazados = parsear_importes(df_transferencias[col_importe_transf])
+        if importes_rechazados.any():
+            filas_rechazadas = importes_rechazados[importes_rechazados].index
+            ejemplos = ', '.join(map(str, filas_rechazadas[:FILAS_RECHAZADAS_A_MOSTRAR])) + (', ...' if len(filas_rechazadas) > FILAS_RECHAZADAS_A_MOSTRAR else '')
+            print(f"[TR] ¡Atención! {len(filas_rechazadas)} importes no interpretables (quedan como NaN), en las filas: {ejemplos}")
         print(f"[TR] Tipo de dato de '{col_importe_transf}' ahora: {df_transferencias[col_importe_transf].dtype}")
 
     if col_fecha_transf in df_transferencias.columns:
         print(f"[TR] Limpiando y convirtiendo la columna transferencias '{col_fecha_transf}'...")
-        df_transferencias[col_fecha_transf] = df_transferencias[col_fecha_transf].str.strip()
-        df_transferencias[col_fecha_transf] = pd.to_datetime(df_transferencias[col_fecha_transf], dayfirst=True, errors='coerce')
+        reporte_fechas = {}
+        df_transferencias[col_fecha_transf] = convertir_fecha(df_transferencias[col_fecha_transf], reporte_fechas)
+        if reporte_fechas['fechas_invalidas']:
+            print(f"[TR] ¡Atención! {reporte_fechas['fechas_invalidas']} fechas no pudieron ser convertidas.")
         print(f"[TR] Tipo de dato de '{col_fecha_transf}' ahora: {df_transferencias[col_fecha_transf].dtype}")
 
     if col_desc_transf in df_transferencias.columns:
@@ -211,13 +195,14 @@ def procesar_y_analizar_transferencias(ruta_archivo_transferencias_csv):
     print("\n[TR] DataFrame de Transferencias Limpio:")
     df_transferencias.info()
     print(df_transferencias.head())
+    inicio_fase = reportar_fase('TR', 'Carga y limpieza', inicio_fase)
 
     print("\n\n[TR] Iniciando EDA para Transferencias...")
     if col_importe_transf in df_transferencias.columns and pd.api.types.is_numeric_dtype(df_transferencias[col_importe_transf]):
         plt.figure()
         sns.histplot(df_transferencias[col_importe_transf], kde=True, bins=min(10, len(df_transferencias)))
         plt.title('Distribución de Importes de Transferencias')
-        plt.show() 
+        finalizar_grafico('tr_distribucion_importes', directorio_salida, guardar_graficos)
     
     df_transf_mensual = None
     if col_fecha_transf in df_transferencias.columns and \
@@ -233,85 +218,129 @@ def procesar_y_analizar_transferencias(ruta_archivo_transferencias_csv):
         plt.figure(figsize=(15,7))
         df_transf_mensual.plot(kind='line', marker='o')
         plt.title('Importe Total de Transferencias por Mes')
-        plt.show() 
+        finalizar_grafico('tr_importe_mensual', directorio_salida, guardar_graficos)
         
-    nombre_archivo_transf_formateado = 'ARSAT_Finanzas_transferencias_FORMATEADO.xlsx'
+    inicio_fase = reportar_fase('TR', 'EDA y gráficos', inicio_fase)
+
+    nombre_archivo_transf_formateado = os.path.join(directorio_salida, 'ARSAT_Finanzas_transferencias_FORMATEADO.xlsx')
     try:
-        df_para_excel_transf = df_transferencias.copy()
-        nombres_encabezado_transf = [col.replace('_', ' ').title() for col in df_para_excel_transf.columns]
-        if col_fecha_transf in df_para_excel_transf.columns and pd.api.types.is_datetime64_any_dtype(df_para_excel_transf[col_fecha_transf]):
-             df_para_excel_transf[col_fecha_transf] = df_para_excel_transf[col_fecha_transf].dt.strftime('%d/%m/%Y')
-        
-        engine_kwargs_transf = {'options': {'strings_to_numbers': False, 'strings_to_formulas': False}}
-        with pd.ExcelWriter(nombre_archivo_transf_formateado, engine='xlsxwriter', engine_kwargs=engine_kwargs_transf) as writer:
-            df_para_excel_transf.to_excel(writer, sheet_name='Datos_Transferencias', index=False, header=False, startrow=1)
-            workbook  = writer.book
-            worksheet = writer.sheets['Datos_Transferencias']
-            header_format = workbook.add_format({'bold': True, 'text_wrap': False, 'valign': 'vcenter', 'align': 'center', 'fg_color': '#C9DAF8', 'border': 1})
-            for col_num, value in enumerate(nombres_encabezado_transf):
-                worksheet.write(0, col_num, value, header_format)
-            for i, col_original_name in enumerate(df_transferencias.columns):
-                if col_original_name == col_fecha_transf and df_para_excel_transf[col_fecha_transf].notna().any() and isinstance(df_para_excel_transf[col_fecha_transf].dropna().iloc[0], str) :
-                    column_len = 12 
-                else:
-                    try: max_content_len = df_para_excel_transf[col_original_name].astype(str).map(len).max()
-                    except: max_content_len = 10 
-                    header_len = len(nombres_encabezado_transf[i])
-                    column_len = max(max_content_len, header_len) + 2
-                worksheet.set_column(i, i, min(column_len, 50))
-            worksheet.freeze_panes(1, 0)
+        hojas_transf = exportar_excel(df_transferencias, nombre_archivo_transf_formateado, 'Datos_Transferencias', '#C9DAF8')
+        if len(hojas_transf) > 1:
+            print(f"[TR] El archivo supera el límite de filas de Excel: se repartió en las hojas {hojas_transf}.")
         print(f"\n[TR] DataFrame de Transferencias limpio y formateado guardado como '{nombre_archivo_transf_formateado}'")
     except Exception as e:
         print(f"\n[TR] Error al guardar el archivo Excel de Transferencias formateado: {e}")
+        if errores is not None: errores.append(f"[TR] Exportación a Excel: {e}")
+    reportar_fase('TR', 'Exportación a Excel', inicio_fase)
         
     print("<<< [TR] Fin Procesamiento de Transferencias.")
     return df_transferencias, df_transf_mensual
 
 
+# --- Correlación y Ejecución de los Pipelines ---
+def analizar_correlacion(df_oc_pesos_mensual, df_transf_mensual, directorio_salida='.', guardar_graficos=False):
+    print("\n\n--- Iniciando Fase de Correlación ---")
+    if df_oc_pesos_mensual is not None and df_transf_mensual is not None:
+        print("[CORR] DataFrames mensuales disponibles para correlación.")
+        df_correlacion = pd.merge(df_transf_mensual, df_oc_pesos_mensual, 
+                                  left_index=True, right_index=True, how='inner')
+        
+        print("\n[CORR] Datos mensuales para correlación (Transferencias vs Órdenes en ARS):")
+        print(df_correlacion.head())
+
+        if len(df_correlacion) > 1:
+            correlacion_calculada = df_correlacion['ingreso_transferencias'].corr(df_correlacion['gasto_ordenes_ars'])
+            print(f"\n[CORR] Correlación entre ingresos por transferencias y gastos de órdenes (ARS) mensuales: {correlacion_calculada:.2f}")
+
+            plt.figure(figsize=(8, 8))
+            sns.scatterplot(data=df_correlacion, x='ingreso_transferencias', y='gasto_ordenes_ars')
+            sns.regplot(data=df_correlacion, x='ingreso_transferencias', y='gasto_ordenes_ars', scatter=False, color='red')
+            plt.title('Correlación: Transferencias Recibidas vs. Gasto Órdenes (ARS) Mensual')
+            plt.xlabel('Total Transferencias Recibidas por Mes')
+            plt.ylabel('Total Gasto Órdenes (ARS) por Mes')
+            plt.ticklabel_format(style='plain', axis='both')
+            plt.grid(True)
+            finalizar_grafico('correlacion_transferencias_vs_ordenes', directorio_salida, guardar_graficos)
+        else:
+            print("\n[CORR] No hay suficientes datos mensuales superpuestos para calcular o visualizar la correlación.")
+    else:
+        print("\n[CORR] No se pueden realizar los cálculos de correlación debido a que faltan datos mensuales de órdenes o transferencias.")
+
+
+def ejecutar_pipeline(funcion_pipeline, ruta_archivo, directorio_salida, guardar_graficos):
+    # Corre en su propio proceso: en modo batch fija el backend Agg para no abrir ventanas.
+    # Sólo devuelve la serie mensual (lo que necesita la correlación), no el DataFrame completo.
+    if guardar_graficos:
+        plt.switch_backend('Agg')
+    errores = []
+    inicio = time.perf_counter()
+    try:
+        df_limpio, serie_mensual = funcion_pipeline(ruta_archivo, directorio_salida, guardar_graficos, errores)
+    except Exception as e:
+        print(f"[ERROR] {funcion_pipeline.__name__} falló: {e}")
+        df_limpio, serie_mensual = None, None
+    if df_limpio is None:
+        errores.append(f"{funcion_pipeline.__name__}: no se pudieron procesar los datos de '{ruta_archivo}'")
+    return serie_mensual, errores, time.perf_counter() - inicio
+
+
+def crear_parser_argumentos():
+    directorio_script = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Análisis de órdenes de compra y transferencias de ARSAT (modo batch).")
+    parser.add_argument('--ordenes', default=os.path.join(directorio_script, NOMBRE_ARCHIVO_OC), help="CSV de órdenes de compra.")
+    parser.add_argument('--transferencias', default=os.path.join(directorio_script, NOMBRE_ARCHIVO_TRANSFERENCIAS), help="CSV de transferencias recibidas.")
+    parser.add_argument('--salida', default='.', help="Directorio para los Excel formateados y los gráficos PNG.")
+    parser.add_argument('--mostrar-graficos', action='store_true', help="Mostrar los gráficos en ventanas en lugar de guardarlos (implica --secuencial).")
+    parser.add_argument('--secuencial', action='store_true', help="Procesar órdenes y transferencias una después de la otra, en este mismo proceso.")
+    return parser
+
+
 #*****************************************************************************************************************
 #******************************************** SCRIPT PRINCIPAL **************************************************
 #*****************************************************************************************************************
-print("\n--- SCRIPT PRINCIPAL: INICIO DE EJECUCIÓN ---")
-
-# --- Procesar Órdenes de Compra ---
-ruta_ordenes_compra = r"C:\Tamara\Programación\Proyectos\Limpieza de datos datasets\ARSAT Finanzas\ARSAT_Finanzas_ordenes_de_compra-2022_marzo_2023.csv"
-print(f"\n--- Llamando a procesar_y_analizar_ordenes_compra con ruta: {ruta_ordenes_compra} ---")
-df_oc_limpio, df_oc_pesos_mensual = procesar_y_analizar_ordenes_compra(ruta_ordenes_compra)
-print("--- Retorno de procesar_y_analizar_ordenes_compra recibido ---")
-
-# --- Procesar Transferencias ---
-ruta_transferencias_recibidas_csv = r'C:\Tamara\Programación\Proyectos\Limpieza de datos datasets\ARSAT Finanzas\transferencias-recibidas-2020-v5.csv'
-print(f"\n--- Llamando a procesar_y_analizar_transferencias con ruta: {ruta_transferencias_recibidas_csv} ---")
-df_transf_limpio, df_transf_mensual = procesar_y_analizar_transferencias(ruta_transferencias_recibidas_csv)
-print("--- Retorno de procesar_y_analizar_transferencias recibido ---")
-
-
-# --- Fase de Correlación (si ambos DataFrames mensuales están disponibles) ---
-print("\n\n--- Iniciando Fase de Correlación ---")
-if df_oc_pesos_mensual is not None and df_transf_mensual is not None:
-    print("[CORR] DataFrames mensuales disponibles para correlación.")
-    df_correlacion = pd.merge(df_transf_mensual, df_oc_pesos_mensual, 
-                              left_index=True, right_index=True, how='inner')
-    
-    print("\n[CORR] Datos mensuales para correlación (Transferencias vs Órdenes en ARS):")
-    print(df_correlacion.head())
-
-    if len(df_correlacion) > 1:
-        correlacion_calculada = df_correlacion['ingreso_transferencias'].corr(df_correlacion['gasto_ordenes_ars'])
-        print(f"\n[CORR] Correlación entre ingresos por transferencias y gastos de órdenes (ARS) mensuales: {correlacion_calculada:.2f}")
-
-        plt.figure(figsize=(8, 8))
-        sns.scatterplot(data=df_correlacion, x='ingreso_transferencias', y='gasto_ordenes_ars')
-        sns.regplot(data=df_correlacion, x='ingreso_transferencias', y='gasto_ordenes_ars', scatter=False, color='red')
-        plt.title('Correlación: Transferencias Recibidas vs. Gasto Órdenes (ARS) Mensual')
-        plt.xlabel('Total Transferencias Recibidas por Mes')
-        plt.ylabel('Total Gasto Órdenes (ARS) por Mes')
-        plt.ticklabel_format(style='plain', axis='both')
-        plt.grid(True)
-        plt.show() 
+def main(argv=None):
+    argumentos = crear_parser_argumentos().parse_args(argv)
+    guardar_graficos = not argumentos.mostrar_graficos
+    os.makedirs(argumentos.salida, exist_ok=True)
+    print("\n--- SCRIPT PRINCIPAL: INICIO DE EJECUCIÓN ---")
+    inicio_total = time.perf_counter()
+
+    # --- Procesar Órdenes de Compra y Transferencias (en paralelo, un proceso cada una) ---
+    pipelines = [
+        ('OC', procesar_y_analizar_ordenes_compra, argumentos.ordenes),
+        ('TR', procesar_y_analizar_transferencias, argumentos.transferencias),
+    ]
+    if argumentos.secuencial or argumentos.mostrar_graficos:
+        resultados = [ejecutar_pipeline(funcion, ruta, argumentos.salida, guardar_graficos) for _, funcion, ruta in pipelines]
     else:
-        print("\n[CORR] No hay suficientes datos mensuales superpuestos para calcular o visualizar la correlación.")
-else:
-    print("\n[CORR] No se pueden realizar los cálculos de correlación debido a que faltan datos mensuales de órdenes o transferencias.")
+        with ProcessPoolExecutor(max_workers=len(pipelines)) as ejecutor:
+            futuros = [ejecutor.submit(ejecutar_pipeline, funcion, ruta, argumentos.salida, guardar_graficos) for _, funcion, ruta in pipelines]
+            resultados = [futuro.result() for futuro in futuros]
 
-print("\n\n--- ANÁLISIS COMPLETO FINALIZADO ---")
\ No newline at end of file
+    (df_oc_pesos_mensual, errores_oc, tiempo_oc), (df_transf_mensual, errores_tr, tiempo_tr) = resultados
+
+    # --- Fase de Correlación (si ambos DataFrames mensuales están disponibles) ---
+    if guardar_graficos:
+        plt.switch_backend('Agg')
+    inicio_correlacion = time.perf_counter()
+    errores = errores_oc + errores_tr
+    try:
+        analizar_correlacion(df_oc_pesos_mensual, df_transf_mensual, argumentos.salida, guardar_graficos)
+    except Exception as e:
+        print(f"[CORR] Error en la fase de correlación: {e}")
+        errores.append(f"Correlación: {e}")
+    tiempo_correlacion = time.perf_counter() - inicio_correlacion
+
+    print("\n[TIEMPOS] Órdenes de compra: {:.2f} s | Transferencias: {:.2f} s | Correlación: {:.2f} s | Total: {:.2f} s".format(
+        tiempo_oc, tiempo_tr, tiempo_correlacion, time.perf_counter() - inicio_total))
+    if errores:
+        print("\n--- ANÁLISIS FINALIZADO CON ERRORES ---")
+        for error in errores:
+            print(f"[ERROR] {error}")
+        return 1
+    print("\n\n--- ANÁLISIS COMPLETO FINALIZADO ---")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+# servidor_arsat.py
+# --- Servidor de Streamlit con Datos Precalentados ---
+# Uso: python servidor_arsat.py dashboard_arsat.py [opciones de "streamlit run", p.ej. --server.port 8502]
+# Equivale a "streamlit run", pero en el mismo proceso empieza a cargar los datasets (datos_arsat.precalentar)
+# mientras el servidor arranca: la primera sesión encuentra los datos ya cargados (o espera sólo lo que falta)
+# y todas las sesiones comparten esa única copia en memoria.
+import os
+import sys
+import threading
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Uso: python servidor_arsat.py dashboard_arsat.py [opciones de streamlit run]")
+        return 2
+    ruta_script = os.path.abspath(argv[0])
+    # El dashboard importa datos_arsat desde su carpeta: tiene que ser el mismo módulo que se precalienta.
+    sys.path.insert(0, os.path.dirname(ruta_script))
+    import datos_arsat
+    threading.Thread(target=datos_arsat.precalentar, name='precalentar_datos', daemon=True).start()
+
+    from streamlit.web import cli
+    sys.argv = ["streamlit", "run", ruta_script, *argv[1:]]
+    return cli.main(prog_name="streamlit")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from formato_arsat import formatear_fechas, formatear_importes
+from limpieza_arsat import COLUMNA_IMPORTE
+
+# --- Tabla Paginada ---
+# La tabla trabaja sobre el DataFrame tipado (sin columnas de texto formateadas). El orden se calcula
+# sobre la columna elegida y sólo las filas de la página visible se formatean para mostrarse, así que
+# el costo de formato no crece con la cantidad de filas filtradas.
+FILAS_POR_PAGINA_OPCIONES = [25, 50, 100, 250]
+ORDEN_ORIGINAL = "(orden original)"
+
+
+def posiciones_ordenadas(df, columna, ascendente=True):
+    # Posiciones (iloc) de df ordenado por columna; orden estable y nulos al final. None = orden original.
+    if columna is None or columna not in df.columns:
+        return None
+    serie = df[columna].reset_index(drop=True)
+    return serie.sort_values(ascending=ascendente, kind='stable', na_position='last').index.to_numpy()
+
+def filas_de_pagina(df, posiciones, numero_pagina, filas_por_pagina):
+    inicio = (numero_pagina - 1) * filas_por_pagina
+    fin = min(inicio + filas_por_pagina, len(df))
+    if posiciones is None:
+        return df.iloc[inicio:fin]
+    return df.iloc[posiciones[inicio:fin]]
+
+def formatear_pagina(pagina, columnas, simbolo=""):
+    # columnas: lista de (columna, título). Números y fechas con formato es-AR; el resto como texto. Sólo el
+    # importe lleva el símbolo de la moneda (la cotización del total consolidado, p.ej., es un número sin símbolo).
+    tabla = {}
+    for columna, titulo in columnas:
+        if columna not in pagina.columns:
+            continue
+        serie = pagina[columna]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            tabla[titulo] = formatear_fechas(serie)
+        elif pd.api.types.is_float_dtype(serie):
+            tabla[titulo] = formatear_importes(serie.to_numpy(), simbolo if columna == COLUMNA_IMPORTE else "")
+        else:
+            tabla[titulo] = serie.to_numpy(dtype=object)
+    return pd.DataFrame(tabla, index=np.arange(len(pagina)))
+
+
+def tabla_paginada(df, columnas, clave, clave_datos=None, simbolo=""):
+    # Muestra df con controles de orden y paginación. clave identifica los widgets; clave_datos
+    # (p.ej. versión + filtros) permite reutilizar el orden ya calculado mientras los datos no cambien.
+    if df.empty:
+        st.write("No hay datos para mostrar según los filtros aplicados.")
+        return
+    titulos = {titulo: columna for columna, titulo in columnas if columna in df.columns}
+    col_orden, col_sentido, col_filas, col_pagina = st.columns([3, 2, 2, 2])
+    with col_orden:
+        titulo_orden = st.selectbox("Ordenar por:", [ORDEN_ORIGINAL] + list(titulos), key=f"{clave}_orden")
+    with col_sentido:
+        ascendente = st.radio("Sentido:", ["Ascendente", "Descendente"], horizontal=True, key=f"{clave}_sentido") == "Ascendente"
+    with col_filas:
+        filas_por_pagina = st.selectbox("Filas por página:", FILAS_POR_PAGINA_OPCIONES, index=2, key=f"{clave}_filas")
+    n_paginas = max(1, -(-len(df) // filas_por_pagina))
+    if st.session_state.get(f"{clave}_pagina", 1) > n_paginas:
+        # Si los filtros achicaron el resultado, se vuelve a la última página existente.
+        st.session_state[f"{clave}_pagina"] = n_paginas
+    with col_pagina:
+        numero_pagina = min(int(st.number_input("Página:", min_value=1, step=1, key=f"{clave}_pagina")), n_paginas)
+
+    columna_orden = titulos.get(titulo_orden)
+    clave_orden = (clave_datos, len(df), columna_orden, ascendente)
+    cache_orden = st.session_state.setdefault(f"{clave}_cache_orden", {})
+    if clave_datos is None or cache_orden.get('clave') != clave_orden:
+        cache_orden['clave'] = clave_orden
+        cache_orden['posiciones'] = posiciones_ordenadas(df, columna_orden, ascendente)
+    posiciones = cache_orden['posiciones']
+
+    pagina = filas_de_pagina(df, posiciones, numero_pagina, filas_por_pagina)
+    st.dataframe(formatear_pagina(pagina, columnas, simbolo), hide_index=True, use_container_width=True)
+    inicio = (numero_pagina - 1) * filas_por_pagina
+    st.caption(f"Página {numero_pagina:,} de {n_paginas:,} · filas {inicio + 1:,}–{inicio + len(pagina):,} de {len(df):,}".replace(",", "."))